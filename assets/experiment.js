@@ -82,7 +82,11 @@
   // --- Mark as learned (localStorage) ---
   var STORAGE_KEY = 'chem_learned';
   var learnedBtn = document.getElementById('markLearned');
-  var expId = document.body.getAttribute('data-exp-id');
+
+  // Read on demand: router.js swaps data-exp-id during client-side navigation.
+  function currentExpId() {
+    return document.body.getAttribute('data-exp-id');
+  }
 
   function getLearned() {
     try {
@@ -97,6 +101,7 @@
   }
 
   function updateLearnedBtn() {
+    var expId = currentExpId();
     if (!learnedBtn || !expId) return;
     var list = getLearned();
     var done = list.indexOf(expId) !== -1;
@@ -104,9 +109,11 @@
     learnedBtn.classList.toggle('is-learned', done);
   }
 
-  if (learnedBtn && expId) {
+  if (learnedBtn && currentExpId()) {
     updateLearnedBtn();
+    document.addEventListener('chem:navigate', updateLearnedBtn);
     learnedBtn.addEventListener('click', function () {
+      var expId = currentExpId();
       var list = getLearned();
       var idx = list.indexOf(expId);
       if (idx === -1) {
@@ -163,220 +170,130 @@
     });
   });
 
-  // --- Equation practice mode ---
-  var eqBtn = document.getElementById('eqPractice');
-  if (eqBtn) {
-    // Hide button if no interactive blanks exist
-    var hasBlanks = document.querySelectorAll('.cond-blank, .symbol-blank').length > 0;
-    if (!hasBlanks) {
-      eqBtn.style.display = 'none';
-    } else {
-    var isEqMode = false;
+  // --- Widget hydration ---
+  // Widget modules (assets/widgets/*.js, emitted per page by build_site.py) wire
+  // themselves through the delegated listeners below, so the only per-widget work
+  // left is one-off setup (e.g. shuffling chips). That setup is deferred until the
+  // widget scrolls near the viewport or its <details> opens.
+  var hydrators = [];
 
-    // Normalize answer text for comparison
-    var SYMBOL_ALIASES = {
-      '上': '↑', 'up': '↑', '升': '↑', '气': '↑',
-      '下': '↓', 'down': '↓', '沉': '↓', '沉淀': '↓'
-    };
+  function hydrate(el) {
+    if (el.getAttribute('data-hydrated')) return;
+    el.setAttribute('data-hydrated', '1');
+    hydrators.forEach(function (h) {
+      if (el.matches(h.selector)) h.fn(el);
+    });
+  }
 
-    function checkBlankAnswer(blank, input) {
-      var answer = blank.getAttribute('data-answer') || '';
-      var val = input.value.trim();
-      var normalized = SYMBOL_ALIASES[val] || val;
-      if (normalized === answer) {
-        blank.classList.add('cond-correct');
-        blank.classList.remove('cond-wrong');
-        input.disabled = true;
-        input.value = answer;
-        return true;
-      } else {
-        blank.classList.add('cond-wrong');
-        blank.classList.remove('cond-correct');
-        input.select();
-        setTimeout(function () { blank.classList.remove('cond-wrong'); }, 800);
-        return false;
-      }
-    }
+  function hydrateWithin(root) {
+    hydrators.forEach(function (h) {
+      root.querySelectorAll(h.selector).forEach(hydrate);
+    });
+  }
 
-    function createInputForBlank(blank) {
-      var isSymbol = blank.classList.contains('symbol-blank');
-      var inp = document.createElement('input');
-      inp.type = 'text';
-      inp.className = 'eq-input';
-      inp.setAttribute('autocomplete', 'off');
-      inp.setAttribute('spellcheck', 'false');
-      if (isSymbol) {
-        inp.placeholder = '↑↓';
-        inp.style.width = '2.5em';
-      } else {
-        inp.placeholder = '条件';
-        inp.style.width = '4em';
-      }
-      inp.addEventListener('keydown', function (e) {
-        if (e.key === 'Enter') {
-          e.preventDefault();
-          if (checkBlankAnswer(blank, inp)) {
-            // Move focus to next unanswered input
-            var all = Array.from(document.querySelectorAll('.eq-input:not(:disabled)'));
-            if (all.length) all[0].focus();
-          }
-        }
+  var observer = null;
+  if ('IntersectionObserver' in window) {
+    observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (!entry.isIntersecting) return;
+        observer.unobserve(entry.target);
+        hydrate(entry.target);
       });
-      blank.textContent = '';
-      blank.appendChild(inp);
-    }
+    }, { rootMargin: '200px 0px' });
+  }
 
-    eqBtn.addEventListener('click', function () {
-      isEqMode = !isEqMode;
-      document.querySelectorAll('.chem-eq-display').forEach(function (el) {
-        el.style.display = isEqMode ? 'none' : '';
-      });
-      document.querySelectorAll('.chem-eq-interactive').forEach(function (el) {
-        el.style.display = isEqMode ? 'inline' : 'none';
-      });
-      eqBtn.textContent = isEqMode ? '退出练习' : '方程式练习';
-      eqBtn.classList.toggle('active', isEqMode);
-      if (isEqMode) {
-        // Create input fields inside blanks
-        document.querySelectorAll('.cond-blank, .symbol-blank').forEach(function (blank) {
-          blank.classList.remove('cond-correct', 'cond-wrong');
-          createInputForBlank(blank);
-        });
-        // Auto-focus first input
-        var first = document.querySelector('.eq-input');
-        if (first) first.focus();
-      } else {
-        // Reset blanks
-        document.querySelectorAll('.cond-blank, .symbol-blank').forEach(function (blank) {
-          blank.classList.remove('cond-correct', 'cond-wrong');
-          blank.textContent = '?';
-        });
-      }
-    });
-    } // end else (hasBlanks)
+  function watch(el) {
+    if (observer) observer.observe(el);
+    else hydrate(el);
   }
 
-  // --- Step ordering game ---
-  document.querySelectorAll('.step-order-game').forEach(function (game) {
-    var correct = JSON.parse(game.getAttribute('data-correct'));
-    var choicesEl = game.querySelector('.step-order-choices');
-    var answerEl = game.querySelector('.step-order-answer');
-    var resetBtn = game.querySelector('.step-reset-btn');
-    var successEl = game.querySelector('.step-order-success');
-    var whyEl = game.parentElement.querySelector('.step-why-questions');
-    var selected = [];
+  function registerWidget(selector, fn) {
+    hydrators.push({ selector: selector, fn: fn });
+    document.querySelectorAll(selector).forEach(watch);
+  }
 
-    function shuffle(container) {
-      var items = Array.from(container.children);
-      for (var i = items.length - 1; i > 0; i--) {
-        var j = Math.floor(Math.random() * (i + 1));
-        container.appendChild(items[j]);
-        var tmp = items[i]; items[i] = items[j]; items[j] = tmp;
-      }
-    }
-    shuffle(choicesEl);
+  // Pick up widgets inserted after load (e.g. content swapped in by router.js).
+  function scan(root) {
+    hydrators.forEach(function (h) {
+      root.querySelectorAll(h.selector).forEach(watch);
+    });
+  }
 
-    choicesEl.addEventListener('click', function (e) {
-      var chip = e.target.closest('.step-chip');
-      if (!chip || chip.classList.contains('used')) return;
-      var label = chip.getAttribute('data-label');
-      if (label === correct[selected.length]) {
-        selected.push(label);
-        chip.classList.add('used', 'step-correct');
-        var placed = document.createElement('span');
-        placed.className = 'step-placed';
-        placed.textContent = label;
-        answerEl.appendChild(placed);
-        if (selected.length === correct.length) {
-          if (successEl) successEl.style.display = 'block';
-          if (whyEl) whyEl.style.display = '';
-        }
-      } else {
-        chip.classList.add('step-wrong');
-        setTimeout(function () { chip.classList.remove('step-wrong'); }, 500);
-      }
+  // 'toggle' does not bubble, so listen in the capture phase.
+  document.addEventListener('toggle', function (e) {
+    var d = e.target;
+    if (d.tagName === 'DETAILS' && d.open) hydrateWithin(d);
+  }, true);
+
+  // --- PDF extract fragments ---
+  // The raw extract is built into experiments/extracts/exp-NN.html and only
+  // fetched the first time its <details> opens; the link inside is the no-JS
+  // fallback and stays in place if the fetch fails.
+  // The minified fragment defines its repeated inline styles as classes in a
+  // <style> block (tools/minify_html.py); class names hash the declarations,
+  // so a block already on the page is skipped.
+  function adoptStyles(doc) {
+    var have = {};
+    document.head.querySelectorAll('style').forEach(function (st) { have[st.textContent] = true; });
+    doc.head.querySelectorAll('style').forEach(function (st) {
+      if (have[st.textContent]) return;
+      var copy = document.createElement('style');
+      copy.textContent = st.textContent;
+      document.head.appendChild(copy);
     });
+  }
 
-    if (resetBtn) {
-      resetBtn.addEventListener('click', function () {
-        selected = [];
-        answerEl.innerHTML = '';
-        choicesEl.querySelectorAll('.step-chip').forEach(function (c) {
-          c.classList.remove('used', 'step-correct', 'step-wrong');
-        });
-        shuffle(choicesEl);
-        if (successEl) successEl.style.display = 'none';
-        if (whyEl) whyEl.style.display = 'none';
-        whyEl && whyEl.querySelectorAll('.why-a').forEach(function (a) {
-          a.classList.remove('revealed');
-        });
+  function loadExtract(d) {
+    var src = d.getAttribute('data-src');
+    var body = d.querySelector('.pdf-extract-body');
+    if (!src || !body || !window.fetch || !window.DOMParser) return;
+    d.removeAttribute('data-src');
+    fetch(src, { credentials: 'same-origin' })
+      .then(function (r) {
+        if (!r.ok) throw new Error('HTTP ' + r.status);
+        return r.text();
+      })
+      .then(function (text) {
+        var doc = new DOMParser().parseFromString(text, 'text/html');
+        var extract = doc.getElementById('pdfExtract');
+        if (!extract) return;
+        adoptStyles(doc);
+        body.innerHTML = extract.innerHTML;
+      })
+      .catch(function () {
+        d.setAttribute('data-src', src);
       });
-    }
-  });
+  }
 
-  // --- Why question reveal ---
-  document.addEventListener('click', function (e) {
-    var ans = e.target.closest('.why-a');
-    if (ans) ans.classList.toggle('revealed');
-  });
+  document.addEventListener('toggle', function (e) {
+    var d = e.target;
+    if (d.tagName === 'DETAILS' && d.open && d.hasAttribute('data-src')) loadExtract(d);
+  }, true);
 
-  // --- Q&A card reveal ---
-  document.addEventListener('click', function (e) {
-    var ans = e.target.closest('.qa-answer');
-    if (ans) ans.classList.toggle('qa-hidden');
-  });
+  // --- Delegated handlers ---
+  // First matching selector wins; 'enter' fires for the Enter key only.
+  var handlers = { click: [], enter: [] };
 
-  // --- Apparatus labeling game ---
-  document.querySelectorAll('.apparatus-game').forEach(function (game) {
-    var inputs = Array.from(game.querySelectorAll('.apparatus-input'));
-    var markers = Array.from(game.closest('.exp-block').querySelectorAll('.apparatus-marker'));
-    var successEl = game.querySelector('.apparatus-success');
-    var resetBtn = game.querySelector('.apparatus-reset-btn');
-    var total = inputs.length;
+  function on(type, selector, fn) {
+    handlers[type].push({ selector: selector, fn: fn });
+  }
 
-    function checkAllDone() {
-      var done = game.querySelectorAll('.apparatus-input:disabled').length;
-      if (done === total && successEl) {
-        successEl.style.display = 'block';
+  function dispatch(type, e) {
+    var t = e.target;
+    if (!t.closest) return;
+    for (var i = 0; i < handlers[type].length; i++) {
+      var el = t.closest(handlers[type][i].selector);
+      if (el) {
+        handlers[type][i].fn(el, e);
+        return;
       }
     }
+  }
 
-    inputs.forEach(function (inp, idx) {
-      inp.addEventListener('keydown', function (e) {
-        if (e.key === 'Enter') {
-          e.preventDefault();
-          var answer = inp.getAttribute('data-answer') || '';
-          var val = inp.value.trim();
-          var item = inp.closest('.apparatus-input-item');
-          if (val === answer) {
-            inp.disabled = true;
-            item.classList.add('correct');
-            item.classList.remove('wrong');
-            if (markers[idx]) markers[idx].classList.add('correct');
-            var next = game.querySelector('.apparatus-input:not(:disabled)');
-            if (next) next.focus();
-            checkAllDone();
-          } else {
-            item.classList.add('wrong');
-            inp.select();
-            setTimeout(function () { item.classList.remove('wrong'); }, 600);
-          }
-        }
-      });
-    });
-
-    if (resetBtn) {
-      resetBtn.addEventListener('click', function () {
-        inputs.forEach(function (inp, idx) {
-          inp.disabled = false;
-          inp.value = '';
-          var item = inp.closest('.apparatus-input-item');
-          item.classList.remove('correct', 'wrong');
-          if (markers[idx]) markers[idx].classList.remove('correct');
-        });
-        if (successEl) successEl.style.display = 'none';
-        if (inputs[0]) inputs[0].focus();
-      });
-    }
+  document.addEventListener('click', function (e) { dispatch('click', e); });
+  document.addEventListener('keydown', function (e) {
+    if (e.key === 'Enter') dispatch('enter', e);
   });
+
+  window.__chemExp = { register: registerWidget, hydrate: hydrate, scan: scan, on: on };
 })();
@@ -0,0 +1,131 @@
+(function () {
+  // --- Practice bank (assets/practice-bank.json, built by tools/build_site.py) ---
+  // Loads every experiment's practice items in one request, on first use, and
+  // draws random mixed sets from it without fetching any experiment page.
+  // Items are grouped by type into [start, end) ranges and indexed by
+  // experiment and tag, so a draw costs O(1) per item whatever the bank's size
+  // (a sparse Fisher-Yates shuffle: only the swapped slots are stored).
+  //
+  //   ChemPractice.load().then(function (bank) {
+  //     bank.sample(10, { types: ['qa', 'equation'], tag: '点燃' });
+  //   });
+  var script = document.currentScript;
+  var BANK_URL = new URL('practice-bank.json', script ? script.src : location.href).href;
+  var loading = null;
+
+  // An ordered set of item ids: a type range, an index list, or a filtered copy.
+  function rangePool(range) {
+    return { size: range[1] - range[0], at: function (i) { return range[0] + i; } };
+  }
+
+  function listPool(ids) {
+    return { size: ids.length, at: function (i) { return ids[i]; } };
+  }
+
+  function Draw(pool) {
+    this.pool = pool;
+    this.left = pool.size;
+    this.swaps = {};
+  }
+
+  Draw.prototype.next = function () {
+    var j = Math.floor(Math.random() * this.left);
+    this.left--;
+    var pick = j in this.swaps ? this.swaps[j] : j;
+    this.swaps[j] = this.left in this.swaps ? this.swaps[this.left] : this.left;
+    return this.pool.at(pick);
+  };
+
+  function Bank(data) {
+    this.data = data;
+    this.items = data.items;
+    this.pools = {};
+  }
+
+  Bank.prototype.types = function () {
+    return Object.keys(this.data.types);
+  };
+
+  Bank.prototype.tags = function () {
+    return Object.keys(this.data.by_tag);
+  };
+
+  // Ids of one type, optionally limited to an experiment and/or tag. Filtered
+  // pools are built once (one pass over the smaller index) and then reused.
+  Bank.prototype.pool = function (type, exp, tag) {
+    var key = type + '|' + (exp || '') + '|' + (tag || '');
+    if (this.pools[key]) return this.pools[key];
+    var range = this.data.types[type];
+    var pool;
+    if (!range) {
+      pool = listPool([]);
+    } else if (!exp && !tag) {
+      pool = rangePool(range);
+    } else {
+      var lists = [];
+      if (exp) lists.push(this.data.by_exp[String(exp)] || []);
+      if (tag) lists.push(this.data.by_tag[tag] || []);
+      lists.sort(function (a, b) { return a.length - b.length; });
+      var others = lists.slice(1).map(function (ids) {
+        var set = {};
+        ids.forEach(function (id) { set[id] = true; });
+        return set;
+      });
+      pool = listPool(lists[0].filter(function (id) {
+        return id >= range[0] && id < range[1] && others.every(function (set) { return set[id]; });
+      }));
+    }
+    this.pools[key] = pool;
+    return pool;
+  };
+
+  // Up to n distinct items, mixing the requested types evenly (each draw picks
+  // a type that still has items, then an item of it). Options: types (default
+  // all), exp (experiment id), tag. Returns { id, type, item, exp } records,
+  // exp being { id, title, href } for linking back to the page.
+  Bank.prototype.sample = function (n, opts) {
+    opts = opts || {};
+    var self = this;
+    var draws = [];
+    (opts.types || this.types()).forEach(function (type) {
+      var pool = self.pool(type, opts.exp, opts.tag);
+      if (pool.size) draws.push({ type: type, draw: new Draw(pool) });
+    });
+    var out = [];
+    while (out.length < n && draws.length) {
+      var k = Math.floor(Math.random() * draws.length);
+      var d = draws[k];
+      var id = d.draw.next();
+      if (!d.draw.left) draws.splice(k, 1);
+      out.push(this.record(id, d.type));
+    }
+    return out;
+  };
+
+  Bank.prototype.record = function (id, type) {
+    var item = this.items[id];
+    var exp = this.data.exps[String(item.e)] || ['', ''];
+    return { id: id, type: type, item: item, exp: { id: item.e, title: exp[0], href: this.url(exp[1]) } };
+  };
+
+  // Bank paths (hrefs, apparatus covers) are relative to the site root.
+  Bank.prototype.url = function (path) {
+    return new URL('../' + path, BANK_URL).href;
+  };
+
+  window.ChemPractice = {
+    url: BANK_URL,
+    load: function () {
+      if (!loading) {
+        loading = fetch(BANK_URL).then(function (r) {
+          if (!r.ok) throw new Error('practice bank: HTTP ' + r.status);
+          return r.json();
+        }).then(function (data) {
+          return new Bank(data);
+        });
+        loading.catch(function () { loading = null; });
+      }
+      return loading;
+    }
+  };
+})();
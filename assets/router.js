@@ -0,0 +1,120 @@
+(function () {
+  // --- Client-side prev/next navigation (build_site.py --client-nav) ---
+  // Fetches experiments/payload/exp-NN.json and swaps #exp-content plus the few
+  // per-page bits around it, instead of loading the full page. Any failure falls
+  // back to a normal navigation, so the static HTML stays the source of truth.
+  var exp = window.__chemExp;
+  var content = document.getElementById('exp-content');
+  if (!exp || !content || !window.fetch || !window.history || !history.pushState) return;
+
+  var PAGE_RE = /\/(exp-\d+)\.html$/;
+  var loadedScripts = {};
+  var pending = 0;
+
+  document.querySelectorAll('script[src]').forEach(function (s) {
+    loadedScripts[s.src] = Promise.resolve();
+  });
+
+  function payloadUrl(href) {
+    var url = new URL(href, location.href);
+    var m = url.pathname.match(PAGE_RE);
+    if (!m || url.origin !== location.origin) return null;
+    return url.pathname.replace(PAGE_RE, '/payload/$1.json');
+  }
+
+  function loadScript(src) {
+    var abs = new URL(src, location.href).href;
+    if (!loadedScripts[abs]) {
+      loadedScripts[abs] = new Promise(function (resolve, reject) {
+        var s = document.createElement('script');
+        s.src = abs;
+        s.onload = resolve;
+        s.onerror = reject;
+        document.body.appendChild(s);
+      });
+    }
+    return loadedScripts[abs];
+  }
+
+  function setHtml(selector, html) {
+    var el = document.querySelector(selector);
+    if (el) el.innerHTML = html;
+  }
+
+  function syncEqButton(show) {
+    var btn = document.getElementById('eqPractice');
+    if (show && !btn) {
+      var quiz = document.getElementById('quizMode');
+      if (!quiz) return;
+      btn = document.createElement('button');
+      btn.id = 'eqPractice';
+      btn.className = 'pill';
+      btn.type = 'button';
+      btn.textContent = '方程式练习';
+      quiz.parentNode.insertBefore(btn, quiz.nextSibling);
+    } else if (!show && btn) {
+      btn.remove();
+    } else if (btn) {
+      btn.textContent = '方程式练习';
+      btn.classList.remove('active');
+    }
+  }
+
+  function render(data) {
+    document.title = data.doc_title;
+    var meta = document.querySelector('meta[name="description"]');
+    if (meta) meta.setAttribute('content', data.description);
+    document.body.setAttribute('data-exp-id', String(data.id));
+
+    var heading = document.querySelector('h2.section-title');
+    if (heading) heading.textContent = data.title;
+    var crumb = document.querySelector('.breadcrumbs span');
+    if (crumb) crumb.textContent = data.title;
+    setHtml('.exp-cover.large', data.cover_html);
+    setHtml('#expTip', data.tip_html);
+    setHtml('.nav-prev-next', data.prev_next);
+    syncEqButton(data.widgets.indexOf('eq-practice') !== -1);
+
+    content.innerHTML = data.content;
+    return Promise.all(data.scripts.map(loadScript)).then(function () {
+      exp.scan(content);
+      document.dispatchEvent(new CustomEvent('chem:navigate', { detail: { id: data.id } }));
+    });
+  }
+
+  function go(href, push) {
+    var url = payloadUrl(href);
+    if (!url) {
+      location.href = href;
+      return;
+    }
+    var token = ++pending;
+    fetch(url, { credentials: 'same-origin' })
+      .then(function (r) {
+        if (!r.ok) throw new Error('HTTP ' + r.status);
+        return r.json();
+      })
+      .then(function (data) {
+        if (token !== pending) return;
+        if (push) history.pushState({ chemNav: true }, '', href);
+        window.scrollTo(0, 0);
+        return render(data);
+      })
+      .catch(function () {
+        location.href = href;
+      });
+  }
+
+  document.addEventListener('click', function (e) {
+    if (e.defaultPrevented || e.button !== 0 || e.metaKey || e.ctrlKey || e.shiftKey || e.altKey) return;
+    var a = e.target.closest && e.target.closest('.nav-prev-next a[href]');
+    if (!a || !payloadUrl(a.href)) return;
+    e.preventDefault();
+    go(a.href, true);
+  });
+
+  history.replaceState({ chemNav: true }, '', location.href);
+  window.addEventListener('popstate', function (e) {
+    if (e.state && e.state.chemNav) go(location.href, false);
+  });
+})();
@@ -0,0 +1,163 @@
+(function () {
+  // --- Real-user monitoring beacon ---
+  // Collects navigation timing, LCP/CLS/INP-style metrics and widget interaction
+  // counts for this page view, then sends them in batches via sendBeacon to the
+  // endpoint in the script's data-endpoint attribute (see tools/rum_collector.py).
+  // The build only adds this script when given a collector: --rum-endpoint URL.
+  //
+  // Each page view gets an id; every time the page is hidden, the metrics that
+  // changed and the interactions since the last send go out as record seq 0, 1,
+  // ... of that view (the collector keeps each view's latest values). A
+  // soft navigation (router.js, chem:navigate) or a back/forward-cache restore
+  // starts a new view.
+  var script = document.currentScript;
+  var endpoint = script && script.getAttribute('data-endpoint');
+  if (!endpoint || !navigator.sendBeacon || !/^https?:$/.test(location.protocol)) return;
+
+  var QUEUE_KEY = 'chem_rum_queue';
+  var MAX_QUEUE = 20;
+
+  var view, seq, page, hard, metrics, reported, interactions;
+  var clsWindow, clsFirst, clsLast;
+
+  function startView(isHard) {
+    view = Date.now().toString(36) + Math.random().toString(36).slice(2, 8);
+    seq = 0;
+    page = location.pathname;
+    hard = isHard;
+    metrics = {};
+    reported = {};
+    interactions = {};
+    clsWindow = clsFirst = clsLast = 0;
+  }
+
+  startView(true);
+
+  // --- Navigation timing ---
+  function readNavigation() {
+    var nav = performance.getEntriesByType && performance.getEntriesByType('navigation')[0];
+    if (!nav) return;
+    metrics.ttfb = Math.round(nav.responseStart);
+    if (nav.domContentLoadedEventEnd) metrics.dcl = Math.round(nav.domContentLoadedEventEnd);
+    if (nav.loadEventEnd) metrics.load = Math.round(nav.loadEventEnd);
+    if (nav.transferSize) metrics.transfer = nav.transferSize;
+  }
+
+  // --- Paint / layout / interaction observers ---
+  function observe(type, fn, opts) {
+    try {
+      var po = new PerformanceObserver(function (list) { list.getEntries().forEach(fn); });
+      var o = opts || {};
+      o.type = type;
+      o.buffered = true;
+      po.observe(o);
+    } catch (_) {}
+  }
+
+  if ('PerformanceObserver' in window) {
+    observe('paint', function (e) {
+      if (e.name === 'first-contentful-paint') metrics.fcp = Math.round(e.startTime);
+    });
+    observe('largest-contentful-paint', function (e) {
+      metrics.lcp = Math.round(e.startTime);
+    });
+    // CLS: largest session window of layout shifts (gap < 1s, window < 5s).
+    observe('layout-shift', function (e) {
+      if (e.hadRecentInput) return;
+      if (clsWindow && e.startTime - clsLast < 1000 && e.startTime - clsFirst < 5000) {
+        clsWindow += e.value;
+      } else {
+        clsWindow = e.value;
+        clsFirst = e.startTime;
+      }
+      clsLast = e.startTime;
+      metrics.cls = Math.max(metrics.cls || 0, Math.round(clsWindow * 1000) / 1000);
+    });
+    // INP-style: slowest discrete interaction seen on the page.
+    observe('event', function (e) {
+      if (!e.interactionId) return;
+      metrics.inp = Math.max(metrics.inp || 0, Math.round(e.duration));
+    }, { durationThreshold: 40 });
+  }
+
+  // --- Widget interaction counts ---
+  var WIDGETS = [
+    ['.step-order-game', 'step-order'],
+    ['.apparatus-game', 'apparatus'],
+    ['.qa-cards', 'qa'],
+    ['#eqPractice, .chem-eq', 'eq-practice'],
+    ['#quizMode', 'quiz'],
+    ['#markLearned', 'learned'],
+    ['.nav-prev-next a', 'prev-next'],
+    ['.exp-link', 'catalogue'],
+  ];
+
+  document.addEventListener('click', function (e) {
+    if (!e.target.closest) return;
+    for (var i = 0; i < WIDGETS.length; i++) {
+      if (e.target.closest(WIDGETS[i][0])) {
+        interactions[WIDGETS[i][1]] = (interactions[WIDGETS[i][1]] || 0) + 1;
+        return;
+      }
+    }
+  }, true);
+
+  // --- Batching ---
+  // Records that could not be handed to sendBeacon are kept in localStorage and
+  // go out with the next page's batch.
+  function loadQueue() {
+    try {
+      return JSON.parse(localStorage.getItem(QUEUE_KEY) || '[]');
+    } catch (_) {
+      return [];
+    }
+  }
+
+  function saveQueue(queue) {
+    try {
+      if (queue.length) localStorage.setItem(QUEUE_KEY, JSON.stringify(queue.slice(-MAX_QUEUE)));
+      else localStorage.removeItem(QUEUE_KEY);
+    } catch (_) {}
+  }
+
+  // Send what changed in this view since the last send (nothing if nothing did).
+  function flush() {
+    if (hard) readNavigation();  // navigation timing belongs to the loaded document only
+    var changed = {};
+    var any = false;
+    Object.keys(metrics).forEach(function (k) {
+      if (metrics[k] !== reported[k]) {
+        changed[k] = reported[k] = metrics[k];
+        any = true;
+      }
+    });
+    if (!any && !Object.keys(interactions).length && seq > 0) return;
+    var queue = loadQueue();
+    queue.push({
+      page: page,
+      view: view,
+      seq: seq++,
+      ts: Date.now(),
+      metrics: changed,
+      interactions: interactions,
+    });
+    interactions = {};
+    // text/plain keeps the beacon a CORS-safelisted request (no preflight).
+    var body = new Blob([JSON.stringify(queue)], { type: 'text/plain' });
+    saveQueue(navigator.sendBeacon(endpoint, body) ? [] : queue);
+  }
+
+  document.addEventListener('visibilitychange', function () {
+    if (document.visibilityState === 'hidden') flush();
+  });
+  window.addEventListener('pagehide', flush);
+  // Restored from the back/forward cache: this is a new page view.
+  window.addEventListener('pageshow', function (e) {
+    if (e.persisted) startView(false);
+  });
+  // Soft navigation: close out the previous view, then start one for the new page.
+  document.addEventListener('chem:navigate', function () {
+    flush();
+    startView(false);
+  });
+})();
@@ -43,23 +43,49 @@
     }
   }
 
-  function renderProgress() {
-    var learned = getLearned();
-    var cards = document.querySelectorAll('.exp-link[data-exp-id]');
-    var total = cards.length;
-    if (!total) return;
+  // --- Experiment catalogue (paged + windowed) ---
+  // build_site.py inlines the first page of cards and writes every page as
+  // assets/catalogue/page-NNN.json. Pages are fetched when they approach the
+  // viewport and emptied (keeping their height) when they scroll far away, so
+  // the DOM stays bounded however large the catalogue grows.
+  var listEl = document.getElementById('expCardList');
+  var metaEl = document.getElementById('expCatalogueMeta');
+  var meta = null;
+  try {
+    meta = metaEl ? JSON.parse(metaEl.textContent) : null;
+  } catch (_) {}
+  var shardCache = {};
 
-    // Update progress bar.
-    var infoEl = document.getElementById('progressInfo');
-    var fillEl = document.getElementById('progressFill');
-    if (infoEl && fillEl) {
-      var count = learned.length;
-      infoEl.textContent = '已学习 ' + count + ' / ' + total + ' 个实验';
-      fillEl.style.width = Math.round((count / total) * 100) + '%';
+  function escapeHtml(s) {
+    return String(s).replace(/[&<>"']/g, function (c) {
+      return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+    });
+  }
+
+  // Keep in sync with _render_index_card() in tools/build_site.py.
+  function renderCard(card) {
+    return '<a class="exp-link card" href="' + escapeHtml(card.href) + '" data-exp-id="' + card.id + '">' +
+      '<div class="exp-cover"><img src="' + escapeHtml(card.cover) + '" alt="' + escapeHtml(card.title) +
+      ' 实验装置图" loading="lazy"></div>' +
+      '<h3>' + escapeHtml(card.title) + '</h3><p>' + card.tip + '</p></a>';
+  }
+
+  function fetchShard(n) {
+    if (!shardCache[n]) {
+      var name = 'page-' + ('00' + n).slice(-3) + '.json';
+      shardCache[n] = fetch(meta.base + name).then(function (r) {
+        if (!r.ok) throw new Error('HTTP ' + r.status);
+        return r.json();
+      }).then(function (shard) {
+        return shard.cards;
+      });
+      shardCache[n].catch(function () { delete shardCache[n]; });
     }
+    return shardCache[n];
+  }
 
-    // Add badges to learned cards.
-    cards.forEach(function (card) {
+  function applyBadges(root, learned) {
+    root.querySelectorAll('.exp-link[data-exp-id]').forEach(function (card) {
       var id = card.getAttribute('data-exp-id');
       var existing = card.querySelector('.learned-badge');
       if (learned.indexOf(id) !== -1) {
@@ -75,23 +101,185 @@
     });
   }
 
+  function renderProgress() {
+    if (!listEl) return;
+    var learned = getLearned();
+    var total = meta ? meta.total : listEl.querySelectorAll('.exp-link[data-exp-id]').length;
+    if (!total) return;
+
+    // Update progress bar.
+    var infoEl = document.getElementById('progressInfo');
+    var fillEl = document.getElementById('progressFill');
+    if (infoEl && fillEl) {
+      var count = learned.length;
+      infoEl.textContent = '已学习 ' + count + ' / ' + total + ' 个实验';
+      fillEl.style.width = Math.min(100, Math.round((count / total) * 100)) + '%';
+    }
+
+    // Badges only for cards currently in the DOM; paged-in cards get theirs on render.
+    applyBadges(listEl, learned);
+  }
+
+  function fillPage(pageEl, cards) {
+    pageEl.innerHTML = cards.map(renderCard).join('');
+    pageEl.style.height = '';
+    pageEl.setAttribute('data-loaded', '1');
+    applyBadges(pageEl, getLearned());
+  }
+
+  function setupPaging() {
+    if (!meta || !listEl || !('IntersectionObserver' in window)) return;
+    var pageCount = Math.ceil(meta.total / meta.page_size);
+    var first = listEl.querySelector('.exp-page[data-page="0"]');
+    if (!first || pageCount < 2) return;
+    first.setAttribute('data-loaded', '1');
+    var fullHeight = first.offsetHeight;
+
+    var pages = [first];
+    for (var n = 1; n < pageCount; n++) {
+      var el = document.createElement('div');
+      el.className = 'exp-page grid';
+      el.setAttribute('data-page', String(n));
+      var size = Math.min(meta.page_size, meta.total - n * meta.page_size);
+      el.style.height = Math.round(fullHeight * size / meta.page_size) + 'px';
+      pages[n - 1].parentNode.insertBefore(el, pages[n - 1].nextSibling);
+      pages.push(el);
+    }
+
+    var io = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        var el = entry.target;
+        var loaded = el.getAttribute('data-loaded');
+        if (entry.isIntersecting && !loaded) {
+          var n = Number(el.getAttribute('data-page'));
+          el.setAttribute('data-loaded', 'pending');
+          fetchShard(n).then(function (cards) {
+            fillPage(el, cards);
+          }, function () {
+            el.removeAttribute('data-loaded');
+          });
+        } else if (!entry.isIntersecting && loaded === '1') {
+          // Far off-screen: drop the cards but keep the space they took.
+          el.style.height = el.offsetHeight + 'px';
+          el.innerHTML = '';
+          el.removeAttribute('data-loaded');
+        }
+      });
+    }, { rootMargin: '1200px 0px' });
+    pages.forEach(function (el) { io.observe(el); });
+  }
+
+  setupPaging();
+
   // --- Index experiment list search ---
+  // Matches against the compact search index (meta.search: [title, keywords,
+  // href] per card, in catalogue order, fetched on first search) and renders
+  // at most MAX_RESULTS hits into a separate results grid, fetching only the
+  // shards those hits are in.
+  var MAX_RESULTS = 48;
   var searchEl = document.getElementById('expIndexSearch');
   var noResultsEl = document.getElementById('noResults');
-  if (searchEl) {
+  var searchIndex = null;
+
+  function loadSearchIndex() {
+    if (!searchIndex) {
+      if (!meta || !meta.search) {
+        searchIndex = Promise.resolve(null);
+      } else {
+        searchIndex = fetch(meta.base + meta.search).then(function (r) {
+          if (!r.ok) throw new Error('HTTP ' + r.status);
+          return r.json();
+        }).then(function (index) {
+          return index.items.map(function (row) {
+            return { title: row[0], href: row[2], text: (row[0] + ' ' + row[1]).toLowerCase() };
+          });
+        }, function () {
+          searchIndex = null;
+          return null;
+        });
+      }
+    }
+    return searchIndex;
+  }
+
+  // Full cards for catalogue positions; a hit whose shard fails renders as a plain link.
+  function hitCards(positions, rows) {
+    var shards = [];
+    positions.forEach(function (pos) {
+      var n = Math.floor(pos / meta.page_size);
+      if (shards.indexOf(n) === -1) shards.push(n);
+    });
+    return Promise.all(shards.map(function (n) {
+      return fetchShard(n).then(null, function () { return null; });
+    })).then(function (lists) {
+      return positions.map(function (pos) {
+        var cards = lists[shards.indexOf(Math.floor(pos / meta.page_size))];
+        return (cards && cards[pos % meta.page_size]) ||
+          { href: rows[pos].href, title: rows[pos].title, plain: true };
+      });
+    });
+  }
+
+  function renderHit(card) {
+    if (!card.plain) return renderCard(card);
+    return '<a class="exp-link card" href="' + escapeHtml(card.href) + '"><h3>' + escapeHtml(card.title) + '</h3></a>';
+  }
+
+  if (searchEl && listEl) {
     var debounceTimer;
-    var apply = function () {
-      var q = (searchEl.value || '').trim().toLowerCase();
+    var resultsEl = document.createElement('div');
+    resultsEl.className = 'exp-page grid';
+    resultsEl.style.display = 'none';
+    listEl.insertBefore(resultsEl, noResultsEl || null);
+
+    var showPaged = function (show) {
+      listEl.querySelectorAll('.exp-page[data-page]').forEach(function (el) {
+        el.style.display = show ? '' : 'none';
+      });
+      resultsEl.style.display = show ? 'none' : '';
+    };
+
+    // Fallback when shards are unavailable (e.g. opened from file://): filter the inline cards.
+    var filterInline = function (q) {
       var visible = 0;
-      document.querySelectorAll('.exp-link').forEach(function (card) {
-        var txt = (card.textContent || '').toLowerCase();
-        var show = !q || txt.indexOf(q) !== -1;
+      listEl.querySelectorAll('.exp-page[data-page] .exp-link').forEach(function (card) {
+        var show = (card.textContent || '').toLowerCase().indexOf(q) !== -1;
         card.style.display = show ? '' : 'none';
         if (show) visible++;
       });
-      if (noResultsEl) {
-        noResultsEl.style.display = visible === 0 && q ? 'block' : 'none';
+      return visible;
+    };
+
+    var apply = function () {
+      var q = (searchEl.value || '').trim().toLowerCase();
+      if (!q) {
+        listEl.querySelectorAll('.exp-link').forEach(function (card) { card.style.display = ''; });
+        showPaged(true);
+        if (noResultsEl) noResultsEl.style.display = 'none';
+        return;
       }
+      var current = function () { return (searchEl.value || '').trim().toLowerCase() === q; };
+      var showNoResults = function (visible) {
+        if (noResultsEl) noResultsEl.style.display = visible === 0 ? 'block' : 'none';
+      };
+      loadSearchIndex().then(function (rows) {
+        if (!current()) return;
+        if (!rows) {
+          showNoResults(filterInline(q));
+          return;
+        }
+        var hits = [];
+        for (var i = 0; i < rows.length && hits.length < MAX_RESULTS; i++) {
+          if (rows[i].text.indexOf(q) !== -1) hits.push(i);
+        }
+        hitCards(hits, rows).then(function (cards) {
+          if (!current()) return;
+          resultsEl.innerHTML = cards.map(renderHit).join('');
+          applyBadges(resultsEl, getLearned());
+          showPaged(false);
+          showNoResults(hits.length);
+        });
+      });
     };
     searchEl.addEventListener('input', function () {
       clearTimeout(debounceTimer);
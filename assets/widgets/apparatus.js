@@ -0,0 +1,50 @@
+(function () {
+  // --- Apparatus labeling game ---
+  var exp = window.__chemExp;
+  if (!exp) return;
+
+  function markers(game) {
+    return game.closest('.exp-block').querySelectorAll('.apparatus-marker');
+  }
+
+  exp.on('enter', '.apparatus-input', function (inp, e) {
+    var game = inp.closest('.apparatus-game');
+    if (!game) return;
+    e.preventDefault();
+    var inputs = Array.from(game.querySelectorAll('.apparatus-input'));
+    var marker = markers(game)[inputs.indexOf(inp)];
+    var answer = inp.getAttribute('data-answer') || '';
+    var val = inp.value.trim();
+    var item = inp.closest('.apparatus-input-item');
+    if (val === answer) {
+      inp.disabled = true;
+      item.classList.add('correct');
+      item.classList.remove('wrong');
+      if (marker) marker.classList.add('correct');
+      var next = game.querySelector('.apparatus-input:not(:disabled)');
+      if (next) next.focus();
+      var successEl = game.querySelector('.apparatus-success');
+      if (!next && successEl) successEl.style.display = 'block';
+    } else {
+      item.classList.add('wrong');
+      inp.select();
+      setTimeout(function () { item.classList.remove('wrong'); }, 600);
+    }
+  });
+
+  exp.on('click', '.apparatus-reset-btn', function (btn) {
+    var game = btn.closest('.apparatus-game');
+    if (!game) return;
+    var inputs = Array.from(game.querySelectorAll('.apparatus-input'));
+    var ms = markers(game);
+    inputs.forEach(function (inp, idx) {
+      inp.disabled = false;
+      inp.value = '';
+      inp.closest('.apparatus-input-item').classList.remove('correct', 'wrong');
+      if (ms[idx]) ms[idx].classList.remove('correct');
+    });
+    var successEl = game.querySelector('.apparatus-success');
+    if (successEl) successEl.style.display = 'none';
+    if (inputs[0]) inputs[0].focus();
+  });
+})();
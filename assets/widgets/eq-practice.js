@@ -0,0 +1,147 @@
+(function () {
+  // --- Equation practice mode ---
+  var exp = window.__chemExp;
+  if (!exp) return;
+
+  var isEqMode = false;
+  var saved = []; // [element, original innerHTML] for equations turned into blanks
+
+  // A page swapped in by router.js starts outside practice mode.
+  document.addEventListener('chem:navigate', function () {
+    isEqMode = false;
+    saved = [];
+  });
+
+  // Normalize answer text for comparison
+  var SYMBOL_ALIASES = {
+    '上': '↑', 'up': '↑', '升': '↑', '气': '↑',
+    '下': '↓', 'down': '↓', '沉': '↓', '沉淀': '↓'
+  };
+
+  function checkBlankAnswer(blank, input) {
+    var answer = blank.getAttribute('data-answer') || '';
+    var val = input.value.trim();
+    var normalized = SYMBOL_ALIASES[val] || val;
+    if (normalized === answer) {
+      blank.classList.add('cond-correct');
+      blank.classList.remove('cond-wrong');
+      input.disabled = true;
+      input.value = answer;
+      return true;
+    } else {
+      blank.classList.add('cond-wrong');
+      blank.classList.remove('cond-correct');
+      input.select();
+      setTimeout(function () { blank.classList.remove('cond-wrong'); }, 800);
+      return false;
+    }
+  }
+
+  function createInputForBlank(blank) {
+    var isSymbol = blank.classList.contains('symbol-blank');
+    var inp = document.createElement('input');
+    inp.type = 'text';
+    inp.className = 'eq-input';
+    inp.setAttribute('autocomplete', 'off');
+    inp.setAttribute('spellcheck', 'false');
+    if (isSymbol) {
+      inp.placeholder = '↑↓';
+      inp.style.width = '2.5em';
+    } else {
+      inp.placeholder = '条件';
+      inp.style.width = '4em';
+    }
+    blank.textContent = '';
+    blank.appendChild(inp);
+  }
+
+  exp.on('enter', '.eq-input', function (inp, e) {
+    e.preventDefault();
+    if (checkBlankAnswer(inp.parentNode, inp)) {
+      // Move focus to next unanswered input
+      var next = document.querySelector('.eq-input:not(:disabled)');
+      if (next) next.focus();
+    }
+  });
+
+  // --- Blanks derived from the rendered equation ---
+  // build_site.py renders each equation once; equations with a condition carry
+  // data-cset (index into the page's .eq-choice-sets table) and data-sym (the
+  // ↑/↓ marks on the right-hand side).
+  function choiceSets() {
+    var el = document.querySelector('.eq-choice-sets');
+    if (!el) return null;
+    try {
+      return JSON.parse(el.textContent);
+    } catch (err) {
+      return null;
+    }
+  }
+
+  function makeBlank(cls, answer, choices) {
+    var blank = document.createElement('span');
+    blank.className = cls;
+    blank.setAttribute('data-answer', answer);
+    blank.setAttribute('data-choices', choices.join(','));
+    blank.textContent = '?';
+    return blank;
+  }
+
+  // Replace the first occurrence of sym in the text after the condition arrow.
+  function blankSymbol(cond, sym, choices) {
+    var node = cond;
+    while ((node = nextTextNode(node, cond.parentNode))) {
+      var i = node.nodeValue.indexOf(sym);
+      if (i === -1) continue;
+      var rest = node.splitText(i);
+      rest.nodeValue = rest.nodeValue.slice(sym.length);
+      rest.parentNode.insertBefore(makeBlank('symbol-blank', sym, choices), rest);
+      return;
+    }
+  }
+
+  function nextTextNode(node, root) {
+    var walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, null, false);
+    walker.currentNode = node;
+    var next = walker.nextNode();
+    while (next && node.contains(next)) next = walker.nextNode();
+    return next;
+  }
+
+  function addBlanks(eq, table) {
+    var cond = eq.querySelector('.chem-condition');
+    var text = cond && cond.querySelector('.cond-text');
+    var set = table.cond[+eq.getAttribute('data-cset')];
+    if (!text || !set) return;
+    saved.push([eq, eq.innerHTML]);
+    cond.replaceChild(makeBlank('cond-blank', text.textContent, set), text);
+    (eq.getAttribute('data-sym') || '').split('').forEach(function (sym) {
+      blankSymbol(cond, sym, table.sym);
+    });
+  }
+
+  exp.on('click', '#eqPractice', function (eqBtn) {
+    isEqMode = !isEqMode;
+    eqBtn.textContent = isEqMode ? '退出练习' : '方程式练习';
+    eqBtn.classList.toggle('active', isEqMode);
+    if (isEqMode) {
+      var table = choiceSets();
+      if (table) {
+        document.querySelectorAll('.chem-eq[data-cset]').forEach(function (eq) {
+          addBlanks(eq, table);
+        });
+      }
+      // Create input fields inside blanks
+      document.querySelectorAll('.cond-blank, .symbol-blank').forEach(createInputForBlank);
+      // Auto-focus first input
+      var first = document.querySelector('.eq-input');
+      if (first) first.focus();
+    } else {
+      // Restore the rendered equations
+      saved.forEach(function (entry) {
+        entry[0].innerHTML = entry[1];
+      });
+      saved = [];
+    }
+  });
+})();
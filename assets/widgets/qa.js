@@ -0,0 +1,9 @@
+(function () {
+  // --- Q&A card reveal ---
+  var exp = window.__chemExp;
+  if (!exp) return;
+
+  exp.on('click', '.qa-answer', function (ans) {
+    ans.classList.toggle('qa-hidden');
+  });
+})();
@@ -0,0 +1,74 @@
+(function () {
+  // --- Step ordering game ---
+  var exp = window.__chemExp;
+  if (!exp) return;
+
+  function shuffle(container) {
+    var items = Array.from(container.children);
+    for (var i = items.length - 1; i > 0; i--) {
+      var j = Math.floor(Math.random() * (i + 1));
+      container.appendChild(items[j]);
+      var tmp = items[i]; items[i] = items[j]; items[j] = tmp;
+    }
+  }
+
+  function whyEl(game) {
+    return game.parentElement.querySelector('.step-why-questions');
+  }
+
+  exp.register('.step-order-game', function (game) {
+    shuffle(game.querySelector('.step-order-choices'));
+  });
+
+  exp.on('click', '.step-chip', function (chip) {
+    var game = chip.closest('.step-order-game');
+    if (!game || chip.classList.contains('used')) return;
+    exp.hydrate(game);
+    var correct = JSON.parse(game.getAttribute('data-correct'));
+    var answerEl = game.querySelector('.step-order-answer');
+    var successEl = game.querySelector('.step-order-success');
+    var why = whyEl(game);
+    // The placed chips are the game state: no per-game closure needed.
+    var placedCount = answerEl.children.length;
+    var label = chip.getAttribute('data-label');
+    if (label === correct[placedCount]) {
+      chip.classList.add('used', 'step-correct');
+      var placed = document.createElement('span');
+      placed.className = 'step-placed';
+      placed.textContent = label;
+      answerEl.appendChild(placed);
+      if (placedCount + 1 === correct.length) {
+        if (successEl) successEl.style.display = 'block';
+        if (why) why.style.display = '';
+      }
+    } else {
+      chip.classList.add('step-wrong');
+      setTimeout(function () { chip.classList.remove('step-wrong'); }, 500);
+    }
+  });
+
+  exp.on('click', '.step-reset-btn', function (btn) {
+    var game = btn.closest('.step-order-game');
+    if (!game) return;
+    var choicesEl = game.querySelector('.step-order-choices');
+    var successEl = game.querySelector('.step-order-success');
+    var why = whyEl(game);
+    game.querySelector('.step-order-answer').innerHTML = '';
+    choicesEl.querySelectorAll('.step-chip').forEach(function (c) {
+      c.classList.remove('used', 'step-correct', 'step-wrong');
+    });
+    shuffle(choicesEl);
+    if (successEl) successEl.style.display = 'none';
+    if (why) {
+      why.style.display = 'none';
+      why.querySelectorAll('.why-a').forEach(function (a) {
+        a.classList.remove('revealed');
+      });
+    }
+  });
+
+  // --- Why question reveal ---
+  exp.on('click', '.why-a', function (ans) {
+    ans.classList.toggle('revealed');
+  });
+})();
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Performance-budget analysis of the generated pages.
+
+For index.html and every experiments/exp-NN.html:
+- HTML bytes, DOM element count, number of <details> blocks
+- Bytes of inline widget markup (games, Q&A cards, equation choice tables)
+- Bytes of the CSS / JS / images the page references
+- Estimated transfer size after compression (gzip; brotli when installed)
+
+Metrics are checked against tools/page_budgets.json ("default" budgets plus
+per-page overrides). Run standalone or from build_site.py; exits non-zero when
+a budget is exceeded and "on_exceed" is "fail".
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+import json
+import zlib
+from pathlib import Path
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional: gzip estimates are used without it
+    brotli = None
+
+
+BUDGETS_NAME = "page_budgets.json"
+
+# Class names whose element subtree counts as inline widget markup.
+WIDGET_CLASSES = {
+    "step-order-game",
+    "step-why-questions",
+    "apparatus-game",
+    "qa-cards",
+    "eq-choice-sets",
+}
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr",
+}
+
+
+def _compressed_size(data: bytes) -> int:
+    if brotli is not None:
+        return len(brotli.compress(data, quality=11))
+    # raw deflate at level 9 + gzip header/trailer (18 bytes)
+    c = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return len(c.compress(data) + c.flush()) + 18
+
+
+class _PageParser(HTMLParser):
+    def __init__(self, text: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self._line_offsets = [0]
+        for line in text.splitlines(keepends=True):
+            self._line_offsets.append(self._line_offsets[-1] + len(line.encode("utf-8")))
+        self._lines = text.splitlines(keepends=True)
+        self.nodes = 0
+        self.details = 0
+        self.widget_bytes = 0
+        self.assets: list[tuple[str, str]] = []  # (kind, url)
+        self._stack: list[tuple[str, int | None]] = []  # (tag, widget start offset)
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        prefix = self._lines[line - 1][:col] if line - 1 < len(self._lines) else ""
+        return self._line_offsets[line - 1] + len(prefix.encode("utf-8"))
+
+    def _in_widget(self) -> bool:
+        return any(start is not None for _, start in self._stack)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.nodes += 1
+        a = {k: v or "" for k, v in attrs}
+        if tag == "details":
+            self.details += 1
+        if tag == "link" and "stylesheet" in a.get("rel", "").split() and a.get("href"):
+            self.assets.append(("css", a["href"]))
+        elif tag == "script" and a.get("src"):
+            self.assets.append(("js", a["src"]))
+        elif tag == "img" and a.get("src"):
+            self.assets.append(("img", a["src"]))
+        if tag in VOID_TAGS:
+            return
+        start = None
+        if not self._in_widget() and WIDGET_CLASSES & set(a.get("class", "").split()):
+            start = self._offset()
+        self._stack.append((tag, start))
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.nodes += 1
+        a = dict(attrs)
+        if tag == "img" and a.get("src"):
+            self.assets.append(("img", a["src"] or ""))
+
+    def handle_endtag(self, tag: str) -> None:
+        if not any(t == tag for t, _ in self._stack):
+            return
+        end = self._offset() + len(f"</{tag}>")
+        while self._stack:
+            t, start = self._stack.pop()
+            if start is not None:
+                self.widget_bytes += end - start
+            if t == tag:
+                break
+
+
+@dataclass
+class PageMetrics:
+    page: str
+    html_bytes: int = 0
+    html_transfer_bytes: int = 0
+    dom_nodes: int = 0
+    details: int = 0
+    widget_bytes: int = 0
+    css_bytes: int = 0
+    js_bytes: int = 0
+    image_bytes: int = 0
+    total_transfer_bytes: int = 0
+    missing_assets: list[str] = field(default_factory=list)
+
+
+def analyze_page(repo_dir: Path, page_path: Path, _cache: dict[Path, tuple[int, int]] | None = None) -> PageMetrics:
+    """Compute metrics for one page; asset sizes are memoised in _cache."""
+    cache = {} if _cache is None else _cache
+    data = page_path.read_bytes()
+    text = data.decode("utf-8")
+    parser = _PageParser(text)
+    parser.feed(text)
+    parser.close()
+
+    m = PageMetrics(page=page_path.relative_to(repo_dir).as_posix())
+    m.html_bytes = len(data)
+    m.html_transfer_bytes = _compressed_size(data)
+    m.dom_nodes = parser.nodes
+    m.details = parser.details
+    m.widget_bytes = parser.widget_bytes
+    m.total_transfer_bytes = m.html_transfer_bytes
+
+    seen: set[Path] = set()
+    for kind, url in parser.assets:
+        if "://" in url or url.startswith(("data:", "//")):
+            continue
+        asset = (page_path.parent / url.split("?", 1)[0].split("#", 1)[0]).resolve()
+        if asset in seen:
+            continue
+        seen.add(asset)
+        if asset not in cache:
+            if not asset.is_file():
+                m.missing_assets.append(url)
+                continue
+            raw = asset.read_bytes()
+            cache[asset] = (len(raw), _compressed_size(raw))
+        size, transfer = cache[asset]
+        if kind == "css":
+            m.css_bytes += size
+        elif kind == "js":
+            m.js_bytes += size
+        else:
+            m.image_bytes += size
+        m.total_transfer_bytes += transfer
+    return m
+
+
+def load_budgets(repo_dir: Path) -> dict[str, object]:
+    path = repo_dir / "tools" / BUDGETS_NAME
+    if not path.exists():
+        return {"default": {}, "pages": {}, "on_exceed": "warn"}
+    return json.loads(path.read_text("utf-8"))
+
+
+def check_budgets(metrics: list[PageMetrics], budgets: dict[str, object]) -> list[str]:
+    """Return one message per metric that exceeds its page's budget."""
+    default = budgets.get("default") or {}
+    overrides = budgets.get("pages") or {}
+    problems: list[str] = []
+    for m in metrics:
+        page_budget = {**default, **(overrides.get(m.page) or {})}  # type: ignore[union-attr]
+        for key, limit in page_budget.items():
+            value = getattr(m, key, None)
+            if isinstance(value, int) and value > limit:
+                problems.append(f"{m.page}: {key} {value} > budget {limit}")
+        for url in m.missing_assets:
+            problems.append(f"{m.page}: missing asset {url}")
+    return problems
+
+
+def analyze_site(repo_dir: Path) -> list[PageMetrics]:
+    cache: dict[Path, tuple[int, int]] = {}
+    pages = [repo_dir / "index.html"] + sorted((repo_dir / "experiments").glob("exp-*.html"))
+    return [analyze_page(repo_dir, p, cache) for p in pages if p.exists()]
+
+
+def format_report(metrics: list[PageMetrics]) -> str:
+    cols = ["html_bytes", "html_transfer_bytes", "dom_nodes", "details", "widget_bytes", "js_bytes", "total_transfer_bytes"]
+    heads = ["html", "html~z", "nodes", "details", "widgets", "js", "total~z"]
+    width = max(len(m.page) for m in metrics) if metrics else 4
+    lines = ["page".ljust(width) + "".join(h.rjust(9) for h in heads)]
+    for m in metrics:
+        lines.append(m.page.ljust(width) + "".join(str(getattr(m, c)).rjust(9) for c in cols))
+    return "\n".join(lines)
+
+
+def check_site(repo_dir: Path, fail: bool = False, json_path: Path | None = None) -> bool:
+    """Analyze the site and apply budgets. Returns False if the build should fail."""
+    metrics = analyze_site(repo_dir)
+    budgets = load_budgets(repo_dir)
+    if fail:
+        budgets["on_exceed"] = "fail"
+    print(format_report(metrics))
+    problems = check_budgets(metrics, budgets)
+    for p in problems:
+        print(f"BUDGET: {p}")
+    if json_path:
+        json_path.write_text(json.dumps([asdict(m) for m in metrics], ensure_ascii=False, indent=2) + "\n", "utf-8")
+    return not (problems and budgets.get("on_exceed") == "fail")
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Report page weights and check them against budgets.")
+    ap.add_argument("--json", type=Path, help="also write the metrics to this JSON file")
+    ap.add_argument("--fail", action="store_true", help="fail on any exceeded budget")
+    args = ap.parse_args()
+    if not check_site(repo_dir, fail=args.fail, json_path=args.json):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
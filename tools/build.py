@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+One-command site build, run as a dependency graph of stages.
+
+Stages (inputs/outputs are repo-relative globs):
+- extract    PDF -> .build/pdf.txt (pdftotext subprocess)
+- parse      .build/pdf.txt -> .build/sections.json
+- covers     generate_covers.py -> assets/covers/*.svg
+- equations  notes shards -> balance check (no outputs)
+- pages      experiments -> experiments/*.html, extracts, manifest
+- index      experiments -> index.html list, assets/catalogue/*.json (shards,
+             search index)
+- practice   experiments -> assets/practice-bank.json (all practice items)
+- fonts      generated text -> assets/fonts/*.woff2 subsets, @font-face rules
+- analyze    generated pages + assets -> page-weight budgets
+- compress   served files -> .gz/.br siblings, assets/serve-manifest.json
+             (ETags for tools/serve.py; git-ignored deployment artifacts)
+- publish    served files -> new generation under .build/site, switched in
+             atomically (tools/publish.py; unchanged files are hardlinked)
+- bundle     published generation -> .build/bundles/ offline zip plus a delta
+             patch from the previous bundle (tools/bundle.py)
+
+Independent stages run concurrently (pdftotext alongside cover generation,
+pages alongside the index). The experiments themselves (sections + notes,
+build_site.build_experiments) are built once per run, by whichever of pages,
+index or practice needs them first, and shared by the others. A stage is skipped when the hash of its inputs and
+parameters matches the last successful run and its outputs are unchanged;
+state is kept in .build/state.json. Stages that are not up to date first try
+the content-addressed cache (tools/build_cache.py; $CHEM_BUILD_CACHE or
+--cache-dir, shareable between machines) before running. A timing table with
+the critical path is printed at the end.
+
+  python tools/build.py [--client-nav] [--force] [--jobs N] [--cache-dir DIR] [--no-cache]
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from analyze_pages import check_site
+from build_cache import DEFAULT_MAX_BYTES, MB, BuildCache, default_cache_dir
+from bundle import build_bundle, bundle_dir
+from build_site import (
+    PRACTICE_BANK_PATH,
+    Experiment,
+    build_experiments,
+    build_pages,
+    check_notes_equations,
+    write_experiment_pages,
+    write_index,
+    write_practice_bank,
+)
+from generate_covers import write_covers
+from generate_experiment_data import PDF_NAME, extract_text, format_corrections, load_corrections, sections_from_lines
+from notes_store import NotesStore
+from precompress import MANIFEST_PATH, precompress
+from publish import publish, site_dir
+from subset_font import TEXT_GLOBS, build_fonts, resolve_source
+
+
+BUILD_DIR = ".build"
+STATE_NAME = "state.json"
+PDF_TEXT = f"{BUILD_DIR}/pdf.txt"
+SECTIONS = f"{BUILD_DIR}/sections.json"
+
+NOTES = "content/notes/*.json"
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    run: Callable[["BuildContext"], None]
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...] = ()
+    deps: tuple[str, ...] = ()
+    params: tuple[str, ...] = ()  # BuildContext attributes that affect the outputs
+    cacheable: bool = True  # only tasks with outputs are ever cached
+
+
+EXPERIMENT_INPUTS = (SECTIONS, NOTES)
+
+
+@dataclass
+class BuildContext:
+    repo_dir: Path
+    client_nav: bool = False
+    rum_endpoint: str | None = None
+    _experiments: tuple[str, list[Experiment]] | None = field(default=None, repr=False)
+    _experiments_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def experiments(self) -> list[Experiment]:
+        """The experiment IR, built on first use and reused while sections and notes are unchanged."""
+        key = _digest(self.repo_dir, EXPERIMENT_INPUTS)
+        with self._experiments_lock:
+            if self._experiments is None or self._experiments[0] != key:
+                sections = json.loads((self.repo_dir / SECTIONS).read_text("utf-8"))
+                self._experiments = (key, build_experiments(build_pages(sections, NotesStore(self.repo_dir))))
+            return self._experiments[1]
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str  # "ran", "cached" or "skipped"
+    seconds: float
+    start: float = 0.0
+    end: float = 0.0
+
+
+@dataclass
+class BuildReport:
+    results: dict[str, TaskResult] = field(default_factory=dict)
+    wall: float = 0.0
+
+
+def _run_extract(ctx: BuildContext) -> None:
+    pdf_path = ctx.repo_dir / PDF_NAME
+    if not pdf_path.exists():
+        raise SystemExit(f"PDF not found: {pdf_path}")
+    extract_text(pdf_path, ctx.repo_dir / PDF_TEXT)
+
+
+def _run_parse(ctx: BuildContext) -> None:
+    lines = (ctx.repo_dir / PDF_TEXT).read_text("utf-8", errors="ignore").splitlines()
+    corrections = load_corrections()
+    sections = sections_from_lines(lines, corrections=corrections)
+    print(f"  {format_corrections(corrections)}")
+    (ctx.repo_dir / SECTIONS).write_text(json.dumps(sections, ensure_ascii=False, indent=1) + "\n", "utf-8")
+
+
+def _run_covers(ctx: BuildContext) -> None:
+    write_covers(ctx.repo_dir / "assets" / "covers")
+
+
+def _run_equations(ctx: BuildContext) -> None:
+    check_notes_equations(ctx.repo_dir, NotesStore(ctx.repo_dir))
+
+
+def _run_pages(ctx: BuildContext) -> None:
+    write_experiment_pages(ctx.repo_dir, ctx.experiments(), client_nav=ctx.client_nav, rum_endpoint=ctx.rum_endpoint)
+
+
+def _run_index(ctx: BuildContext) -> None:
+    write_index(ctx.repo_dir, ctx.experiments(), rum_endpoint=ctx.rum_endpoint)
+
+
+def _run_practice(ctx: BuildContext) -> None:
+    write_practice_bank(ctx.repo_dir, ctx.experiments())
+
+
+def _run_fonts(ctx: BuildContext) -> None:
+    build_fonts(ctx.repo_dir, resolve_source(ctx.repo_dir))
+
+
+def _run_analyze(ctx: BuildContext) -> None:
+    if not check_site(ctx.repo_dir):
+        raise SystemExit("Page budgets exceeded")
+
+
+def _run_compress(ctx: BuildContext) -> None:
+    precompress(ctx.repo_dir)
+
+
+def _run_publish(ctx: BuildContext) -> None:
+    publish(ctx.repo_dir, site_dir(ctx.repo_dir))
+
+
+def _run_bundle(ctx: BuildContext) -> None:
+    build_bundle(site_dir(ctx.repo_dir), bundle_dir(ctx.repo_dir))
+
+
+PAGE_OUTPUTS = (
+    "experiments/exp-*.html",
+    "experiments/extracts/exp-*.html",
+    "experiments/payload/exp-*.json",
+    "assets/build-manifest.json",
+)
+INDEX_OUTPUTS = ("index.html", "assets/catalogue/page-*.json", "assets/catalogue/search.json")
+PRACTICE_OUTPUTS = (PRACTICE_BANK_PATH.as_posix(),)
+RENDER_SOURCES = ("tools/build_site.py", "tools/notes_store.py", "tools/generate_covers.py", "tools/minify_html.py")
+STATIC_ASSETS = (
+    "assets/covers/exp-*.svg",
+    "assets/*.css",
+    "assets/*.js",
+    "assets/widgets/*.js",
+)
+
+TASKS: tuple[Task, ...] = (
+    Task("extract", _run_extract, inputs=(PDF_NAME,), outputs=(PDF_TEXT,)),
+    Task(
+        "parse",
+        _run_parse,
+        inputs=(
+            PDF_TEXT,
+            "tools/generate_experiment_data.py",
+            "tools/parse_rules.json",
+            "tools/corrections.json",
+            "tools/text_automaton.py",
+        ),
+        outputs=(SECTIONS,),
+        deps=("extract",),
+    ),
+    Task("covers", _run_covers, inputs=("tools/generate_covers.py",), outputs=("assets/covers/exp-*.svg",)),
+    Task("equations", _run_equations, inputs=(NOTES, "tools/check_equations.py", "tools/notes_store.py")),
+    Task(
+        "pages",
+        _run_pages,
+        inputs=EXPERIMENT_INPUTS + RENDER_SOURCES,
+        outputs=PAGE_OUTPUTS,
+        deps=("parse", "equations"),
+        params=("client_nav", "rum_endpoint"),
+    ),
+    Task(
+        "index",
+        _run_index,
+        inputs=EXPERIMENT_INPUTS + RENDER_SOURCES,
+        outputs=INDEX_OUTPUTS,
+        deps=("parse", "equations"),
+        params=("rum_endpoint",),
+        cacheable=False,  # rewrites hand-edited index.html in place
+    ),
+    Task(
+        "practice",
+        _run_practice,
+        inputs=EXPERIMENT_INPUTS + RENDER_SOURCES,
+        outputs=PRACTICE_OUTPUTS,
+        deps=("parse", "equations"),
+    ),
+    Task(
+        "fonts",
+        _run_fonts,
+        inputs=TEXT_GLOBS + ("tools/subset_font.py",),
+        outputs=("assets/fonts/*.woff2", "assets/fonts/glyphs.json"),
+        deps=("pages", "index"),
+        cacheable=False,  # rewrites the @font-face block in site.css in place
+    ),
+    Task(
+        "analyze",
+        _run_analyze,
+        inputs=PAGE_OUTPUTS + INDEX_OUTPUTS + STATIC_ASSETS + ("tools/page_budgets.json", "tools/analyze_pages.py"),
+        deps=("pages", "index", "covers", "fonts"),
+    ),
+    Task(
+        "compress",
+        _run_compress,
+        inputs=PAGE_OUTPUTS + INDEX_OUTPUTS + PRACTICE_OUTPUTS + STATIC_ASSETS
+        + (PDF_NAME, "assets/fonts/*.woff2", "tools/precompress.py"),
+        outputs=(MANIFEST_PATH.as_posix(), "assets/**/*.gz", "assets/**/*.br", "experiments/**/*.gz", "experiments/**/*.br"),
+        deps=("pages", "index", "practice", "covers", "fonts"),
+        cacheable=False,  # the manifest records when it was written; rebuilding is cheap
+    ),
+    Task(
+        "publish",
+        _run_publish,
+        inputs=PAGE_OUTPUTS + INDEX_OUTPUTS + PRACTICE_OUTPUTS + STATIC_ASSETS
+        + (PDF_NAME, "assets/fonts/*.woff2", "tools/publish.py", "tools/precompress.py", "tools/minify_html.py"),
+        deps=("analyze", "practice"),  # only pages within budget go live
+        cacheable=False,  # writes outside the repo
+    ),
+    Task(
+        "bundle",
+        _run_bundle,
+        inputs=PAGE_OUTPUTS + INDEX_OUTPUTS + PRACTICE_OUTPUTS + STATIC_ASSETS
+        + (PDF_NAME, "assets/fonts/*.woff2", "tools/bundle.py", "tools/bundle_launcher.py"),
+        deps=("publish",),
+        cacheable=False,  # bundles are content-addressed already, and patches depend on the previous one
+    ),
+)
+
+
+def _digest(repo_dir: Path, patterns: tuple[str, ...], extra: dict[str, object] | None = None) -> str:
+    """Hash of every file matched by the globs (path + content), plus parameters."""
+    h = hashlib.sha256()
+    for pattern in patterns:
+        h.update(f"\0{pattern}\0".encode("utf-8"))
+        for path in sorted(repo_dir.glob(pattern)):
+            if path.is_file():
+                h.update(path.relative_to(repo_dir).as_posix().encode("utf-8") + b"\0")
+                h.update(hashlib.sha256(path.read_bytes()).digest())
+    if extra:
+        h.update(json.dumps(extra, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _check_graph(tasks: tuple[Task, ...]) -> dict[str, Task]:
+    by_name = {t.name: t for t in tasks}
+    for t in tasks:
+        for d in t.deps:
+            if d not in by_name:
+                raise SystemExit(f"Task {t.name!r} depends on unknown task {d!r}")
+    visiting: set[str] = set()
+    done: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise SystemExit(f"Dependency cycle through task {name!r}")
+        visiting.add(name)
+        for d in by_name[name].deps:
+            visit(d)
+        visiting.discard(name)
+        done.add(name)
+
+    for t in tasks:
+        visit(t.name)
+    return by_name
+
+
+class Builder:
+    """Runs the task graph, skipping tasks whose inputs and outputs are unchanged."""
+
+    def __init__(
+        self,
+        ctx: BuildContext,
+        tasks: tuple[Task, ...] = TASKS,
+        force: bool = False,
+        cache: BuildCache | None = None,
+    ) -> None:
+        self.ctx = ctx
+        self.tasks = _check_graph(tasks)
+        self.force = force
+        self.cache = cache
+        self.state_path = ctx.repo_dir / BUILD_DIR / STATE_NAME
+        self.state: dict[str, dict[str, str]] = {}
+        if self.state_path.exists():
+            self.state = json.loads(self.state_path.read_text("utf-8"))
+
+    def _params(self, task: Task) -> dict[str, object]:
+        return {p: getattr(self.ctx, p) for p in task.params}
+
+    def _up_to_date(self, task: Task, input_key: str) -> bool:
+        prev = self.state.get(task.name)
+        if self.force or not prev or prev.get("inputs") != input_key:
+            return False
+        return prev.get("outputs") == _digest(self.ctx.repo_dir, task.outputs)
+
+    def _execute(self, task: Task) -> TaskResult:
+        start = time.perf_counter()
+        input_key = _digest(self.ctx.repo_dir, task.inputs, self._params(task))
+        if self._up_to_date(task, input_key):
+            status = "skipped"
+        else:
+            use_cache = self.cache is not None and task.cacheable and bool(task.outputs)
+            cache_key = BuildCache.key(task.name, input_key)
+            if use_cache and not self.force and self.cache.restore(cache_key, self.ctx.repo_dir, task.outputs):
+                status = "cached"
+            else:
+                task.run(self.ctx)
+                if use_cache:
+                    self.cache.store(cache_key, task.name, self.ctx.repo_dir, task.outputs)
+                status = "ran"
+            self.state[task.name] = {
+                "inputs": input_key,
+                "outputs": _digest(self.ctx.repo_dir, task.outputs),
+            }
+        end = time.perf_counter()
+        return TaskResult(task.name, status, end - start, start, end)
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.state, indent=2, sort_keys=True) + "\n", "utf-8")
+
+    def run(self, jobs: int = 4) -> BuildReport:
+        (self.ctx.repo_dir / BUILD_DIR).mkdir(parents=True, exist_ok=True)
+        report = BuildReport()
+        remaining = dict(self.tasks)
+        running: dict[Future[TaskResult], str] = {}
+        t0 = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                while remaining or running:
+                    for name, task in list(remaining.items()):
+                        if all(d in report.results for d in task.deps):
+                            del remaining[name]
+                            running[pool.submit(self._execute, task)] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        name = running.pop(fut)
+                        try:
+                            report.results[name] = fut.result()
+                        except BaseException:
+                            remaining.clear()
+                            for other in running:
+                                other.cancel()
+                            print(f"BUILD: task {name!r} failed")
+                            raise
+        finally:
+            self._save_state()
+            if self.cache is not None:
+                self.cache.evict()
+                self.cache.record_stats()
+        for r in report.results.values():
+            r.start -= t0
+            r.end -= t0
+        report.wall = time.perf_counter() - t0
+        return report
+
+
+def critical_path(tasks: dict[str, Task], results: dict[str, TaskResult]) -> tuple[list[str], float]:
+    """Longest chain of dependent tasks by measured duration."""
+    best: dict[str, tuple[float, list[str]]] = {}
+
+    def chain(name: str) -> tuple[float, list[str]]:
+        if name not in best:
+            head = max((chain(d) for d in tasks[name].deps), default=(0.0, []), key=lambda c: c[0])
+            best[name] = (head[0] + results[name].seconds, head[1] + [name])
+        return best[name]
+
+    length, path = max((chain(n) for n in results), default=(0.0, []), key=lambda c: c[0])
+    return path, length
+
+
+def format_summary(tasks: dict[str, Task], report: BuildReport) -> str:
+    lines = ["task".ljust(10) + "status".ljust(9) + "start".rjust(8) + "secs".rjust(8)]
+    for r in sorted(report.results.values(), key=lambda r: r.start):
+        lines.append(r.name.ljust(10) + r.status.ljust(9) + f"{r.start:8.2f}{r.seconds:8.2f}")
+    path, length = critical_path(tasks, report.results)
+    total = sum(r.seconds for r in report.results.values())
+    lines.append(f"wall {report.wall:.2f}s, sum of tasks {total:.2f}s")
+    lines.append(f"critical path {length:.2f}s: {' -> '.join(path)}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Build the whole site as a task graph.")
+    ap.add_argument("--client-nav", action="store_true", help="passed through to the pages stage")
+    ap.add_argument("--rum-endpoint", metavar="URL", help="RUM collector URL for the page beacons (default: none)")
+    ap.add_argument("--force", action="store_true", help="run every task even if up to date")
+    ap.add_argument("--jobs", type=int, default=4, help="maximum tasks run at once")
+    ap.add_argument("--cache-dir", type=Path, default=default_cache_dir(repo_dir), help="shared artifact cache")
+    ap.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / MB, help="cache size bound")
+    ap.add_argument("--no-cache", action="store_true", help="do not read or write the artifact cache")
+    args = ap.parse_args()
+
+    cache = None if args.no_cache else BuildCache(args.cache_dir, int(args.cache_mb * MB))
+    ctx = BuildContext(repo_dir, client_nav=args.client_nav, rum_endpoint=args.rum_endpoint)
+    builder = Builder(ctx, force=args.force, cache=cache)
+    report = builder.run(jobs=args.jobs)
+    print(format_summary(builder.tasks, report))
+    if cache is not None:
+        print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Content-addressed artifact cache shared by builds (see tools/build.py).
+
+Layout under the cache directory (any path; a shared filesystem works):
+  objects/ab/<sha256>     output file contents, stored once per distinct blob
+  entries/<key>.json      {"task": ..., "files": {"<repo path>": "<sha256>"}}
+  stats.json              cumulative hit/miss/store/eviction counters
+
+Entry keys hash a task's name with its input files (tool sources included)
+and parameters, so any checkout with the same inputs can reuse another's
+outputs. Entries are evicted least-recently-used first (a hit refreshes the
+entry's mtime) until blob storage is under the size bound; blobs no longer
+referenced by any entry are deleted with them. Writes go through a temp file
+and os.replace, so concurrent builds never see partial files. Several builds
+may share one cache: an unreferenced blob is only swept once it is older than
+ORPHAN_GRACE_SECONDS (a store in progress writes its blobs before its entry),
+a store re-checks its blobs after writing the entry, and a restore that loses
+a blob to a concurrent eviction counts as a miss.
+
+  python tools/build_cache.py [--cache-dir DIR] [--max-mb N] [--prune]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+CACHE_ENV = "CHEM_BUILD_CACHE"
+MB = 1024 * 1024
+DEFAULT_MAX_BYTES = 512 * MB
+CACHE_VERSION = "1"
+ORPHAN_GRACE_SECONDS = 15 * 60
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_restored: int = 0
+    bytes_stored: int = 0
+
+    def merge(self, other: CacheStats) -> None:
+        for k, v in asdict(other).items():
+            setattr(self, k, getattr(self, k) + v)
+
+
+def default_cache_dir(repo_dir: Path) -> Path:
+    env = os.environ.get(CACHE_ENV)
+    return Path(env).expanduser() if env else repo_dir / ".build" / "cache"
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _atomic_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=".tmp-")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class BuildCache:
+    """Stores and restores the output files of build tasks by input hash."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects = root / "objects"
+        self.entries = root / "entries"
+        self.stats = CacheStats()
+
+    @staticmethod
+    def key(task: str, input_key: str) -> str:
+        return hashlib.sha256(f"{CACHE_VERSION}\0{task}\0{input_key}".encode("utf-8")).hexdigest()
+
+    def _blob(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _entry(self, key: str) -> Path:
+        return self.entries / f"{key}.json"
+
+    def restore(self, key: str, repo_dir: Path, output_globs: tuple[str, ...]) -> bool:
+        """Materialise a cached entry into repo_dir; False (a miss) if anything is missing."""
+        entry_path = self._entry(key)
+        try:
+            files: dict[str, str] = json.loads(entry_path.read_text("utf-8"))["files"]
+        except (OSError, ValueError, KeyError):
+            self.stats.misses += 1
+            return False
+        if not all(self._blob(d).is_file() for d in files.values()):
+            self.stats.misses += 1
+            return False
+
+        # Mirror a real run: outputs the entry does not list are stale.
+        for pattern in output_globs:
+            for path in repo_dir.glob(pattern):
+                if path.is_file() and path.relative_to(repo_dir).as_posix() not in files:
+                    path.unlink()
+        try:
+            for rel, digest in files.items():
+                dst = repo_dir / rel
+                if dst.is_file() and hashlib.sha256(dst.read_bytes()).hexdigest() == digest:
+                    continue
+                _atomic_copy(self._blob(digest), dst)
+                self.stats.bytes_restored += dst.stat().st_size
+            os.utime(entry_path)
+        except OSError:
+            # Evicted by another build mid-restore; the task runs and rewrites its outputs.
+            self.stats.misses += 1
+            return False
+        self.stats.hits += 1
+        return True
+
+    def store(self, key: str, task: str, repo_dir: Path, output_globs: tuple[str, ...]) -> None:
+        files: dict[str, str] = {}
+        for pattern in output_globs:
+            for path in sorted(repo_dir.glob(pattern)):
+                if path.is_file():
+                    data = path.read_bytes()
+                    digest = hashlib.sha256(data).hexdigest()
+                    files[path.relative_to(repo_dir).as_posix()] = digest
+                    self._put_blob(digest, data)
+        entry = {"task": task, "files": files}
+        _atomic_write(self._entry(key), json.dumps(entry, ensure_ascii=False, indent=1).encode("utf-8"))
+        # A concurrent evict may have dropped a blob before the entry referenced it.
+        for rel, digest in files.items():
+            if not self._blob(digest).is_file():
+                self._put_blob(digest, (repo_dir / rel).read_bytes())
+        self.stats.stores += 1
+
+    def _put_blob(self, digest: str, data: bytes) -> None:
+        blob = self._blob(digest)
+        try:
+            os.utime(blob)  # a fresh mtime keeps a reused blob out of the orphan sweep
+        except FileNotFoundError:
+            _atomic_write(blob, data)
+            self.stats.bytes_stored += len(data)
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.objects.glob("*/*") if p.is_file())
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until blobs fit in max_bytes."""
+        entries: list[tuple[float, Path, list[str]]] = []
+        refs: Counter[str] = Counter()
+        for path in self.entries.glob("*.json"):
+            try:
+                files = json.loads(path.read_text("utf-8"))["files"]
+                mtime = path.stat().st_mtime
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+                continue
+            digests = sorted(set(files.values()))
+            refs.update(digests)
+            entries.append((mtime, path, digests))
+        entries.sort(key=lambda e: e[0])
+
+        sizes: dict[str, int] = {}
+        orphans: list[str] = []
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        for p in self.objects.glob("*/*"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if p.name.startswith(".tmp-"):
+                continue
+            sizes[p.name] = st.st_size
+            if p.name not in refs and st.st_mtime < cutoff:
+                orphans.append(p.name)
+        total = sum(sizes.values())
+        # Orphaned blobs (e.g. from an interrupted store) go first; recent ones
+        # may belong to a store whose entry is not written yet.
+        for digest in orphans:
+            self._blob(digest).unlink(missing_ok=True)
+            total -= sizes.pop(digest)
+
+        evicted = 0
+        for _, path, digests in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            evicted += 1
+            for digest in digests:
+                refs[digest] -= 1
+                if refs[digest] <= 0 and digest in sizes:
+                    self._blob(digest).unlink(missing_ok=True)
+                    total -= sizes.pop(digest)
+        self.stats.evictions += evicted
+        return evicted
+
+    def record_stats(self) -> CacheStats:
+        """Add this run's counters to stats.json and return the cumulative totals."""
+        path = self.root / "stats.json"
+        total = CacheStats()
+        try:
+            total = CacheStats(**json.loads(path.read_text("utf-8")))
+        except (OSError, ValueError, TypeError):
+            pass
+        total.merge(self.stats)
+        _atomic_write(path, (json.dumps(asdict(total), indent=2) + "\n").encode("utf-8"))
+        return total
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"cache {self.root}: {s.hits} hit(s), {s.misses} miss(es), {s.stores} stored, "
+            f"{s.evictions} evicted, {self.size() / MB:.1f} / {self.max_bytes / MB:g} MB"
+        )
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Show or prune the shared build cache.")
+    ap.add_argument("--cache-dir", type=Path, default=default_cache_dir(repo_dir))
+    ap.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / MB)
+    ap.add_argument("--prune", action="store_true", help="evict down to --max-mb")
+    args = ap.parse_args()
+
+    cache = BuildCache(args.cache_dir, int(args.max_mb * MB))
+    if args.prune:
+        print(f"Evicted {cache.evict()} entries")
+    totals = cache.record_stats()
+    entries = len(list(cache.entries.glob("*.json")))
+    print(f"{args.cache_dir}: {entries} entries, {cache.size() / MB:.1f} MB")
+    print(json.dumps(asdict(totals), indent=2))
+
+
+if __name__ == "__main__":
+    main()
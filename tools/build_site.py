@@ -2,22 +2,48 @@
 """
 Static-site build:
 - Parse the bundled PDF into structured experiment data
-- Generate per-experiment HTML pages under experiments/
-- Update index.html experiment list between markers
+- Build one Experiment per section (sections + notes): formatted fragments,
+  tips and index-card data are computed once there, and every output (pages,
+  extract fragments, client-nav payloads, catalogue cards) renders from it
+- Generate per-experiment HTML pages under experiments/, with the raw PDF
+  extracts split out into experiments/extracts/ fragments loaded on demand
+- Update index.html experiment list between markers (first page inline,
+  the full catalogue as paginated JSON shards under assets/catalogue/, plus
+  a compact search index there that the index page's search runs against)
+- Record per-page widget scripts in assets/build-manifest.json
+- Collect every experiment's practice material into one bank,
+  assets/practice-bank.json, indexed by type, experiment and tag, for
+  assets/practice.js to sample from without loading experiment pages
+- Minify every generated page and the generated part of index.html
+  (tools/minify_html.py; the result is checked to parse to the same DOM)
+- Check that every notes equation balances (tools/check_equations.py)
+- Check generated pages against tools/page_budgets.json
+- Optionally (--client-nav) emit JSON payloads for in-page prev/next navigation
+- Publish the result as a new generation of the served tree (tools/publish.py):
+  outputs are only rewritten when their content changes, and the live site
+  switches over atomically
 
 This keeps pages independent (one HTML per experiment) while sharing CSS/JS in assets/.
 """
 
 from __future__ import annotations
 
+import argparse
 from dataclasses import dataclass
+from functools import lru_cache
 import html
 import json
 import os
 import re
 from pathlib import Path
 
+from analyze_pages import check_site
+from check_equations import check_equations, collect_equations
+from generate_covers import cover_markup
 from generate_experiment_data import generate_sections
+from minify_html import minify_checked
+from notes_store import NotesStore
+from publish import publish, site_dir
 
 
 PREFERRED_BLOCK_ORDER = [
@@ -38,7 +64,42 @@ PREFERRED_BLOCK_ORDER = [
 ]
 
 
-@dataclass(frozen=True)
+# Optional experiment-page widgets, split out of experiment.js so pages only load
+# what they render: name -> (marker in the rendered HTML, script under assets/).
+WIDGET_SCRIPTS: dict[str, tuple[str, str]] = {
+    "eq-practice": ('class="eq-choice-sets"', "widgets/eq-practice.js"),
+    "step-order": ('class="step-order-game"', "widgets/step-order.js"),
+    "apparatus": ('class="apparatus-game"', "widgets/apparatus.js"),
+    "qa": ('class="qa-cards"', "widgets/qa.js"),
+}
+
+MANIFEST_NAME = "build-manifest.json"
+PAYLOAD_DIR = "payload"
+EXTRACT_DIR = "extracts"
+# Covers up to this size are inlined as <svg> (ids namespaced per use) instead
+# of costing the page an extra image request.
+COVER_INLINE_MAX_BYTES = 8 * 1024
+
+# Index catalogue: cards per shard; only the first shard is inlined in index.html.
+CATALOGUE_DIR = Path("assets") / "catalogue"
+CATALOGUE_PAGE_SIZE = 24
+# Search index: [title, keywords, href] per card, in catalogue order, so a hit's
+# position gives its shard; site.js fetches only the shards of the hits it shows.
+SEARCH_INDEX_NAME = "search.json"
+
+# Practice bank: notes key -> (item type, tag added to every item from that key).
+PRACTICE_BANK_PATH = Path("assets") / "practice-bank.json"
+PRACTICE_SOURCES: dict[str, tuple[str, str | None]] = {
+    "interactive_qa": ("qa", None),
+    "step_why_questions": ("qa", "操作原因"),
+    "quick_check": ("check", None),
+    "equations": ("equation", None),
+    "step_short_labels": ("order", None),
+    "apparatus_labels": ("apparatus", None),
+}
+
+
+@dataclass(frozen=True, slots=True)
 class ExpPage:
     index: int
     title: str
@@ -50,6 +111,7 @@ class ExpPage:
 def _safe(s: str) -> str:
     return html.escape(s, quote=True)
 
+@lru_cache(maxsize=4096)
 def _safe_chem_inline(text: str) -> str:
     """
     Escape text then render simple chemical formatting:
@@ -171,6 +233,9 @@ def _exp_filename(i: int) -> str:
     return f"exp-{i:02d}.html"
 
 
+INDEX_TIP_MAX_CHARS = 110
+
+
 def _extract_short_tip(blocks: dict[str, list[str]]) -> str:
     for k in ("要点", "实验原理", "实验现象", "注意事项"):
         items = blocks.get(k) or []
@@ -186,52 +251,42 @@ CONDITION_DISTRACTORS = ["点燃", "△", "高温", "MnO2", "通电", "催化剂
 SYMBOL_DISTRACTORS = ["↑", "↓", ""]
 
 
-def _chem_equation_to_interactive_html(eq: str) -> str:
-    """Render an equation with blanks for conditions and ↑↓ symbols."""
-    s = eq.strip()
-    if not s:
-        return ""
-
-    m = re.search(r'=\[(.+?)\]=', s)
-    if not m:
-        # No condition — just return standard rendering
-        return _chem_equation_to_html(s)
-
-    condition = m.group(1)
-    left = s[:m.start()].strip()
-    right = s[m.end():].strip()
-
-    # Build distractor choices for condition
+def _condition_choices(condition: str) -> list[str]:
+    """Answer plus distractors offered for a condition blank."""
     choices = [condition]
     for d in CONDITION_DISTRACTORS:
         if d != condition and len(choices) < 5:
             choices.append(d)
-    choices_str = _safe(",".join(choices))
+    return choices
 
-    arrow_html = (
-        f'<span class="chem-condition">'
-        f'<span class="cond-blank" data-answer="{_safe(condition)}" data-choices="{choices_str}">?</span>'
-        f'<span class="cond-arrow">=====</span>'
-        f'</span>'
-    )
 
-    left_html = _chem_equation_to_html_inner(left)
-    right_html = _chem_equation_to_html_inner(right)
-
-    # Replace ↑ and ↓ with interactive blanks using placeholders to avoid nesting
-    placeholders = {}
-    for sym in ("↑", "↓"):
-        if sym in right_html:
-            placeholder = f"__SYM_{id(sym)}__"
-            right_html = right_html.replace(sym, placeholder, 1)  # replace first occurrence only
-            placeholders[placeholder] = (
-                f'<span class="symbol-blank" data-answer="{sym}" '
-                f'data-choices="\u2191,\u2193,">?</span>'
-            )
-    for placeholder, blank_html in placeholders.items():
-        right_html = right_html.replace(placeholder, blank_html)
+def _chem_equation_to_practice_html(eq: str, choice_sets: list[list[str]]) -> str:
+    """
+    Render an equation once, tagged for the client-side practice mode.
 
-    return f"{left_html} {arrow_html} {right_html}"
+    Equations with a =[condition]= get data-cset (index into the page's shared
+    choice-set table, appended to choice_sets) and data-sym (the ↑/↓ marks on
+    the right-hand side). widgets/eq-practice.js turns the rendered condition
+    and the first of each mark into blanks only when practice mode is toggled.
+    """
+    s = eq.strip()
+    eq_html = _chem_equation_to_html(s)
+    m = re.search(r'=\[(.+?)\]=', s)
+    if not m:
+        return f'<span class="chem-eq">{eq_html}</span>'
+
+    choices = _condition_choices(m.group(1))
+    if choices not in choice_sets:
+        choice_sets.append(choices)
+    syms = "".join(sym for sym in ("↑", "↓") if sym in s[m.end():])
+    sym_attr = f' data-sym="{syms}"' if syms else ""
+    return f'<span class="chem-eq" data-cset="{choice_sets.index(choices)}"{sym_attr}>{eq_html}</span>'
+
+
+def _render_eq_choice_sets(choice_sets: list[list[str]]) -> str:
+    table = {"cond": choice_sets, "sym": SYMBOL_DISTRACTORS}
+    data = json.dumps(table, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return f'<script type="application/json" class="eq-choice-sets">{data}</script>'
 
 
 def _render_step_ordering_game(notes: dict) -> str:
@@ -309,6 +364,15 @@ def _render_interactive_qa(notes: dict) -> str:
     """.strip()
 
 
+def _cover_html(page: ExpPage, role: str, alt: str, aspect: str = "xMidYMid meet", lazy: bool = False) -> str:
+    """Inline the cover SVG when it is small enough, otherwise reference the file."""
+    markup = cover_markup(page.index, f"exp{page.index:02d}-{role}-", aspect=aspect)
+    if markup and len(markup.encode("utf-8")) <= COVER_INLINE_MAX_BYTES:
+        return markup
+    loading = ' loading="lazy"' if lazy else ""
+    return f'<img src="../assets/covers/exp-{page.index:02d}.svg" alt="{_safe(alt)}"{loading}>'
+
+
 def _render_apparatus_game(page: ExpPage) -> str:
     """Render apparatus labeling game if data exists."""
     notes = page.notes or {}
@@ -316,7 +380,7 @@ def _render_apparatus_game(page: ExpPage) -> str:
     if not labels or not isinstance(labels, list):
         return ""
 
-    cover_src = f"../assets/covers/exp-{page.index:02d}.svg"
+    cover_html = _cover_html(page, "game", "实验装置图")
 
     markers_html = []
     inputs_html = []
@@ -341,7 +405,7 @@ def _render_apparatus_game(page: ExpPage) -> str:
       <p class="muted" style="margin-bottom:8px;">看装置图，输入对应编号的仪器/物品名称，按回车检查。</p>
       <div class="apparatus-game">
         <div class="apparatus-diagram">
-          <img src="{_safe(cover_src)}" alt="实验装置图">
+          {cover_html}
           {"".join(markers_html)}
         </div>
         <div class="apparatus-inputs">
@@ -366,12 +430,12 @@ def _render_notes(page: ExpPage) -> str:
     if isinstance(equations, list) and equations:
         eq_items = [str(e).strip() for e in equations if str(e).strip()]
         if eq_items:
-            # Standard display
-            eq_display = [f'<span class="chem-eq chem-eq-display">{_chem_equation_to_html(e)}</span>' for e in eq_items]
-            # Interactive display (hidden by default)
-            eq_interactive = [f'<span class="chem-eq chem-eq-interactive">{_chem_equation_to_interactive_html(e)}</span>' for e in eq_items]
-            combined = [f'{d}{i}' for d, i in zip(eq_display, eq_interactive)]
-            parts.append(_render_block_html("必背方程式", combined))
+            # Rendered once; practice blanks are derived client-side from data attributes.
+            choice_sets: list[list[str]] = []
+            eq_html = [_chem_equation_to_practice_html(e, choice_sets) for e in eq_items]
+            parts.append(_render_block_html("必背方程式", eq_html))
+            if choice_sets:
+                parts.append(_render_eq_choice_sets(choice_sets))
 
     # Apparatus labeling game (right after equations, before principle/steps)
     apparatus_html = _render_apparatus_game(page)
@@ -408,7 +472,8 @@ def _render_notes(page: ExpPage) -> str:
     return "\n".join(parts)
 
 
-def _render_pdf_extract(page: ExpPage) -> str:
+def _render_pdf_extract_cards(page: ExpPage) -> str:
+    """The PDF-extracted block list, written to a per-page fragment file."""
     if not page.blocks:
         return ""
 
@@ -434,18 +499,57 @@ def _render_pdf_extract(page: ExpPage) -> str:
   <ul class="block-list">{lis}</ul>
 </div>"""
         )
-    inner_html = "\n".join(inner)
+    return "\n".join(inner)
 
+
+def _extract_href(page: ExpPage) -> str:
+    return f"{EXTRACT_DIR}/{page.filename}"
+
+
+def _render_pdf_extract(page: ExpPage) -> str:
+    """
+    Collapsed placeholder for the PDF extract.
+
+    experiment.js fetches the fragment when the <details> is first opened; the
+    link is the no-JS fallback and opens the fragment as a page of its own.
+    """
+    if not page.blocks:
+        return ""
+    href = _safe(_extract_href(page))
     return f"""
-    <details class="exp-block">
+    <details class="exp-block pdf-extract" data-src="{href}">
       <summary>PDF摘录（原文提取，供对照）</summary>
-      <div class="grid" style="grid-template-columns: 1fr; gap: 12px; margin-top: 12px;">
-        {inner_html}
+      <div class="grid pdf-extract-body" style="grid-template-columns: 1fr; gap: 12px; margin-top: 12px;">
+        <p class="muted"><a href="{href}">打开 PDF 摘录原文</a></p>
       </div>
     </details>
     """.strip()
 
 
+def _render_pdf_extract_fragment(exp: Experiment) -> str:
+    """Standalone page holding one experiment's extract; #pdfExtract is what gets inlined."""
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <meta name="robots" content="noindex">
+  <title>{_safe(exp.title)} PDF摘录 - 化学+</title>
+  <link rel="stylesheet" href="../../assets/site.css">
+</head>
+<body>
+  <main class="container" style="padding: 1.5rem 0;">
+    <p><a href="../{_safe(exp.filename)}">← 返回 {_safe(exp.title)}</a></p>
+    <h2 class="section-title">PDF摘录（原文提取，供对照）</h2>
+    <div id="pdfExtract" class="grid" style="grid-template-columns: 1fr; gap: 12px; margin-top: 12px;">
+      {exp.pdf_cards_html}
+    </div>
+  </main>
+</body>
+</html>
+"""
+
+
 def _render_block(label: str, items: list[str]) -> str:
     lis = "\n".join(f"<li>{_safe_chem_inline(t)}</li>" for t in items)
     return f"""
@@ -470,43 +574,161 @@ def _render_block_html(label: str, items_html: list[str]) -> str:
     """.strip()
 
 
-def _render_exp_page(page: ExpPage, prev_page: ExpPage | None, next_page: ExpPage | None) -> str:
-    title = _normalize_title(page.title)
-    short_tip = _extract_short_tip(page.blocks)
-    if page.notes and str(page.notes.get("goal") or "").strip():
-        short_tip = str(page.notes.get("goal")).strip()
+EQ_PRACTICE_BUTTON = '\n            <button id="eqPractice" class="pill" type="button">方程式练习</button>'
+
 
-    cover_src = f"../assets/covers/exp-{page.index:02d}.svg"
+def _page_widgets(content_html: str) -> list[str]:
+    """Return the widgets (keys of WIDGET_SCRIPTS) that the rendered content uses."""
+    return [name for name, (marker, _) in WIDGET_SCRIPTS.items() if marker in content_html]
+
+
+# Pages only carry the RUM beacon (assets/rum.js) when --rum-endpoint names a
+# collector (tools/rum_collector.py), e.g. http://127.0.0.1:8787/rum; none of
+# the static servers accept beacons themselves.
+RUM_SCRIPT_RE = re.compile(r'[ \t]*<script src="assets/rum\.js"[^>]*></script>\n')
+
+
+def _rum_script_tag(src: str, endpoint: str) -> str:
+    return f'<script src="{src}" data-endpoint="{_safe(endpoint)}" defer></script>'
+
+
+def _widget_script_srcs(widgets: list[str]) -> list[str]:
+    return [f"../assets/{WIDGET_SCRIPTS[name][1]}" for name in widgets]
+
+
+def _render_page_scripts(widgets: list[str], client_nav: bool = False, rum_endpoint: str | None = None) -> str:
+    tags = [_rum_script_tag("../assets/rum.js", rum_endpoint)] if rum_endpoint else []
+    tags.append('<script src="../assets/experiment.js" defer></script>')
+    for src in _widget_script_srcs(widgets):
+        tags.append(f'<script src="{src}" defer></script>')
+    if client_nav:
+        tags.append('<script src="../assets/router.js" defer></script>')
+    return "\n  ".join(tags)
+
+
+class _once:
+    """Compute a slotted attribute on first use (functools.cached_property needs a __dict__)."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.slot = "_" + fn.__name__
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = self.fn(obj)
+            setattr(obj, self.slot, value)
+            return value
+
+
+class Experiment:
+    """
+    One experiment, ready to render: the intermediate form every output is built from.
+
+    Cheap values (titles, tips, index card, prev/next links) are filled in by
+    build_experiments(); the HTML fragments are rendered on first use and then
+    kept, so a stage that only needs the index cards never renders notes, and
+    no output renders anything twice.
+    """
+
+    __slots__ = (
+        "page",
+        "index",
+        "filename",
+        "title",
+        "tip",
+        "tip_html",
+        "card",
+        "prev_link",
+        "next_link",
+        "_cover_html",
+        "_notes_html",
+        "_widgets",
+        "_pdf_html",
+        "_pdf_cards_html",
+    )
+
+    def __init__(self, page: ExpPage) -> None:
+        self.page = page
+        self.index = page.index
+        self.filename = page.filename
+        self.title = _normalize_title(page.title)
+        goal = str((page.notes or {}).get("goal") or "").strip()
+        # Page description: the notes goal in full, else a tip from the PDF blocks.
+        self.tip = goal or _extract_short_tip(page.blocks)
+        self.tip_html = _safe_chem_inline(self.tip)
+        card_tip_html = self.tip_html
+        if goal and len(goal) > INDEX_TIP_MAX_CHARS:
+            card_tip_html = _safe_chem_inline(goal[:INDEX_TIP_MAX_CHARS].rstrip() + "…")
+        # Card data shared by the server-rendered first index page and the catalogue shards.
+        self.card: dict[str, object] = {
+            "id": page.index,
+            "href": f"experiments/{page.filename}",
+            "title": self.title,
+            "tip": card_tip_html,
+            "cover": f"assets/covers/exp-{page.index:02d}.svg",
+        }
+        self.prev_link = '<span class="muted">已是第一篇</span>'
+        self.next_link = '<span class="muted">已是最后一篇</span>'
+
+    @_once
+    def cover_html(self) -> str:
+        return _cover_html(self.page, "hero", f"{self.title} 实验装置图", aspect="xMidYMid slice", lazy=True)
+
+    @_once
+    def notes_html(self) -> str:
+        return _render_notes(self.page)
+
+    @_once
+    def widgets(self) -> list[str]:
+        return _page_widgets(self.notes_html)
+
+    @_once
+    def pdf_html(self) -> str:
+        return _render_pdf_extract(self.page)
+
+    @_once
+    def pdf_cards_html(self) -> str:
+        return _render_pdf_extract_cards(self.page)
+
+
+def build_experiments(pages: list[ExpPage]) -> list[Experiment]:
+    """The render-ready form of every page, linked to its neighbours."""
+    exps = [Experiment(p) for p in pages]
+    for prev, cur in zip(exps, exps[1:]):
+        cur.prev_link = f'<a class="secondary-button" href="{_safe(prev.filename)}">← { _safe(prev.page.title) }</a>'
+        prev.next_link = f'<a class="secondary-button" href="{_safe(cur.filename)}">{ _safe(cur.page.title) } →</a>'
+    return exps
+
+
+def _render_exp_page(exp: Experiment, client_nav: bool = False, rum_endpoint: str | None = None) -> str:
+    title = exp.title
     cover_html = f"""
       <div class="exp-cover large">
-        <img src="{_safe(cover_src)}" alt="{_safe(title)} 实验装置图" loading="lazy">
+        {exp.cover_html}
       </div>
     """.strip()
 
-    notes_html = _render_notes(page)
-    pdf_html = _render_pdf_extract(page)
-
-    prev_link = (
-        f'<a class="secondary-button" href="{_safe(prev_page.filename)}">← { _safe(prev_page.title) }</a>'
-        if prev_page
-        else '<span class="muted">已是第一篇</span>'
-    )
-    next_link = (
-        f'<a class="secondary-button" href="{_safe(next_page.filename)}">{ _safe(next_page.title) } →</a>'
-        if next_page
-        else '<span class="muted">已是最后一篇</span>'
-    )
+    notes_html = exp.notes_html
+    pdf_html = exp.pdf_html
+    widgets = exp.widgets
+    eq_button = EQ_PRACTICE_BUTTON if "eq-practice" in widgets else ""
+    prev_link = exp.prev_link
+    next_link = exp.next_link
 
-    return f"""<!DOCTYPE html>
+    page_html = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <meta name="description" content="{_safe(short_tip)}">
+  <meta name="description" content="{_safe(exp.tip)}">
   <title>{_safe(title)} - 化学+</title>
   <link rel="stylesheet" href="../assets/site.css">
 </head>
-<body data-exp-id="{page.index}">
+<body data-exp-id="{exp.index}">
   <a class="skip-link" href="#exp-content">跳到实验内容</a>
 
   <nav aria-label="主导航">
@@ -543,8 +765,7 @@ def _render_exp_page(page: ExpPage, prev_page: ExpPage | None, next_page: ExpPag
           <div class="controls">
             <button id="expandAll" class="pill" type="button">全部展开</button>
             <button id="collapseAll" class="pill" type="button">全部收起</button>
-            <button id="quizMode" class="pill" type="button">自测模式</button>
-            <button id="eqPractice" class="pill" type="button">方程式练习</button>
+            <button id="quizMode" class="pill" type="button">自测模式</button>{eq_button}
             <button id="printPage" class="pill" type="button">打印/保存 PDF</button>
           </div>
 
@@ -566,7 +787,7 @@ def _render_exp_page(page: ExpPage, prev_page: ExpPage | None, next_page: ExpPag
         <aside class="keybox">
           <h3>本页速览</h3>
           <p class="muted" style="margin-bottom: 0.75rem;">一句话抓住考点：</p>
-          <p style="margin-bottom: 1rem;">{_safe_chem_inline(short_tip)}</p>
+          <p id="expTip" style="margin-bottom: 1rem;">{exp.tip_html}</p>
           <h3>自测清单</h3>
           <ul>
             <li>我能用 1 句话说出实验原理吗？</li>
@@ -585,63 +806,202 @@ def _render_exp_page(page: ExpPage, prev_page: ExpPage | None, next_page: ExpPag
     </div>
   </footer>
 
-  <script src="../assets/experiment.js" defer></script>
+  {_render_page_scripts(widgets, client_nav, rum_endpoint)}
 </body>
 </html>
 """
+    return page_html
+
+
+def _render_exp_payload(exp: Experiment) -> str:
+    """Compact JSON for client-side navigation: everything router.js swaps in."""
+    data = {
+        "id": exp.index,
+        "title": exp.title,
+        "doc_title": f"{exp.title} - 化学+",
+        "description": exp.tip,
+        "tip_html": exp.tip_html,
+        "cover_html": exp.cover_html,
+        "content": exp.notes_html + "\n" + exp.pdf_html,
+        "prev_next": exp.prev_link + "\n" + exp.next_link,
+        "widgets": exp.widgets,
+        "scripts": _widget_script_srcs(exp.widgets),
+    }
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _render_index_card(card: dict[str, object]) -> str:
+    # Keep in sync with renderCard() in assets/site.js.
+    return f'''<a class="exp-link card" href="{_safe(str(card["href"]))}" data-exp-id="{card["id"]}">
+  <div class="exp-cover">
+    <img src="{_safe(str(card["cover"]))}" alt="{_safe(str(card["title"]))} 实验装置图" loading="lazy">
+  </div>
+  <h3>{_safe(str(card["title"]))}</h3>
+  <p>{card["tip"]}</p>
+</a>'''
 
 
-def _update_index_experiment_list(index_html: str, pages: list[ExpPage]) -> str:
+def _write_if_changed(path: Path, text: str) -> bool:
+    """Write text unless the file already holds it, so unchanged outputs keep their mtime."""
+    try:
+        if path.read_text("utf-8") == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(text, "utf-8")
+    return True
+
+
+def _search_row(exp: Experiment) -> list[str]:
+    """[title, keywords, href]: keywords are the notes tags and the card's tip as plain text."""
+    tags = [str(t) for t in (exp.page.notes or {}).get("tags") or [] if str(t).strip()]
+    tip = exp.tip if len(exp.tip) <= INDEX_TIP_MAX_CHARS else exp.tip[:INDEX_TIP_MAX_CHARS].rstrip()
+    return [exp.title, " ".join(tags + [tip]), str(exp.card["href"])]
+
+
+def _write_catalogue_shards(repo_dir: Path, cards: list[dict[str, object]], search_rows: list[list[str]]) -> None:
+    """Write assets/catalogue/page-NNN.json (CATALOGUE_PAGE_SIZE cards each) and the search index."""
+    out = repo_dir / CATALOGUE_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    names = set()
+    for n, start in enumerate(range(0, len(cards), CATALOGUE_PAGE_SIZE)):
+        name = f"page-{n:03d}.json"
+        names.add(name)
+        shard = {"page": n, "cards": cards[start : start + CATALOGUE_PAGE_SIZE]}
+        _write_if_changed(out / name, json.dumps(shard, ensure_ascii=False, separators=(",", ":")))
+    for stale in out.glob("page-*.json"):
+        if stale.name not in names:
+            stale.unlink()
+    index = {"page_size": CATALOGUE_PAGE_SIZE, "items": search_rows}
+    _write_if_changed(out / SEARCH_INDEX_NAME, json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+
+
+def _update_index_experiment_list(index_html: str, cards: list[dict[str, object]], minify: bool = True) -> str:
+    """Server-render the first catalogue page; site.js pages in the rest from shards."""
     start = "<!-- EXPERIMENT_LIST_START -->"
     end = "<!-- EXPERIMENT_LIST_END -->"
     if start not in index_html or end not in index_html:
         raise RuntimeError("index.html missing experiment list markers")
 
-    cards = []
-    for p in pages:
-        if p.notes and str(p.notes.get("goal") or "").strip():
-            tip = str(p.notes.get("goal")).strip()
-            if len(tip) > 110:
-                tip = tip[:110].rstrip() + "…"
-        else:
-            tip = _extract_short_tip(p.blocks)
-        cover_src = f"assets/covers/exp-{p.index:02d}.svg"
-        cards.append(
-            f'''<a class="exp-link card" href="experiments/{_safe(p.filename)}" data-exp-id="{p.index}">
-  <div class="exp-cover">
-    <img src="{_safe(cover_src)}" alt="{_safe(_normalize_title(p.title))} 实验装置图" loading="lazy">
-  </div>
-  <h3>{_safe(_normalize_title(p.title))}</h3>
-  <p>{_safe_chem_inline(tip)}</p>
-</a>'''
-        )
-    block = "\n".join(cards)
+    meta = {
+        "total": len(cards),
+        "page_size": CATALOGUE_PAGE_SIZE,
+        "base": CATALOGUE_DIR.as_posix() + "/",
+        "search": SEARCH_INDEX_NAME,
+    }
+    first = "\n".join(_render_index_card(c) for c in cards[:CATALOGUE_PAGE_SIZE])
+    block = (
+        f'<script type="application/json" id="expCatalogueMeta">{json.dumps(meta, separators=(",", ":"))}</script>\n'
+        f'<div class="exp-page grid" data-page="0">\n{first}\n</div>'
+    )
+    if minify:
+        # Only the generated block: the rest of index.html is hand-edited source.
+        block = minify_checked(block, "index.html experiment list")
     replacement = f"{start}\n{block}\n{end}"
-    return re.sub(re.escape(start) + r".*?" + re.escape(end), replacement, index_html, flags=re.S)
+    return re.sub(re.escape(start) + r".*?" + re.escape(end), lambda _: replacement, index_html, flags=re.S)
 
 
-def main() -> None:
-    repo_dir = Path(__file__).resolve().parents[1]
-    sections = generate_sections(repo_dir)
 
-    notes_path = repo_dir / "content" / "exp_notes.json"
-    notes_by_idx: dict[str, dict[str, object]] = {}
-    if notes_path.exists():
-        notes_by_idx = json.loads(notes_path.read_text("utf-8"))
+def _practice_items(exp: Experiment) -> list[tuple[str, dict[str, object]]]:
+    """
+    (type, item) pairs for one experiment's practice material.
+
+    Text is pre-rendered like the catalogue tips (escaped, chemistry
+    formatted). Items are tagged with the notes' optional "tags" list, their
+    source's tag and, for equations, the reaction condition.
+    """
+    notes = exp.page.notes or {}
+    exp_tags = [str(t) for t in notes.get("tags") or [] if str(t).strip()]
+    out: list[tuple[str, dict[str, object]]] = []
+
+    def add(kind: str, item: dict[str, object], *tags: str | None) -> None:
+        item = {"e": exp.index, **item}
+        all_tags = list(dict.fromkeys(exp_tags + [t for t in tags if t]))
+        if all_tags:
+            item["tags"] = all_tags
+        out.append((kind, item))
+
+    for key, (kind, tag) in PRACTICE_SOURCES.items():
+        v = notes.get(key)
+        if not isinstance(v, list) or not v:
+            continue
+        if key == "step_short_labels":
+            labels = [str(x) for x in v]
+            mnemonic = str(notes.get("step_mnemonic") or "")
+            add(kind, {"q": _safe(mnemonic), "labels": labels}, tag)
+        elif key == "apparatus_labels":
+            labels = [[str(x.get("name", "")), x.get("x", 0), x.get("y", 0)] for x in v if isinstance(x, dict)]
+            add(kind, {"labels": labels, "cover": f"assets/covers/exp-{exp.index:02d}.svg"}, tag)
+        elif key == "equations":
+            for eq in (str(x).strip() for x in v):
+                if eq:
+                    m = re.search(r"=\[(.+?)\]=", eq)
+                    add(kind, {"q": _chem_equation_to_html(eq)}, tag, m.group(1) if m else None)
+        elif kind == "qa":
+            for x in v:
+                if isinstance(x, dict) and str(x.get("q", "")).strip():
+                    add(kind, {"q": _safe_chem_inline(str(x["q"])), "a": _safe_chem_inline(str(x.get("a", "")))}, tag)
+        else:
+            for text in (str(x).strip() for x in v):
+                # Self-check prompts may carry their answer in a trailing （…）.
+                m = re.fullmatch(r"(.+?)（([^（）]+)）", text)
+                q, a = (m.group(1), m.group(2)) if m else (text, "")
+                add(kind, {"q": _safe_chem_inline(q), **({"a": _safe_chem_inline(a)} if a else {})}, tag)
+    return out
 
-    out_dir = repo_dir / "experiments"
-    out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Fix known title errors from PDF extraction
-    title_fixups = {
-        "配置": "配制",  # 实验十六 "配置" should be "配制"
+def build_practice_bank(exps: list[Experiment]) -> dict[str, object]:
+    """
+    All practice items, grouped by type so each type is one [start, end) range
+    of the item list, plus item-id lists per experiment and per tag. The client
+    samples with O(1) work per item drawn, whatever the bank's size.
+    """
+    grouped: dict[str, list[dict[str, object]]] = {kind: [] for kind, _ in PRACTICE_SOURCES.values()}
+    for exp in exps:
+        for kind, item in _practice_items(exp):
+            grouped[kind].append(item)
+
+    items: list[dict[str, object]] = []
+    types: dict[str, list[int]] = {}
+    for kind, group in grouped.items():
+        if group:
+            types[kind] = [len(items), len(items) + len(group)]
+            items += group
+    by_exp: dict[str, list[int]] = {}
+    by_tag: dict[str, list[int]] = {}
+    for i, item in enumerate(items):
+        by_exp.setdefault(str(item["e"]), []).append(i)
+        for tag in item.get("tags", ()):  # type: ignore[union-attr]
+            by_tag.setdefault(str(tag), []).append(i)
+    return {
+        "v": 1,
+        "exps": {str(exp.index): [exp.title, f"experiments/{exp.filename}"] for exp in exps},
+        "types": types,
+        "by_exp": by_exp,
+        "by_tag": by_tag,
+        "items": items,
     }
 
+
+def write_practice_bank(repo_dir: Path, exps: list[Experiment]) -> None:
+    bank = build_practice_bank(exps)
+    _write_if_changed(repo_dir / PRACTICE_BANK_PATH, json.dumps(bank, ensure_ascii=False, separators=(",", ":")))
+    print(f"Practice bank: {len(bank['items'])} items, {', '.join(f'{k} {b - a}' for k, (a, b) in bank['types'].items())}")  # type: ignore[union-attr,misc]
+
+
+def check_notes_equations(repo_dir: Path, notes_store: NotesStore) -> None:
+    """Equations must balance (atoms and charge) before they are published."""
+    eq_problems = check_equations(collect_equations(repo_dir, notes_store))
+    for problem in eq_problems:
+        print(f"EQUATION: {problem}")
+    if eq_problems:
+        raise SystemExit(f"{len(eq_problems)} equation(s) failed the balance check")
+
+
+def build_pages(sections: list[dict[str, object]], notes_store: NotesStore) -> list[ExpPage]:
     pages: list[ExpPage] = []
     for i, sec in enumerate(sections, start=1):
         title = str(sec.get("title") or f"实验 {i}")
-        for wrong, right in title_fixups.items():
-            title = title.replace(wrong, right)
         blocks = sec.get("blocks") or {}
         if not isinstance(blocks, dict):
             blocks = {}
@@ -650,8 +1010,6 @@ def main() -> None:
         for k, v in blocks.items():
             if isinstance(v, list):
                 items = [str(x) for x in v if str(x).strip()]
-                for wrong, right in title_fixups.items():
-                    items = [item.replace(wrong, right) for item in items]
                 blocks2[str(k)] = items
         pages.append(
             ExpPage(
@@ -659,24 +1017,126 @@ def main() -> None:
                 title=title,
                 filename=_exp_filename(i),
                 blocks=blocks2,
-                notes=notes_by_idx.get(str(i), {}),
+                notes=notes_store.get(i),
             )
         )
+    return pages
+
+
+def write_experiment_pages(
+    repo_dir: Path,
+    exps: list[Experiment],
+    client_nav: bool = False,
+    minify: bool = True,
+    rum_endpoint: str | None = None,
+) -> None:
+    """Write experiments/*.html, their extract fragments and payloads, and the manifest."""
+    out_dir = repo_dir / "experiments"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Client-nav payloads are only kept while the mode is enabled.
+    payload_dir = out_dir / PAYLOAD_DIR
+    if client_nav:
+        payload_dir.mkdir(parents=True, exist_ok=True)
+    elif payload_dir.is_dir():
+        for stale in payload_dir.glob("exp-*.json"):
+            stale.unlink()
+
+    # PDF extracts live in per-page fragments, fetched when their <details> opens.
+    extract_dir = out_dir / EXTRACT_DIR
+    extract_dir.mkdir(parents=True, exist_ok=True)
+    extracts: set[str] = set()
+
+    # Write experiment pages, recording which widget scripts each one loads.
+    # Files whose content did not change are left alone.
+    manifest_pages: dict[str, dict[str, object]] = {}
+    written = 0
+    for exp in exps:
+        html_text = _render_exp_page(exp, client_nav=client_nav, rum_endpoint=rum_endpoint)
+        if minify:
+            html_text = minify_checked(html_text, f"experiments/{exp.filename}", hoist=True)
+        written += _write_if_changed(out_dir / exp.filename, html_text)
+        if exp.pdf_cards_html:
+            fragment = _render_pdf_extract_fragment(exp)
+            if minify:
+                fragment = minify_checked(fragment, f"experiments/{EXTRACT_DIR}/{exp.filename}", hoist=True)
+            written += _write_if_changed(extract_dir / exp.filename, fragment)
+            extracts.add(exp.filename)
+        manifest_pages[f"experiments/{exp.filename}"] = {"widgets": exp.widgets}
+        if client_nav:
+            payload_name = Path(exp.filename).with_suffix(".json").name
+            written += _write_if_changed(payload_dir / payload_name, _render_exp_payload(exp))
+    for stale in extract_dir.glob("exp-*.html"):
+        if stale.name not in extracts:
+            stale.unlink()
+
+    manifest = {"client_nav": client_nav, "pages": manifest_pages}
+    _write_if_changed(repo_dir / "assets" / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+    print(f"Experiment pages: {written} file(s) changed")
+
+
+def _update_index_rum_script(index_html: str, rum_endpoint: str | None) -> str:
+    """Add, retarget or drop the beacon tag just before site.js in the hand-edited index.html."""
+    index_html = RUM_SCRIPT_RE.sub("", index_html)
+    if not rum_endpoint:
+        return index_html
+    m = re.search(r'([ \t]*)<script src="assets/site\.js"', index_html)
+    if not m:
+        raise RuntimeError("index.html has no assets/site.js script to put the RUM beacon before")
+    tag = f"{m.group(1)}{_rum_script_tag('assets/rum.js', rum_endpoint)}\n"
+    return index_html[: m.start()] + tag + index_html[m.start() :]
 
-    # Write experiment pages.
-    for idx, p in enumerate(pages):
-        prev_p = pages[idx - 1] if idx > 0 else None
-        next_p = pages[idx + 1] if idx + 1 < len(pages) else None
-        html_text = _render_exp_page(p, prev_p, next_p)
-        (out_dir / p.filename).write_text(html_text, "utf-8")
 
-    # Update index experiment list.
+def write_index(
+    repo_dir: Path, exps: list[Experiment], minify: bool = True, rum_endpoint: str | None = None
+) -> None:
+    """Update the index experiment list (first page inline, all pages as shards) and its beacon tag."""
+    cards = [exp.card for exp in exps]
+    _write_catalogue_shards(repo_dir, cards, [_search_row(exp) for exp in exps])
     index_path = repo_dir / "index.html"
     index_html = index_path.read_text("utf-8")
-    index_html = _update_index_experiment_list(index_html, pages)
-    index_path.write_text(index_html, "utf-8")
+    index_html = _update_index_experiment_list(index_html, cards, minify=minify)
+    index_html = _update_index_rum_script(index_html, rum_endpoint)
+    _write_if_changed(index_path, index_html)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build experiment pages and update index.html.")
+    ap.add_argument(
+        "--client-nav",
+        action="store_true",
+        help="also emit experiments/payload/*.json and load router.js for in-page prev/next navigation",
+    )
+    ap.add_argument("--no-minify", action="store_true", help="write the templates' indented markup (for debugging)")
+    ap.add_argument("--no-publish", action="store_true", help="only update the working tree, not .build/site")
+    ap.add_argument(
+        "--rum-endpoint",
+        metavar="URL",
+        help="add the RUM beacon to every page, sending to this collector URL (default: no beacon)",
+    )
+    args = ap.parse_args()
+
+    repo_dir = Path(__file__).resolve().parents[1]
+    sections = generate_sections(repo_dir)
+
+    notes_store = NotesStore(repo_dir)
+    check_notes_equations(repo_dir, notes_store)
+
+    exps = build_experiments(build_pages(sections, notes_store))
+    write_experiment_pages(
+        repo_dir, exps, client_nav=args.client_nav, minify=not args.no_minify, rum_endpoint=args.rum_endpoint
+    )
+    write_index(repo_dir, exps, minify=not args.no_minify, rum_endpoint=args.rum_endpoint)
+    write_practice_bank(repo_dir, exps)
+
+    print(f"Built {len(exps)} experiment pages into {repo_dir / 'experiments'}")
+
+    # Page-weight report; fails the build only if budgets say so.
+    if not check_site(repo_dir):
+        raise SystemExit("Page budgets exceeded")
 
-    print(f"Built {len(pages)} experiment pages into {out_dir}")
+    if not args.no_publish:
+        publish(repo_dir, site_dir(repo_dir))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Offline classroom bundles of the published site, with delta patches.
+
+- Packs the current published generation (tools/publish.py) into one
+  content-addressed zip: the generation's .publish.json manifest becomes
+  bundle.json (path -> sha256), every distinct file is stored once as
+  objects/<sha256>, and the archive is named after the hash of its
+  contents, so an unchanged site never produces a new bundle
+- Writes a patch from the previous bundle: the changed paths and only the
+  objects the previous bundle lacks, each as a binary delta against the
+  object at the same path when that is smaller (a one-line page edit costs
+  well under a kilobyte)
+- Embeds tools/bundle_launcher.py as __main__.py: `python <bundle>.zip`
+  serves the site from the archive without extracting it, and
+  `python <old>.zip --apply <patch>` updates a classroom copy in place
+
+Bundles and patches go to .build/bundles/ (or --out), with bundles.json
+recording the build order. Only the newest --keep bundles are kept; patches
+are all kept, so a classroom on any older bundle can catch up patch by patch.
+
+  python tools/bundle.py [--out DIR] [--keep N]
+  python tools/bundle.py --list
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import json
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+from bundle_launcher import (
+    BUNDLE_FORMAT,
+    DELTA_DIR,
+    DELTA_MAGIC,
+    MAIN_NAME,
+    OBJECT_DIR,
+    OP_COPY,
+    OP_INSERT,
+    PATCH_RECORD,
+    apply_delta,
+    bundle_id,
+    bundle_name,
+    patch_name,
+    read_record,
+    write_archive,
+    write_bundle,
+)
+from publish import CURRENT_NAME, RECORD_NAME, site_dir
+
+
+LAUNCHER_PATH = Path(__file__).with_name("bundle_launcher.py")
+LOG_NAME = "bundles.json"
+DEFAULT_KEEP = 3
+DELTA_BLOCK = 32  # bytes; matches shorter than this are sent as literals
+
+
+@dataclass(frozen=True)
+class BundleResult:
+    id: str
+    path: Path
+    patch: Path | None = None
+    unchanged: bool = False
+
+
+def bundle_dir(repo_dir: Path) -> Path:
+    return repo_dir / ".build" / "bundles"
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def make_delta(base: bytes, data: bytes) -> bytes:
+    """
+    Copy/insert delta from base to data (bundle_launcher.apply_delta undoes it).
+
+    base is indexed in DELTA_BLOCK-sized blocks; data is scanned for them and
+    every hit is grown both ways, so moved and edited regions still copy.
+    """
+    block = DELTA_BLOCK
+    index: dict[bytes, int] = {}
+    for i in range(0, len(base) - block + 1, block):
+        index.setdefault(base[i : i + block], i)
+
+    out = bytearray(DELTA_MAGIC)
+
+    def insert(chunk: bytes) -> None:
+        if chunk:
+            out.extend(bytes([OP_INSERT]) + _varint(len(chunk)) + chunk)
+
+    literal = j = 0  # data[literal:j] is not yet covered by a copy
+    while j + block <= len(data):
+        i = index.get(data[j : j + block])
+        if i is None:
+            j += 1
+            continue
+        start, dstart = i, j
+        while start and dstart > literal and base[start - 1] == data[dstart - 1]:
+            start -= 1
+            dstart -= 1
+        end, dend = i + block, j + block
+        while base[end : end + block] == data[dend : dend + block] and dend + block <= len(data):
+            end += block
+            dend += block
+        while end < len(base) and dend < len(data) and base[end] == data[dend]:
+            end += 1
+            dend += 1
+        insert(data[literal:dstart])
+        out.extend(bytes([OP_COPY]) + _varint(start) + _varint(end - start))
+        literal = j = dend
+    insert(data[literal:])
+    return bytes(out)
+
+
+def _deflated_size(data: bytes) -> int:
+    return len(zlib.compress(data, 9))
+
+
+def _load_log(out: Path) -> list[dict[str, object]]:
+    try:
+        return json.loads((out / LOG_NAME).read_text("utf-8"))["bundles"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def _save_log(out: Path, entries: list[dict[str, object]]) -> None:
+    (out / LOG_NAME).write_text(json.dumps({"bundles": entries}, indent=1) + "\n", "utf-8")
+
+
+def _generation_objects(gen_dir: Path) -> tuple[dict[str, str], dict[str, bytes]]:
+    """The generation's manifest and its distinct contents, checked against the manifest."""
+    try:
+        record = json.loads((gen_dir / RECORD_NAME).read_text("utf-8"))
+    except (OSError, ValueError):
+        raise SystemExit(f"No published generation at {gen_dir} (run tools/publish.py first)")
+    files: dict[str, str] = record["files"]
+    objects: dict[str, bytes] = {}
+    for rel, digest in sorted(files.items()):
+        if digest in objects:
+            continue
+        data = (gen_dir / rel).read_bytes()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise SystemExit(f"{gen_dir.name}/{rel} does not match {RECORD_NAME}")
+        objects[digest] = data
+    return files, objects
+
+
+def write_patch(old_path: Path, record: dict[str, object], objects: dict[str, bytes], dest: Path) -> None:
+    """Objects the old bundle lacks, as deltas against the same path's old object when smaller."""
+    new_files: dict[str, str] = record["files"]  # type: ignore[assignment]
+    payload: dict[str, bytes] = {}
+    bases: dict[str, str] = {}
+    with zipfile.ZipFile(old_path) as old:
+        old_record = read_record(old)
+        old_files: dict[str, str] = old_record["files"]
+        old_launcher = old.read(MAIN_NAME)
+        have = set(old_files.values())
+        for rel, digest in sorted(new_files.items()):
+            if digest in have or digest in bases or OBJECT_DIR + digest in payload:
+                continue
+            data = objects[digest]
+            base_digest = old_files.get(rel)
+            if base_digest:
+                base = old.read(OBJECT_DIR + base_digest)
+                delta = make_delta(base, data)
+                if apply_delta(base, delta) != data:
+                    raise SystemExit(f"Delta for {rel} does not round-trip")
+                if _deflated_size(delta) < _deflated_size(data):
+                    payload[DELTA_DIR + digest] = delta
+                    bases[digest] = base_digest
+                    continue
+            payload[OBJECT_DIR + digest] = data
+
+    spec = {
+        "format": BUNDLE_FORMAT,
+        "from": old_record["id"],
+        "to": record["id"],
+        "generation": record["generation"],
+        "changed": {rel: d for rel, d in new_files.items() if old_files.get(rel) != d},
+        "removed": sorted(set(old_files) - set(new_files)),
+        "bases": bases,
+    }
+    launcher = LAUNCHER_PATH.read_bytes()
+    write_archive(str(dest), launcher if launcher != old_launcher else None, PATCH_RECORD, spec, payload)
+
+
+def build_bundle(site: Path, out: Path, keep: int = DEFAULT_KEEP) -> BundleResult:
+    """Bundle the current generation under site/, with a patch from the previous bundle."""
+    gen_dir = (site / CURRENT_NAME).resolve()
+    files, objects = _generation_objects(gen_dir)
+    launcher = LAUNCHER_PATH.read_bytes()
+    ident = bundle_id(files, launcher)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / bundle_name(ident)
+
+    log = _load_log(out)
+    if path.is_file():
+        print(f"Bundle: unchanged, {path.name}")
+        return BundleResult(ident, path, unchanged=True)
+
+    record = {"format": BUNDLE_FORMAT, "id": ident, "generation": gen_dir.name, "files": files}
+    write_bundle(str(path), record, objects, launcher)
+
+    entry: dict[str, object] = {"id": ident, "generation": gen_dir.name, "created": time.time(), "size": path.stat().st_size}
+    patch: Path | None = None
+    prev = next((e for e in reversed(log) if (out / bundle_name(str(e["id"]))).is_file()), None)
+    if prev is not None:
+        patch = out / patch_name(str(prev["id"]), ident)
+        write_patch(out / bundle_name(str(prev["id"])), record, objects, patch)
+        entry.update({"patch_from": prev["id"], "patch_size": patch.stat().st_size})
+    log.append(entry)
+
+    for e in log[:-keep]:
+        (out / bundle_name(str(e["id"]))).unlink(missing_ok=True)
+    _save_log(out, log)
+
+    patch_note = f", patch from {prev['id']}: {patch.stat().st_size / 1024:.1f} KiB" if patch and prev else ""
+    print(f"Bundle {path.name}: {len(files)} files, {path.stat().st_size / 1024:.1f} KiB{patch_note}")
+    return BundleResult(ident, path, patch)
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Package the published site as an offline bundle plus a delta patch.")
+    ap.add_argument("--site", type=Path, default=site_dir(repo_dir), help="published site directory (see tools/publish.py)")
+    ap.add_argument("--out", type=Path, default=bundle_dir(repo_dir), help="bundle directory (default: .build/bundles)")
+    ap.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="full bundles to retain")
+    ap.add_argument("--list", action="store_true", help="list bundles and patches")
+    args = ap.parse_args()
+
+    if args.list:
+        for e in _load_log(args.out):
+            present = (args.out / bundle_name(str(e["id"]))).is_file()
+            patch = f"  patch from {e['patch_from']} {int(e['patch_size']) / 1024:.1f} KiB" if e.get("patch_from") else ""
+            print(f"{'*' if present else ' '} {e['id']}  {int(e['size']) / 1024:.1f} KiB  ({e['generation']}){patch}")
+        return
+    build_bundle(args.site, args.out, keep=max(args.keep, 1))
+
+
+if __name__ == "__main__":
+    main()
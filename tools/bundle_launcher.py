@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Offline classroom launcher, shipped inside every site bundle as __main__.py.
+
+A bundle (built by tools/bundle.py) is one zip archive: bundle.json maps every
+site path to the sha256 of its content, and each distinct content is stored
+once as objects/<sha256>. Running the archive serves the site straight out of
+it, nothing is extracted:
+
+  python chem-site-<id>.zip [--port 8000] [--bind 127.0.0.1] [--open]
+
+Updates arrive as patches of a few kilobytes: the paths that changed, their
+new objects or binary deltas against objects the classroom already has, and
+this launcher only when it changed. Applying one writes the next
+bundle beside the old one and checks every rebuilt object against its hash:
+
+  python chem-site-<old>.zip --apply chem-site-<old>-<new>.patch
+
+Standard library only (any Python 3.8+); keep it that way.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+from urllib.parse import unquote, urlsplit
+import webbrowser
+import zipfile
+
+
+BUNDLE_FORMAT = 1
+BUNDLE_RECORD = "bundle.json"
+PATCH_RECORD = "patch.json"
+MAIN_NAME = "__main__.py"
+OBJECT_DIR = "objects/"
+DELTA_DIR = "deltas/"
+
+# Delta encoding: magic, then ops until the end; integers are LEB128 varints.
+#   0x00 offset length  copy from the base object
+#   0x01 length bytes   insert literal bytes
+DELTA_MAGIC = b"CHD1"
+OP_COPY = 0
+OP_INSERT = 1
+
+TYPES = {".woff2": "font/woff2", ".svg": "image/svg+xml", ".json": "application/json", ".js": "text/javascript"}
+
+# Inflated objects kept in memory, least recently used dropped first; larger
+# objects (the PDF) are inflated from the archive on every request.
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_MAX_OBJECT = 1024 * 1024
+
+# Pages built with a RUM endpoint beacon to it; offline there is no collector,
+# so beacons to this path are accepted and dropped.
+RUM_PATH = "/rum"
+MAX_BEACON_BYTES = 64 * 1024
+
+# Fixed timestamp so the same content always produces the same archive.
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def bundle_id(files: dict[str, str], launcher: bytes) -> str:
+    """Content address of a bundle: every path and digest, plus the launcher it runs."""
+    tree = json.dumps(files, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(tree + b"\0" + launcher).hexdigest()[:16]
+
+
+def bundle_name(ident: str) -> str:
+    return f"chem-site-{ident}.zip"
+
+
+def patch_name(old: str, new: str) -> str:
+    return f"chem-site-{old}-{new}.patch"
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    if delta[: len(DELTA_MAGIC)] != DELTA_MAGIC:
+        raise ValueError("not a delta")
+    out = bytearray()
+    pos = len(DELTA_MAGIC)
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op == OP_COPY:
+            offset, pos = _read_varint(delta, pos)
+            length, pos = _read_varint(delta, pos)
+            if offset + length > len(base):
+                raise ValueError("delta copies past the end of its base")
+            out += base[offset : offset + length]
+        elif op == OP_INSERT:
+            length, pos = _read_varint(delta, pos)
+            out += delta[pos : pos + length]
+            pos += length
+        else:
+            raise ValueError(f"unknown delta op {op}")
+    return bytes(out)
+
+
+def _store(zf: zipfile.ZipFile, name: str, data: bytes) -> None:
+    info = zipfile.ZipInfo(name, ZIP_EPOCH)
+    info.external_attr = 0o644 << 16
+    info.compress_type = zipfile.ZIP_DEFLATED
+    zf.writestr(info, data, compresslevel=9)
+
+
+def write_archive(
+    path: str, launcher: bytes | None, record_name: str, record: dict, members: dict[str, bytes]
+) -> None:
+    """Write a bundle or patch atomically: launcher first, then its record, then members by name."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with zipfile.ZipFile(tmp, "w") as zf:
+            if launcher is not None:
+                _store(zf, MAIN_NAME, launcher)
+            _store(zf, record_name, json.dumps(record, ensure_ascii=False, sort_keys=True, indent=1).encode("utf-8"))
+            for name in sorted(members):
+                _store(zf, name, members[name])
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_bundle(path: str, record: dict, objects: dict[str, bytes], launcher: bytes) -> None:
+    write_archive(path, launcher, BUNDLE_RECORD, record, {OBJECT_DIR + d: data for d, data in objects.items()})
+
+
+def read_record(zf: zipfile.ZipFile, name: str = BUNDLE_RECORD) -> dict:
+    try:
+        record = json.loads(zf.read(name).decode("utf-8"))
+    except KeyError:
+        raise SystemExit(f"{zf.filename}: not a site bundle (no {name})")
+    if record.get("format") != BUNDLE_FORMAT:
+        raise SystemExit(f"{zf.filename}: unsupported format {record.get('format')}")
+    return record
+
+
+def apply_patch(bundle_path: str, patch_path: str, out_dir: str | None = None) -> str:
+    """Build the next bundle from this one and a patch; returns the new bundle's path."""
+    with zipfile.ZipFile(bundle_path) as old, zipfile.ZipFile(patch_path) as patch:
+        have = read_record(old)
+        spec = read_record(patch, PATCH_RECORD)
+        if spec["from"] != have["id"]:
+            raise SystemExit(f"Patch is for bundle {spec['from']}, this is {have['id']}")
+        names = set(patch.namelist())
+        files = {rel: d for rel, d in have["files"].items() if rel not in spec["removed"]}
+        files.update(spec["changed"])
+        objects: dict[str, bytes] = {}
+        for digest in set(files.values()):
+            if OBJECT_DIR + digest in names:
+                data = patch.read(OBJECT_DIR + digest)
+            elif DELTA_DIR + digest in names:
+                base = spec["bases"][digest]
+                data = apply_delta(old.read(OBJECT_DIR + base), patch.read(DELTA_DIR + digest))
+            else:
+                data = old.read(OBJECT_DIR + digest)
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise SystemExit(f"Patch produced a corrupt object {digest[:12]}; bundle left unchanged")
+            objects[digest] = data
+        launcher = patch.read(MAIN_NAME) if MAIN_NAME in names else old.read(MAIN_NAME)
+
+    if bundle_id(files, launcher) != spec["to"]:
+        raise SystemExit("Patched bundle does not match its id; bundle left unchanged")
+    record = {"format": BUNDLE_FORMAT, "id": spec["to"], "generation": spec.get("generation"), "files": files}
+    path = os.path.join(out_dir or os.path.dirname(os.path.abspath(bundle_path)), bundle_name(spec["to"]))
+    write_bundle(path, record, objects, launcher)
+    return path
+
+
+class BundleSite:
+    """Serves files out of an open bundle, keeping recently used small objects inflated."""
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.zf = zipfile.ZipFile(path)
+        self.record = read_record(self.zf)
+        self.files: dict[str, str] = self.record["files"]
+        self.max_bytes = max_bytes
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, url_path: str) -> tuple[str, str] | None:
+        """(site path, digest) for a request path, trying index.html for directories."""
+        rel = unquote(urlsplit(url_path).path).lstrip("/")
+        for candidate in (rel, rel.rstrip("/") + "/index.html" if rel else "index.html"):
+            digest = self.files.get(candidate)
+            if digest:
+                return candidate, digest
+        return None
+
+    def read(self, digest: str) -> bytes:
+        with self._lock:
+            data = self._cache.get(digest)
+            if data is not None:
+                self._cache.move_to_end(digest)
+                return data
+            data = self.zf.read(OBJECT_DIR + digest)
+            if len(data) <= CACHE_MAX_OBJECT:
+                self._cache[digest] = data
+                self._cached_bytes += len(data)
+                while self._cached_bytes > self.max_bytes:
+                    self._cached_bytes -= len(self._cache.popitem(last=False)[1])
+            return data
+
+
+def _handler(site: BundleSite) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "chem-bundle"
+
+        def do_HEAD(self) -> None:
+            self._serve(body=False)
+
+        def do_GET(self) -> None:
+            self._serve(body=True)
+
+        def do_POST(self) -> None:
+            if urlsplit(self.path).path != RUM_PATH:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", ""))
+            except ValueError:
+                length = -1
+            if 0 <= length <= MAX_BEACON_BYTES:
+                self.rfile.read(length)
+            self.send_response(HTTPStatus.NO_CONTENT)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _serve(self, body: bool) -> None:
+            found = site.lookup(self.path)
+            if found is None:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            rel, digest = found
+            etag = f'"{digest[:20]}"'
+            if etag in self.headers.get("If-None-Match", ""):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            data = site.read(digest)
+            ext = os.path.splitext(rel)[1].lower()
+            ctype = TYPES.get(ext) or mimetypes.guess_type(rel)[0] or "application/octet-stream"
+            if ctype.startswith("text/") or ctype in ("application/json", "image/svg+xml"):
+                ctype += "; charset=utf-8"
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if body:
+                self.wfile.write(data)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def _own_archive() -> str | None:
+    """The bundle this file runs from, when started as `python bundle.zip`."""
+    archive = os.path.dirname(os.path.abspath(__file__))
+    return archive if zipfile.is_zipfile(archive) else None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serve an offline site bundle, or update it with a patch.")
+    ap.add_argument("--bundle", default=_own_archive(), help="bundle to use (default: the archive being run)")
+    ap.add_argument("--bind", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--open", action="store_true", help="open the site in the default browser")
+    ap.add_argument("--apply", metavar="PATCH", help="write the next bundle from this one and PATCH, then exit")
+    ap.add_argument("--out", help="directory for the patched bundle (default: next to this one)")
+    args = ap.parse_args()
+    if not args.bundle:
+        raise SystemExit("No bundle: run a bundle archive directly or pass --bundle")
+
+    if args.apply:
+        print(f"Updated: {apply_patch(args.bundle, args.apply, args.out)}")
+        return
+
+    site = BundleSite(args.bundle)
+    server = ThreadingHTTPServer((args.bind, args.port), _handler(site))
+    url = f"http://{args.bind}:{server.server_address[1]}/"
+    print(f"Serving bundle {site.record['id']} ({len(site.files)} files) at {url}  (Ctrl+C to stop)")
+    if args.open:
+        webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Build-time check that every equation in the notes balances.
+
+Equations are parsed with the same grammar build_site.py uses for rendering
+(`=[condition]=`, `->`, `<->`, `=` arrows; coefficients, subscripts,
+parentheses, `·` adducts, `^2-` / `2+` charges, trailing ↑/↓). Each species
+becomes a row of signed element/charge counts; all equations in the corpus are
+then summed into one (equations x elements) matrix in a single vectorised
+NumPy pass and any non-zero row is reported with its file and position.
+
+NumPy is optional: without it the same sums are accumulated in plain Python.
+
+Run standalone:  python tools/check_equations.py
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # optional: falls back to a pure-Python accumulation
+    np = None
+
+from notes_store import NotesStore
+
+
+CHARGE = "charge"
+
+_COND_ARROW_RE = re.compile(r"=\[(.+?)\]=")
+_ARROWS = {"→", "⇌", "="}
+_OPERATORS = {"+", "→", "⇌", "=", "≈"}
+_FORMULA_TOKEN_RE = re.compile(r"([A-Z][a-z]?)|(\d+)|([\(\[])|([\)\]])")
+_STATE_SYMBOLS = "↑↓"
+
+ELEMENTS = frozenset(
+    """
+    H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn
+    Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce
+    Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn
+    Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl
+    Mc Lv Ts Og
+    """.split()
+)
+
+
+class EquationError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class EquationRef:
+    """One equation and where it came from (for error messages)."""
+
+    source: str
+    position: str
+    text: str
+
+
+@dataclass(frozen=True)
+class Species:
+    coeff: int
+    counts: tuple[tuple[str, int], ...]
+    charge: int
+
+
+def _parse_group(formula: str) -> Counter[str]:
+    """Element counts of a formula without coefficient/charge, e.g. Al2(SO4)3."""
+    stack: list[Counter[str]] = [Counter()]
+    last: Counter[str] | None = None  # element or closed group a multiplier applies to
+    pos = 0
+    for m in _FORMULA_TOKEN_RE.finditer(formula):
+        if m.start() != pos:
+            raise EquationError(f"unexpected {formula[pos:m.start()]!r} in {formula!r}")
+        pos = m.end()
+        element, digits, opening, closing = m.groups()
+        if element:
+            if element not in ELEMENTS:
+                raise EquationError(f"unknown element {element!r} in {formula!r}")
+            last = Counter({element: 1})
+            stack[-1].update(last)
+        elif digits:
+            if last is None:
+                raise EquationError(f"misplaced number in {formula!r}")
+            n = int(digits)
+            for el, c in last.items():
+                stack[-1][el] += c * (n - 1)
+            last = None
+        elif opening:
+            stack.append(Counter())
+            last = None
+        else:
+            if len(stack) == 1:
+                raise EquationError(f"unbalanced parentheses in {formula!r}")
+            last = stack.pop()
+            stack[-1].update(last)
+    if pos != len(formula) or len(stack) != 1:
+        raise EquationError(f"cannot parse {formula!r}")
+    if not stack[0]:
+        raise EquationError(f"no elements in {formula!r}")
+    return stack[0]
+
+
+@lru_cache(maxsize=4096)
+def parse_species(token: str) -> Species:
+    """Parse one species token, mirroring build_site._chem_species_to_html()."""
+    s = token.strip().rstrip(_STATE_SYMBOLS).strip()
+    if s.startswith("(") and s.endswith(")") and len(s) >= 3:
+        s = s[1:-1].strip()
+
+    coeff = 1
+    m = re.match(r"^(\d+)(.+)$", s)
+    if m:
+        coeff = int(m.group(1))
+        s = m.group(2)
+
+    charge = 0
+    m = re.match(r"^(.*)\^(\d+)([+-])$", s)
+    if m:
+        s = m.group(1)
+        charge = int(m.group(2)) * (1 if m.group(3) == "+" else -1)
+    else:
+        m2 = re.match(r"^(.*?)(\d+)?([+-])$", s)
+        if m2 and re.search(r"[A-Za-z]", s) and m2.group(1):
+            s = m2.group(1)
+            charge = int(m2.group(2) or 1) * (1 if m2.group(3) == "+" else -1)
+
+    counts: Counter[str] = Counter()
+    for part in s.split("·"):
+        pm = re.match(r"^(\d*)(.+)$", part)
+        if not pm:
+            raise EquationError(f"empty adduct in {token!r}")
+        mult = int(pm.group(1) or 1)
+        for el, c in _parse_group(pm.group(2)).items():
+            counts[el] += c * mult
+    return Species(coeff, tuple(sorted(counts.items())), charge)
+
+
+def parse_equation(eq: str) -> tuple[list[Species], list[Species]]:
+    """Split an equation into reactant and product species."""
+    s = eq.strip()
+    m = _COND_ARROW_RE.search(s)
+    if m:
+        s = s[: m.start()] + " = " + s[m.end() :]
+    s = s.replace("<->", "⇌").replace("<=>", "⇌").replace("->", "→")
+
+    sides: list[list[Species]] = [[]]
+    for t in s.split():
+        if t in _ARROWS:
+            sides.append([])
+        elif t in _OPERATORS:
+            continue
+        else:
+            sides[-1].append(parse_species(t))
+    if len(sides) != 2 or not sides[0] or not sides[1]:
+        raise EquationError("expected exactly one arrow with species on both sides")
+    return sides[0], sides[1]
+
+
+def _imbalance(columns: list[str], row: object) -> str:
+    parts = []
+    for col, v in zip(columns, row):  # type: ignore[call-overload]
+        if v:
+            parts.append(f"{col} {int(v):+d}")
+    return ", ".join(parts)
+
+
+def check_equations(refs: list[EquationRef]) -> list[str]:
+    """Return one message per equation that fails to parse or does not balance."""
+    problems: list[str] = []
+    columns: dict[str, int] = {CHARGE: 0}
+    rows: list[int] = []
+    cols: list[int] = []
+    vals: list[int] = []
+    checked: list[EquationRef] = []
+
+    for ref in refs:
+        try:
+            reactants, products = parse_equation(ref.text)
+        except EquationError as e:
+            problems.append(f"{ref.source} {ref.position}: {ref.text!r}: {e}")
+            continue
+        k = len(checked)
+        checked.append(ref)
+        for sign, side in ((1, reactants), (-1, products)):
+            for sp in side:
+                for el, n in sp.counts:
+                    rows.append(k)
+                    cols.append(columns.setdefault(el, len(columns)))
+                    vals.append(sign * sp.coeff * n)
+                if sp.charge:
+                    rows.append(k)
+                    cols.append(0)
+                    vals.append(sign * sp.coeff * sp.charge)
+
+    names = sorted(columns, key=columns.__getitem__)
+    if np is not None:
+        matrix = np.zeros((len(checked), len(columns)), dtype=np.int64)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), vals)
+        bad = np.flatnonzero(matrix.any(axis=1))
+        residuals = [(int(k), matrix[k].tolist()) for k in bad]
+    else:
+        sums: dict[int, list[int]] = {}
+        for r, c, v in zip(rows, cols, vals):
+            sums.setdefault(r, [0] * len(columns))[c] += v
+        residuals = sorted((k, row) for k, row in sums.items() if any(row))
+
+    for k, row in residuals:
+        ref = checked[k]
+        problems.append(f"{ref.source} {ref.position}: {ref.text!r} does not balance ({_imbalance(names, row)})")
+    return problems
+
+
+def collect_equations(repo_dir: Path, store: NotesStore | None = None) -> list[EquationRef]:
+    store = store or NotesStore(repo_dir)
+    refs: list[EquationRef] = []
+    for key in store.ids():
+        equations = store.get(key).get("equations") or []
+        if not isinstance(equations, list):
+            continue
+        source = store.source_name(key)
+        for i, eq in enumerate(equations):
+            text = str(eq).strip()
+            if text:
+                refs.append(EquationRef(source=source, position=f"equations[{i}]", text=text))
+    return refs
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    refs = collect_equations(repo_dir)
+    problems = check_equations(refs)
+    for p in problems:
+        print(f"EQUATION: {p}")
+    print(f"Checked {len(refs)} equations, {len(problems)} problem(s)")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
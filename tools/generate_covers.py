@@ -4,11 +4,15 @@ Generate simple apparatus cover SVGs for each experiment page.
 
 These are schematic (not photos) but map to the typical setup, making the index page
 more visual for students.
+
+Every id inside a cover (gradients, filter) carries a prefix, so build_site.py
+can inline several covers into one page via cover_markup() without clashes.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+import re
 from pathlib import Path
 
 
@@ -44,9 +48,14 @@ SPECS: list[CoverSpec] = [
 ]
 
 
+XML_DECL = '<?xml version="1.0" encoding="UTF-8"?>\n'
+FILE_SIZE_ATTRS = 'width="1200" height="520"'
+
+_ID_RE = re.compile(r'\bid="([^"]+)"')
+
+
 def svg_header(accent: str, label: str) -> str:
-    return f"""<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg" width="1200" height="520" viewBox="0 0 1200 520" role="img" aria-label="{label}">
+    return f"""{XML_DECL}<svg xmlns="http://www.w3.org/2000/svg" {FILE_SIZE_ATTRS} viewBox="0 0 1200 520" role="img" aria-label="{label}">
   <defs>
     <linearGradient id="bg" x1="0" y1="0" x2="1" y2="1">
       <stop offset="0" stop-color="#1e293b"/>
@@ -354,23 +363,52 @@ KIND_FN = {
 }
 
 
-def main() -> None:
-    repo_dir = Path(__file__).resolve().parents[1]
-    out_dir = repo_dir / "assets" / "covers"
-    out_dir.mkdir(parents=True, exist_ok=True)
+SPEC_BY_IDX = {spec.idx: spec for spec in SPECS}
+
+
+def namespace_ids(svg: str, prefix: str) -> str:
+    """Prefix every id in the SVG and the url(#..)/href="#.." references to it."""
+    ids = set(_ID_RE.findall(svg))
+    if not prefix or not ids:
+        return svg
+    pattern = re.compile(r'(\bid="|url\(#|href="#)(' + "|".join(map(re.escape, sorted(ids))) + r')(?=[")])')
+    return pattern.sub(lambda m: f"{m.group(1)}{prefix}{m.group(2)}", svg)
 
+
+def cover_svg(spec: CoverSpec, prefix: str = "") -> str:
+    fn = KIND_FN.get(spec.kind)
+    if not fn:
+        raise SystemExit(f"Unknown kind: {spec.kind}")
+    label = f"实验{spec.idx}：{spec.title}"
+    return namespace_ids(svg_header(spec.accent, label) + fn(spec.accent) + svg_footer(), prefix)
+
+
+def cover_markup(idx: int, prefix: str, aspect: str = "xMidYMid meet") -> str | None:
+    """Inline-ready <svg> for experiment idx (no XML declaration, sized by CSS), or None."""
+    spec = SPEC_BY_IDX.get(idx)
+    if spec is None:
+        return None
+    svg = cover_svg(spec, prefix).removeprefix(XML_DECL).strip()
+    return svg.replace(FILE_SIZE_ATTRS, f'preserveAspectRatio="{aspect}" focusable="false"', 1)
+
+
+def write_covers(out_dir: Path) -> list[Path]:
+    """Write one cover SVG per spec into out_dir and return the paths."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written: list[Path] = []
     for spec in SPECS:
-        fn = KIND_FN.get(spec.kind)
-        if not fn:
-            raise SystemExit(f"Unknown kind: {spec.kind}")
+        path = out_dir / f"exp-{spec.idx:02d}.svg"
+        path.write_text(cover_svg(spec, prefix=f"exp{spec.idx:02d}-"), "utf-8")
+        written.append(path)
+    return written
 
-        label = f"实验{spec.idx}：{spec.title}"
-        svg = svg_header(spec.accent, label) + fn(spec.accent) + svg_footer()
-        (out_dir / f"exp-{spec.idx:02d}.svg").write_text(svg, "utf-8")
 
-    print(f"Generated {len(SPECS)} cover SVGs into {out_dir}")
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    out_dir = repo_dir / "assets" / "covers"
+    written = write_covers(out_dir)
+    print(f"Generated {len(written)} cover SVGs into {out_dir}")
 
 
 if __name__ == "__main__":
     main()
-
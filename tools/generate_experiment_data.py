@@ -2,56 +2,164 @@
 """
 Generate structured experiment data from the bundled PDF.
 
+Lines are classified in one pass against the rule table in
+tools/parse_rules.json (headings, block labels, keyword-triggered label
+switches, bullet markers, page artifacts); a new textbook layout needs new
+rules, not code. Extraction errors are fixed on the way in: every line first
+goes through the correction dictionary in tools/corrections.json, compiled
+into a single multi-pattern replacer, and the corrections that fired are
+reported.
+
 Output:
   JSON to stdout (UTF-8), suitable for embedding into index.html.
 """
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 import json
 import re
 import subprocess
+import sys
 import tempfile
 from pathlib import Path
 
+from text_automaton import Automaton, Replacer
+
 
 PDF_NAME = "2025年中考化学一轮复习化学实验基础知识及课本实验总结.pdf"
 
 
-HEADING_RE = re.compile(r"^(实验[一二三四五六七八九十]+、|拓展[一二三]、)")
-ARTIFACT_RE = re.compile(r"^\{#\{.*\}#\}$")
-
-LABELS = [
-    "试剂选择",
-    "实验原理",
-    "化学方程式",
-    "实验仪器",
-    "实验操作",
-    "实验现象",
-    "实验结论",
-    "误差分析",
-    "注意事项",
-    "原因分析",
-    "检验",
-    "验满",
-]
-LABEL_SET = set(LABELS)
-
-BULLET_PREFIXES = ("➢", "◆", "⚫", "❖", "•", "-", "﹣", "●")
-
-
-def _is_artifact(line: str) -> bool:
-    s = line.strip()
-    if not s:
-        return True
-    if ARTIFACT_RE.match(s):
-        return True
-    # page numbers / roman numerals in extracted text
-    if re.fullmatch(r"\d+", s):
-        return True
-    if re.fullmatch(r"[IVXLC]+", s):
-        return True
-    return False
+RULES_PATH = Path(__file__).with_name("parse_rules.json")
+CORRECTIONS_PATH = Path(__file__).with_name("corrections.json")
+
+# Line kinds from LineRules.classify().
+HEADING, SKIP, LABEL, TEXT = "heading", "skip", "label", "text"
+
+
+@dataclass(frozen=True)
+class SwitchRule:
+    """Keyword-triggered change of the current block label."""
+
+    label: str
+    when: str | None  # only while in this block (None: any)
+    all_of: frozenset[int]  # automaton pattern ids that must all occur
+    any_of: frozenset[int]  # ... and at least one of these, if any
+    consume: bool  # the triggering line is dropped (checked before labels)
+
+
+@dataclass(frozen=True)
+class Line:
+    kind: str
+    text: str
+    label: str | None = None  # LABEL: the label line itself
+    switches: tuple[SwitchRule, ...] = ()  # rules whose keywords occur in the line
+    bullet: bool = False
+
+
+class LineRules:
+    """
+    The parse rule table (tools/parse_rules.json) compiled for one-pass line
+    classification: every literal (labels, switch keywords, bullet markers)
+    goes into one Aho-Corasick automaton, the heading and artifact patterns
+    into one combined regex. Adding rules adds no per-line passes.
+    """
+
+    def __init__(self, table: dict[str, object]) -> None:
+        heading: dict[str, list[str]] = table["heading"]  # type: ignore[assignment]
+        artifacts: list[str] = table["artifacts"]  # type: ignore[assignment]
+        self.default_label = str(table["default_label"])
+        labels = [str(x) for x in table["labels"]]  # type: ignore[union-attr]
+        bullets = [str(x) for x in table["bullets"]]  # type: ignore[union-attr]
+        switches: list[dict[str, object]] = table.get("switches", [])  # type: ignore[assignment]
+
+        keywords = [str(k) for sw in switches for k in [*sw.get("all", []), *sw.get("any", [])]]  # type: ignore[misc]
+        self.automaton = Automaton(labels + keywords + bullets)
+        ids = {p: i for i, p in enumerate(self.automaton.patterns)}
+        self._labels = {ids[x] for x in labels}
+        self._bullets = {ids[x] for x in bullets}
+        self._bullet_list = sorted(bullets, key=len, reverse=True)
+        self.switches = tuple(
+            SwitchRule(
+                label=str(sw["label"]),
+                when=str(sw["when"]) if sw.get("when") else None,
+                all_of=frozenset(ids[str(k)] for k in sw.get("all", [])),  # type: ignore[union-attr]
+                any_of=frozenset(ids[str(k)] for k in sw.get("any", [])),  # type: ignore[union-attr]
+                consume=bool(sw.get("consume")),
+            )
+            for sw in switches
+        )
+        # Only rules sharing a keyword with the line are evaluated for it.
+        self._switches_by_pid: dict[int, list[int]] = {}
+        for n, rule in enumerate(self.switches):
+            for pid in rule.all_of | rule.any_of:
+                self._switches_by_pid.setdefault(pid, []).append(n)
+
+        # Headings match at the start of a line unless it is a TOC entry;
+        # artifacts (page numbers, markers) must match the whole line.
+        toc = "|".join(f"(?:{t})" for t in heading.get("toc", []))
+        head = "|".join(f"(?:{h})" for h in heading["patterns"])
+        art = "|".join(f"(?:{a})" for a in artifacts)
+        self._line_re = re.compile(
+            (f"(?!.*?(?:{toc}))" if toc else "") + f"(?P<{HEADING}>{head})" + f"|(?P<{SKIP}>(?:{art})\\Z)"
+        )
+
+    def classify(self, s: str) -> Line:
+        """Classify one stripped line."""
+        if not s:
+            return Line(SKIP, s)
+        m = self._line_re.match(s)
+        if m:
+            return Line(m.lastgroup or SKIP, s)
+
+        found: set[int] = set()
+        candidates: set[int] = set()
+        label = bullet = False
+        for start, pid in self.automaton.iter_matches(s):
+            found.add(pid)
+            candidates.update(self._switches_by_pid.get(pid, ()))
+            if start == 0:
+                if pid in self._labels and len(self.automaton.patterns[pid]) == len(s):
+                    label = True
+                elif pid in self._bullets:
+                    bullet = True
+        switches = tuple(
+            sw
+            for sw in (self.switches[n] for n in sorted(candidates))
+            if sw.all_of <= found and (not sw.any_of or not sw.any_of.isdisjoint(found))
+        )
+        if label:
+            return Line(LABEL, s, label=s, switches=switches)
+        return Line(TEXT, s, switches=switches, bullet=bullet)
+
+    def strip_bullets(self, s: str) -> str:
+        while True:
+            marker = next((b for b in self._bullet_list if s.startswith(b)), None)
+            if marker is None:
+                return s.strip()
+            s = s[len(marker):]
+
+
+def load_rules(path: Path = RULES_PATH) -> LineRules:
+    return LineRules(json.loads(path.read_text("utf-8")))
+
+
+def load_corrections(path: Path = CORRECTIONS_PATH) -> Replacer:
+    """The {"wrong": "right"} dictionary as one replacer (leftmost-longest match wins)."""
+    entries: list[dict[str, str]] = json.loads(path.read_text("utf-8"))["corrections"]
+    mapping: dict[str, str] = {}
+    for e in entries:
+        if e["from"] in mapping and mapping[e["from"]] != e["to"]:
+            raise SystemExit(f"{path.name}: conflicting corrections for {e['from']!r}")
+        mapping[e["from"]] = e["to"]
+    return Replacer(mapping)
+
+
+def format_corrections(replacer: Replacer) -> str:
+    if not replacer.counts:
+        return f"Corrections: none of {len(replacer.automaton)} fired"
+    fired = ", ".join(f"{k}→{replacer.mapping[k]} ×{n}" for k, n in replacer.counts.most_common())
+    return f"Corrections: {sum(replacer.counts.values())} applied ({fired})"
 
 
 def _append_item(items: list[str], text: str) -> None:
@@ -69,64 +177,57 @@ def _append_item(items: list[str], text: str) -> None:
         items.append(t)
 
 
+def extract_text(pdf_path: Path, txt_path: Path) -> None:
+    """Run pdftotext on the PDF, writing plain text to txt_path."""
+    subprocess.run(["pdftotext", str(pdf_path), str(txt_path)], check=True)
+
+
 def _extract_text_from_pdf(pdf_path: Path) -> list[str]:
     with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
         txt_path = Path(f.name)
-    subprocess.run(["pdftotext", str(pdf_path), str(txt_path)], check=True)
+    extract_text(pdf_path, txt_path)
     return txt_path.read_text("utf-8", errors="ignore").splitlines()
 
 
-def _find_headings(lines: list[str]) -> list[tuple[int, str]]:
-    heads: list[tuple[int, str]] = []
-    for i, raw in enumerate(lines):
-        s = raw.replace("\f", "").strip()
-        if not HEADING_RE.match(s):
-            continue
-        # Skip TOC lines that contain dot leaders.
-        if re.search(r"\.{5,}", s):
-            continue
-        heads.append((i, s))
-    return heads
-
-
-def _parse_section(lines: list[str]) -> dict[str, list[str]]:
-    blocks: dict[str, list[str]] = {"要点": []}
-    current = "要点"
-
-    for raw in lines:
-        s = raw.replace("\f", "").strip()
-        if _is_artifact(s):
-            continue
-
-        # Some sections embed short reading passages (e.g., “拉瓦锡实验”) without a clear label.
-        if "拉瓦锡实验" in s:
-            current = "拓展阅读"
-            blocks.setdefault(current, [])
-            continue
-
-        if s in LABEL_SET:
-            current = s
-            blocks.setdefault(current, [])
-            continue
-
-        # Heuristic: sometimes "化学方程式" is followed by operations text when equations are images.
-        if current == "化学方程式" and ("实验" in s and ("步骤" in s or "操作" in s or "依次" in s or "连接" in s)):
-            current = "实验操作"
-            blocks.setdefault(current, [])
-
-        s = re.sub(r"\s+", " ", s).strip()
+class _SectionParser:
+    """Per-section state: the current block label and the blocks so far."""
+
+    def __init__(self, rules: LineRules) -> None:
+        self.rules = rules
+        self.current = rules.default_label
+        self.blocks: dict[str, list[str]] = {self.current: []}
+
+    def _switch(self, label: str) -> None:
+        self.current = label
+        self.blocks.setdefault(label, [])
+
+    def feed(self, line: Line) -> None:
+        if line.kind == SKIP:
+            return
+        for sw in line.switches:
+            if sw.consume and sw.when in (None, self.current):
+                self._switch(sw.label)
+                return
+        if line.kind == LABEL:
+            self._switch(line.label or self.current)
+            return
+        for sw in line.switches:
+            if not sw.consume and sw.when in (None, self.current):
+                self._switch(sw.label)
+                break
+
+        s = re.sub(r"\s+", " ", line.text).strip()
         if not s:
-            continue
-
-        if s.startswith(BULLET_PREFIXES):
-            s = s.lstrip("".join(BULLET_PREFIXES)).strip()
+            return
+        if line.bullet:
+            s = self.rules.strip_bullets(s)
             if s:
-                blocks.setdefault(current, []).append(s)
-            continue
+                self.blocks.setdefault(self.current, []).append(s)
+            return
+        _append_item(self.blocks.setdefault(self.current, []), s)
 
-        _append_item(blocks.setdefault(current, []), s)
-
-    return {k: v for k, v in blocks.items() if v}
+    def result(self) -> dict[str, list[str]]:
+        return {k: v for k, v in self.blocks.items() if v}
 
 
 def generate_sections(repo_dir: Path) -> list[dict[str, object]]:
@@ -134,16 +235,29 @@ def generate_sections(repo_dir: Path) -> list[dict[str, object]]:
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-    lines = _extract_text_from_pdf(pdf_path)
-    heads = _find_headings(lines)
-    sections: list[dict[str, object]] = []
-    for idx, (start, title) in enumerate(heads):
-        end = heads[idx + 1][0] if idx + 1 < len(heads) else len(lines)
-        blocks = _parse_section(lines[start + 1 : end])
-        sections.append({"title": title, "blocks": blocks})
+    corrections = load_corrections()
+    sections = sections_from_lines(_extract_text_from_pdf(pdf_path), corrections=corrections)
+    print(format_corrections(corrections), file=sys.stderr)
     return sections
 
 
+def sections_from_lines(
+    lines: list[str], rules: LineRules | None = None, corrections: Replacer | None = None
+) -> list[dict[str, object]]:
+    """Split pdftotext output into titled sections of labelled blocks, one pass over the lines."""
+    rules = rules or load_rules()
+    correct = corrections or load_corrections()
+    sections: list[tuple[str, _SectionParser]] = []
+    for raw in lines:
+        s = correct(raw.replace("\f", "").strip())
+        line = rules.classify(s)
+        if line.kind == HEADING:
+            sections.append((s, _SectionParser(rules)))
+        elif sections:  # text before the first heading (cover, TOC) is dropped
+            sections[-1][1].feed(line)
+    return [{"title": title, "blocks": parser.result()} for title, parser in sections]
+
+
 def main() -> None:
     repo_dir = Path(__file__).resolve().parents[1]
     try:
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Local load test for the generated site.
+
+- Serves the site tree from a subprocess: tools/serve.py by default,
+  python -m http.server with --server http.server, or any running server
+  via --url
+- Runs many concurrent asyncio clients, each holding a few keep-alive
+  HTTP/1.1 connections like a browser and replaying navigation sessions:
+  index (+ assets) -> search (search index, then the catalogue shards of the
+  hits shown) -> experiment page (+ assets)
+  -> next -> next, sometimes opening the PDF extract fragment
+- A share of sessions (--warm) behave like returning visitors: assets already
+  seen are revalidated with If-None-Match / If-Modified-Since instead of
+  being downloaded again
+- Reports throughput, latency percentiles per request kind, status codes and
+  bytes per session (as transferred; --compressed asks for gzip/br bodies)
+
+--synthetic N first builds an N-experiment copy of the site in a temp
+directory (pages cloned from the real ones, full catalogue shards and search
+index) for scale tests. It needs .build/sections.json from tools/build.py or
+the PDF.
+
+  python tools/loadtest.py --clients 50 --sessions 500
+  python tools/loadtest.py --synthetic 2000 --clients 200 --duration 30
+  python tools/loadtest.py --url http://127.0.0.1:8000/ --warm 0.7
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field, replace
+import gzip
+import json
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional: --compressed only asks for gzip without it
+    brotli = None
+
+from build_site import (
+    CATALOGUE_PAGE_SIZE,
+    _exp_filename,
+    build_experiments,
+    build_pages,
+    write_experiment_pages,
+    write_index,
+)
+from notes_store import NotesStore
+
+
+SITE_PATHS = ("index.html", "assets", "experiments")
+SECTIONS_CACHE = Path(".build") / "sections.json"
+
+PERCENTILES = (50, 90, 99)
+EXTRACT_OPEN_RATE = 0.15
+SEARCH_MAX_RESULTS = 48  # MAX_RESULTS in assets/site.js
+SEARCH_QUERY_CHARS = 2
+MAX_RESPONSE_BYTES = 16 * 1024 * 1024
+
+# Attribute quotes are optional: the pages are minified (tools/minify_html.py).
+_ASSET_RE = re.compile(r'<(?:script|img)\b[^>]*\bsrc="?([^"\s>]+)|<link\b[^>]*\bhref="?([^"\s>]+\.css)')
+_NEXT_RE = re.compile(r'<a class="?secondary-button"? href="?([^"\s>]+)"?>[^<]*→</a>')
+_EXTRACT_RE = re.compile(r'class="exp-block pdf-extract" data-src="?([^"\s>]+)')
+_CATALOGUE_RE = re.compile(r'<script type="?application/json"? id="?expCatalogueMeta"?>(.*?)</script>', re.S)
+
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0-100) of an already sorted, non-empty list."""
+    pos = (len(sorted_vals) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def decoded(self) -> bytes:
+        encoding = self.headers.get("content-encoding", "identity")
+        if encoding == "gzip":
+            return gzip.decompress(self.body)
+        if encoding == "br" and brotli is not None:
+            return brotli.decompress(self.body)
+        return self.body
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=dict)  # kind -> seconds
+    statuses: dict[int, int] = field(default_factory=dict)
+    session_bytes: list[int] = field(default_factory=list)
+    session_seconds: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+    requests: int = 0
+    bytes: int = 0
+
+    def record(self, kind: str, seconds: float, resp: Response) -> None:
+        self.requests += 1
+        self.bytes += len(resp.body)
+        self.latencies.setdefault(kind, []).append(seconds)
+        self.statuses[resp.status] = self.statuses.get(resp.status, 0) + 1
+
+    def error(self, what: str) -> None:
+        self.errors[what] = self.errors.get(what, 0) + 1
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 client (GET only) on asyncio streams."""
+
+    def __init__(self, host: str, port: int, timeout: float, accept_encoding: str = "identity") -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.accept_encoding = accept_encoding
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def get(self, path: str, headers: dict[str, str] | None = None) -> Response:
+        for attempt in (0, 1):
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await asyncio.wait_for(self._exchange(path, headers or {}), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server may close an idle keep-alive connection; retry once fresh.
+                await self.close()
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    async def _exchange(self, path: str, headers: dict[str, str]) -> Response:
+        assert self._reader is not None and self._writer is not None
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Accept-Encoding: {self.accept_encoding}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self._writer.drain()
+
+        status_line = await self._reader.readuntil(b"\r\n")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+        resp_headers: dict[str, str] = {}
+        while True:
+            line = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            resp_headers[k.strip().lower()] = v.strip()
+
+        code = int(status)
+        if code in (204, 304) or 100 <= code < 200:
+            body = b""
+        elif resp_headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked()
+        elif "content-length" in resp_headers:
+            length = int(resp_headers["content-length"])
+            if length > MAX_RESPONSE_BYTES:
+                raise ConnectionError(f"response too large: {length}")
+            body = await self._reader.readexactly(length)
+        else:
+            body = await self._reader.read(MAX_RESPONSE_BYTES)
+            resp_headers["connection"] = "close"
+
+        conn = resp_headers.get("connection", "").lower()
+        if conn == "close" or (version == "HTTP/1.0" and conn != "keep-alive"):
+            await self.close()
+        return Response(code, resp_headers, body)
+
+    async def _read_chunked(self) -> bytes:
+        assert self._reader is not None
+        parts: list[bytes] = []
+        while True:
+            size = int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await self._reader.readuntil(b"\r\n")
+                return b"".join(parts)
+            parts.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+
+class Visitor:
+    """One simulated student; keeps a validator cache across its sessions when warm."""
+
+    def __init__(self, conns: list[HttpClient], base: str, stats: Stats, rng: random.Random) -> None:
+        self.pool: asyncio.Queue[HttpClient] = asyncio.Queue()
+        for c in conns:
+            self.pool.put_nowait(c)
+        self.base = base
+        self.stats = stats
+        self.rng = rng
+        self.validators: dict[str, dict[str, str]] = {}
+        self.session_bytes = 0
+
+    async def fetch(self, url: str, kind: str, warm: bool = False) -> Response | None:
+        path = urlsplit(url).path or "/"
+        headers: dict[str, str] = {}
+        cached = self.validators.get(path) if warm else None
+        if cached:
+            if "etag" in cached:
+                headers["If-None-Match"] = cached["etag"]
+            if "last-modified" in cached:
+                headers["If-Modified-Since"] = cached["last-modified"]
+        client = await self.pool.get()
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            self.stats.error(type(e).__name__)
+            await client.close()
+            return None
+        finally:
+            self.pool.put_nowait(client)
+        self.stats.record(kind, time.perf_counter() - start, resp)
+        self.session_bytes += len(resp.body)
+        if resp.status >= 400:
+            self.stats.error(f"HTTP {resp.status}")
+        if resp.status == 200:
+            v = {k: resp.headers[k] for k in ("etag", "last-modified") if k in resp.headers}
+            if v:
+                self.validators[path] = v
+        return resp
+
+    async def page(self, url: str, warm: bool) -> str:
+        resp = await self.fetch(url, "html")
+        if resp is None or resp.status != 200:
+            return ""
+        text = resp.decoded().decode("utf-8", errors="replace")
+        assets = {urljoin(url, a or b) for a, b in _ASSET_RE.findall(text)}
+        await asyncio.gather(*(self.fetch(a, "asset", warm) for a in sorted(assets)))
+        return text
+
+    async def session(self, warm: bool) -> None:
+        self.session_bytes = 0
+        start = time.perf_counter()
+        index_url = urljoin(self.base, "index.html")
+        index = await self.page(index_url, warm)
+
+        # Search like site.js: the search index, then only the shards of the hits shown.
+        meta_m = _CATALOGUE_RE.search(index)
+        hrefs: list[str] = []
+        if meta_m:
+            meta = json.loads(meta_m.group(1))
+            shard_base = urljoin(index_url, meta["base"])
+            r = await self.fetch(urljoin(shard_base, meta.get("search", "search.json")), "json", warm)
+            rows = json.loads(r.decoded())["items"] if r is not None and r.status == 200 else []
+            if rows:
+                title = self.rng.choice(rows)[0]
+                at = self.rng.randrange(max(1, len(title) - SEARCH_QUERY_CHARS + 1))
+                q = title[at : at + SEARCH_QUERY_CHARS].lower()
+                hits = [i for i, row in enumerate(rows) if q in f"{row[0]} {row[1]}".lower()][:SEARCH_MAX_RESULTS]
+                page_size = int(meta["page_size"])
+                shards = sorted({i // page_size for i in hits})
+                await asyncio.gather(
+                    *(self.fetch(urljoin(shard_base, f"page-{n:03d}.json"), "json", warm) for n in shards)
+                )
+                hrefs = [rows[i][2] for i in hits]
+        if not hrefs:
+            hrefs = ["experiments/exp-01.html"]
+
+        url = urljoin(index_url, self.rng.choice(hrefs))
+        for step in range(3):  # experiment -> next -> next
+            text = await self.page(url, warm)
+            m = _EXTRACT_RE.search(text)
+            if m and self.rng.random() < EXTRACT_OPEN_RATE:
+                await self.fetch(urljoin(url, m.group(1)), "fragment", warm)
+            nxt = _NEXT_RE.search(text)
+            if step == 2 or not nxt:
+                break
+            url = urljoin(url, nxt.group(1))
+
+        self.stats.session_bytes.append(self.session_bytes)
+        self.stats.session_seconds.append(time.perf_counter() - start)
+
+
+async def run_load(
+    base: str,
+    clients: int,
+    conns: int,
+    sessions: int,
+    duration: float,
+    warm_ratio: float,
+    timeout: float,
+    seed: int,
+    accept_encoding: str = "identity",
+) -> tuple[Stats, float]:
+    parts = urlsplit(base)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    stats = Stats()
+    remaining = sessions
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        nonlocal remaining
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        if remaining <= 0:
+            return False
+        remaining -= 1
+        return True
+
+    async def worker(n: int) -> None:
+        rng = random.Random(seed * 100_003 + n)
+        pool = [HttpClient(host, port, timeout, accept_encoding) for _ in range(max(1, conns))]
+        visitor = Visitor(pool, base, stats, rng)
+        try:
+            while take():
+                warm = bool(visitor.validators) and rng.random() < warm_ratio
+                await visitor.session(warm)
+        finally:
+            for client in pool:
+                await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    return stats, time.perf_counter() - start
+
+
+def format_report(stats: Stats, wall: float) -> str:
+    n_sessions = len(stats.session_bytes)
+    lines = [
+        f"{n_sessions} sessions, {stats.requests} requests in {wall:.2f}s: "
+        f"{stats.requests / wall:.1f} req/s, {n_sessions / wall:.2f} sessions/s, "
+        f"{stats.bytes / wall / 1024 / 1024:.2f} MiB/s",
+        "kind".ljust(10) + "count".rjust(8) + "".join(f"p{q} ms".rjust(10) for q in PERCENTILES) + "max ms".rjust(10),
+    ]
+    for kind, vals in sorted(stats.latencies.items()):
+        s = sorted(vals)
+        lines.append(
+            kind.ljust(10)
+            + str(len(s)).rjust(8)
+            + "".join(f"{_percentile(s, q) * 1000:10.1f}" for q in PERCENTILES)
+            + f"{s[-1] * 1000:10.1f}"
+        )
+    if stats.session_bytes:
+        sb = sorted(stats.session_bytes)
+        ss = sorted(stats.session_seconds)
+        lines.append(
+            f"bytes/session: mean {sum(sb) / len(sb) / 1024:.1f} KiB, p50 {_percentile(sb, 50) / 1024:.1f} KiB, "
+            f"p95 {_percentile(sb, 95) / 1024:.1f} KiB; session time p50 {_percentile(ss, 50) * 1000:.0f} ms, "
+            f"p95 {_percentile(ss, 95) * 1000:.0f} ms"
+        )
+    lines.append("status: " + ", ".join(f"{k}={v}" for k, v in sorted(stats.statuses.items())))
+    if stats.errors:
+        lines.append("errors: " + ", ".join(f"{k}={v}" for k, v in sorted(stats.errors.items())))
+    return "\n".join(lines)
+
+
+def _load_sections(repo_dir: Path) -> list[dict[str, object]]:
+    cached = repo_dir / SECTIONS_CACHE
+    if cached.exists():
+        return json.loads(cached.read_text("utf-8"))
+    from generate_experiment_data import generate_sections
+
+    try:
+        return generate_sections(repo_dir)
+    except FileNotFoundError as e:
+        raise SystemExit(f"{e} (run tools/build.py first to create {SECTIONS_CACHE})")
+
+
+def build_synthetic_site(repo_dir: Path, out_dir: Path, n: int) -> None:
+    """Copy the site into out_dir and regenerate it with n experiments cloned from the real ones."""
+    for name in SITE_PATHS:
+        src = repo_dir / name
+        if src.is_dir():
+            shutil.copytree(src, out_dir / name)
+        else:
+            shutil.copy2(src, out_dir / name)
+    for stale in (out_dir / "experiments").glob("exp-*.html"):
+        stale.unlink()
+
+    real = build_pages(_load_sections(repo_dir), NotesStore(repo_dir))
+    pages = []
+    for i in range(1, n + 1):
+        src = real[(i - 1) % len(real)]
+        copy_no = (i - 1) // len(real)
+        title = src.title if copy_no == 0 else f"{src.title}（{copy_no + 1}）"
+        pages.append(replace(src, index=i, title=title, filename=_exp_filename(i)))
+        cover = out_dir / "assets" / "covers" / f"exp-{i:02d}.svg"
+        if not cover.exists():
+            shutil.copy2(repo_dir / "assets" / "covers" / f"exp-{src.index:02d}.svg", cover)
+    exps = build_experiments(pages)
+    write_experiment_pages(out_dir, exps)
+    write_index(out_dir, exps)
+    shards = -(-n // CATALOGUE_PAGE_SIZE)
+    print(f"Synthetic site: {n} experiments, {shards} catalogue shards in {out_dir}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+SERVERS = ("serve", "http.server")
+
+
+def _start_server(root: Path, kind: str) -> tuple[subprocess.Popen[bytes], str]:
+    port = _free_port()
+    if kind == "serve":
+        argv = [sys.executable, str(Path(__file__).with_name("serve.py")), "--port", str(port), "--root", str(root)]
+    else:
+        argv = [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1", "--directory", str(root)]
+    proc = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit("static server did not start")
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Replay navigation sessions against a static server.")
+    ap.add_argument("--url", help="target an already running server instead of starting one")
+    ap.add_argument("--server", choices=SERVERS, default="serve", help="server to start when --url is not given")
+    ap.add_argument("--compressed", action="store_true", help="accept gzip (and br) bodies")
+    ap.add_argument("--clients", type=int, default=50, help="concurrent clients")
+    ap.add_argument("--conns", type=int, default=4, help="connections per client")
+    ap.add_argument("--sessions", type=int, default=500, help="total sessions (ignored with --duration)")
+    ap.add_argument("--duration", type=float, default=0.0, help="run for this many seconds")
+    ap.add_argument("--warm", type=float, default=0.5, help="share of repeat sessions that revalidate cached assets")
+    ap.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    ap.add_argument("--synthetic", type=int, default=0, help="serve a generated copy with N experiments")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    tmp: tempfile.TemporaryDirectory[str] | None = None
+    proc = None
+    try:
+        base = args.url
+        if not base:
+            root = repo_dir
+            if args.synthetic:
+                tmp = tempfile.TemporaryDirectory(prefix="chem-load-")
+                root = Path(tmp.name)
+                build_synthetic_site(repo_dir, root, args.synthetic)
+            proc, base = _start_server(root, args.server)
+        elif args.synthetic:
+            raise SystemExit("--synthetic needs the built-in server (drop --url)")
+        base = base if base.endswith("/") else base + "/"
+        print(f"Load test against {base} with {args.clients} clients")
+        stats, wall = asyncio.run(
+            run_load(base, args.clients, args.conns, args.sessions, args.duration, args.warm, args.timeout, args.seed,
+                     ("br, gzip" if brotli else "gzip") if args.compressed else "identity")
+        )
+        print(format_report(stats, wall))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
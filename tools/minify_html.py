@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+HTML minifier for the generated pages, with a DOM equivalence check.
+
+- Collapses whitespace runs in text to one space and drops whitespace that
+  only separates block-level tags (pre, textarea, script and style content
+  is kept verbatim; inline SVG keeps its tags as written)
+- Drops comments, the quotes around simple attribute values and the end
+  tags </li>, </p>, </head>, </body> and </html> where the HTML parsing
+  rules imply them
+- Optionally hoists inline style="" values repeated on a page into classes
+  named after a hash of the declarations, defined in one <style> block in
+  <head> (with !important, so they keep the precedence of an inline style).
+  Styles that set display/width/height stay inline: widgets change those
+  from JS through element.style.
+- check_equivalent() parses the original and the minified markup into trees
+  (applying the same implied end tags as a browser) and compares elements,
+  attributes and text up to insignificant whitespace; build_site.py fails
+  the build on any difference
+
+  python tools/minify_html.py FILE... [--hoist] [--write]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+import hashlib
+from html import unescape
+from html.parser import HTMLParser
+import re
+from pathlib import Path
+
+
+BLOCK_TAGS = {
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript", "template",
+    "address", "article", "aside", "blockquote", "details", "dialog", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hgroup", "hr", "li", "main", "menu", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "caption", "colgroup", "thead", "tbody", "tfoot", "tr", "td", "th", "ul",
+}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+}
+RAW_TAGS = {"script", "style", "pre", "textarea"}
+# Inside inline SVG whitespace between elements is insignificant, except
+# around the text content elements.
+SVG_TEXT_TAGS = {"svg", "text", "tspan", "textpath"}
+
+# A start tag of one of these closes an open <p> (HTML "p" end tag omission rules).
+P_CLOSERS = {
+    "address", "article", "aside", "blockquote", "details", "dialog", "div", "dl", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre", "section", "table", "ul",
+}
+# </p> may not be omitted at the end of these parents.
+P_KEEP_PARENTS = {"a", "audio", "del", "ins", "map", "noscript", "video"}
+
+# Set from JS via element.style; never hoisted out of the style attribute.
+HOIST_SKIP_PROPS = {"display", "width", "height"}
+
+_WS = re.compile(r"[ \t\n\r\f]+")  # HTML whitespace only: keeps &nbsp; and U+3000
+_UNQUOTED = re.compile(r"[^ \t\n\r\f\"'=<>`&]+")
+_STYLE_SEP = re.compile(r"\s*([:;,])\s*")
+
+
+@dataclass
+class _Token:
+    kind: str  # "start", "end", "text", "comment", "decl"
+    tag: str = ""
+    attrs: list[tuple[str, str | None]] = field(default_factory=list)
+    raw: str = ""  # text / original start tag / declaration
+    self_closing: bool = False
+    svg: bool = False  # inside (or is) an inline <svg>
+
+
+class _Tokenizer(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.tokens: list[_Token] = []
+        self._svg_depth = 0
+
+    def _text(self, raw: str) -> None:
+        if self.tokens and self.tokens[-1].kind == "text":
+            self.tokens[-1].raw += raw
+        else:
+            self.tokens.append(_Token("text", raw=raw, svg=self._svg_depth > 0))
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "svg":
+            self._svg_depth += 1
+        raw = self.get_starttag_text() or ""
+        self.tokens.append(_Token("start", tag, attrs, raw, svg=self._svg_depth > 0))
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        raw = self.get_starttag_text() or ""
+        self.tokens.append(_Token("start", tag, attrs, raw, self_closing=True, svg=self._svg_depth > 0 or tag == "svg"))
+
+    def handle_endtag(self, tag: str) -> None:
+        self.tokens.append(_Token("end", tag, svg=self._svg_depth > 0))
+        if tag == "svg" and self._svg_depth:
+            self._svg_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        self._text(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self._text(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._text(f"&#{name};")
+
+    def handle_comment(self, data: str) -> None:
+        self.tokens.append(_Token("comment", raw=data))
+
+    def handle_decl(self, decl: str) -> None:
+        self.tokens.append(_Token("decl", raw=f"<!{decl}>"))
+
+    def unknown_decl(self, data: str) -> None:
+        self.tokens.append(_Token("decl", raw=f"<![{data}]>"))
+
+
+def _tokenize(text: str) -> list[_Token]:
+    t = _Tokenizer()
+    t.feed(text)
+    t.close()
+    return t.tokens
+
+
+def _is_block(tok: _Token | None) -> bool:
+    if tok is None or tok.kind == "decl":
+        return True
+    return tok.kind in ("start", "end") and _block_tag(tok.tag, tok.svg)
+
+
+def _block_tag(tag: str, svg: bool) -> bool:
+    return tag not in SVG_TEXT_TAGS if svg else tag in BLOCK_TAGS
+
+
+def normalize_style(style: str) -> str:
+    return _STYLE_SEP.sub(r"\1", _WS.sub(" ", style).strip()).rstrip(";")
+
+
+def _style_props(style: str) -> set[str]:
+    return {d.split(":", 1)[0].strip().lower() for d in style.split(";") if ":" in d}
+
+
+def style_class(style: str) -> str:
+    return "s" + hashlib.sha256(style.encode("utf-8")).hexdigest()[:5]
+
+
+def hoisted_css(hoisted: dict[str, str]) -> str:
+    rules = []
+    for name, style in hoisted.items():
+        decls = ";".join(f"{d}!important" for d in style.split(";"))
+        rules.append(f".{name}{{{decls}}}")
+    return "".join(rules)
+
+
+def _attr(name: str, value: str | None) -> str:
+    if not value:
+        return f" {name}"
+    if _UNQUOTED.fullmatch(value):
+        return f" {name}={value}"
+    return ' {}="{}"'.format(name, value.replace("&", "&amp;").replace('"', "&quot;"))
+
+
+def _start_tag(tok: _Token) -> str:
+    if tok.svg:
+        return tok.raw  # case-sensitive names and self-closing syntax stay as written
+    parts = [f"<{tok.tag}"]
+    for name, value in tok.attrs:
+        if name == "class" and value:
+            value = _WS.sub(" ", value).strip()
+        elif name == "style" and value:
+            value = normalize_style(value)
+        parts.append(_attr(name, value))
+    return "".join(parts) + ">"
+
+
+def _hoist(tokens: list[_Token]) -> dict[str, str]:
+    """Move repeated style="" values into classes; returns {class: declarations}."""
+    uses: dict[str, list[_Token]] = {}
+    for tok in tokens:
+        if tok.kind != "start" or tok.svg:
+            continue
+        style = dict(tok.attrs).get("style")
+        if style and not (_style_props(style) & HOIST_SKIP_PROPS):
+            uses.setdefault(normalize_style(style), []).append(tok)
+
+    hoisted: dict[str, str] = {}
+    for style, toks in uses.items():
+        name = style_class(style)
+        rule = len(hoisted_css({name: style}))
+        saved = sum(len(_attr("style", s)) for s in (dict(t.attrs)["style"] for t in toks)) - len(toks) * (len(name) + 3)
+        if len(toks) < 2 or saved <= rule:
+            continue
+        if name in hoisted:
+            raise RuntimeError(f"hoisted style class collision: {name}")
+        hoisted[name] = style
+        for tok in toks:
+            attrs = [(k, v) for k, v in tok.attrs if k != "style"]
+            classes = next((v for k, v in attrs if k == "class"), None)
+            if classes is None:
+                attrs.append(("class", name))
+            else:
+                attrs = [(k, f"{v} {name}" if k == "class" else v) for k, v in attrs]
+            tok.attrs = attrs
+    return hoisted
+
+
+def _drop_end_tag(tokens: list[_Token], i: int) -> bool:
+    tok = tokens[i]
+    nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+    if tok.svg or (nxt is not None and nxt.kind in ("text", "comment")):
+        return False
+    if tok.tag == "li":
+        return nxt is None or nxt.kind == "end" or (nxt.kind == "start" and nxt.tag == "li")
+    if tok.tag == "p":
+        if nxt is None:
+            return False
+        if nxt.kind == "start":
+            return nxt.tag in P_CLOSERS
+        return nxt.kind == "end" and nxt.tag not in P_KEEP_PARENTS and "-" not in nxt.tag
+    if tok.tag == "head":
+        return nxt is not None and nxt.kind == "start"
+    if tok.tag in ("body", "html"):
+        return nxt is None or (nxt.kind == "end" and nxt.tag == "html")
+    return False
+
+
+def minify(text: str, hoist: bool = False) -> tuple[str, dict[str, str]]:
+    """Minified markup and the {class: declarations} map of hoisted styles."""
+    tokens = [t for t in _tokenize(text) if t.kind != "comment"]
+    # Comments are gone; merge the text around them.
+    merged: list[_Token] = []
+    for tok in tokens:
+        if tok.kind == "text" and merged and merged[-1].kind == "text":
+            merged[-1].raw += tok.raw
+        else:
+            merged.append(tok)
+    tokens = merged
+
+    hoisted = _hoist(tokens) if hoist else {}
+
+    # Whitespace, outside raw-text elements.
+    kept: list[_Token] = []
+    raw_depth = 0
+    for i, tok in enumerate(tokens):
+        if tok.kind == "start" and tok.tag in RAW_TAGS and not tok.self_closing:
+            raw_depth += 1
+        elif tok.kind == "end" and tok.tag in RAW_TAGS and raw_depth:
+            raw_depth -= 1
+        if tok.kind != "text" or raw_depth:
+            kept.append(tok)
+            continue
+        s = _WS.sub(" ", tok.raw)
+        if _is_block(tokens[i - 1] if i else None):
+            s = s.lstrip(" ")
+        if _is_block(tokens[i + 1] if i + 1 < len(tokens) else None):
+            s = s.rstrip(" ")
+        if s:
+            tok.raw = s
+            kept.append(tok)
+    tokens = kept
+
+    out: list[str] = []
+    for i, tok in enumerate(tokens):
+        if tok.kind == "start":
+            out.append(_start_tag(tok))
+        elif tok.kind == "end":
+            if tok.tag == "head" and hoisted:
+                out.append(f"<style>{hoisted_css(hoisted)}</style>")
+            if not _drop_end_tag(tokens, i):
+                out.append(f"</{tok.tag}>")
+        else:
+            out.append(tok.raw)
+    result = "".join(out)
+    if text.endswith("\n"):
+        result += "\n"
+    return result, hoisted
+
+
+# --- Equivalence check ---
+
+@dataclass
+class _Node:
+    tag: str
+    attrs: dict[str, str]
+    svg: bool = False
+    children: list[_Node | str] = field(default_factory=list)
+
+
+def _tree(text: str) -> _Node:
+    """Element tree with the implied end tags the minifier relies on."""
+    root = _Node("#root", {})
+    stack = [root]
+    raw_depth = 0
+    for tok in _tokenize(text):
+        top = stack[-1]
+        if tok.kind == "text":
+            value = tok.raw if raw_depth else unescape(tok.raw)
+            if top.children and isinstance(top.children[-1], str):
+                top.children[-1] += value
+            else:
+                top.children.append(value)
+        elif tok.kind == "start":
+            if top.tag == "p" and tok.tag in P_CLOSERS and not tok.svg:
+                stack.pop()
+            elif top.tag == "li" and tok.tag == "li":
+                stack.pop()
+            elif top.tag == "head" and tok.tag == "body":
+                stack.pop()
+            node = _Node(tok.tag, {k: v or "" for k, v in tok.attrs}, tok.svg)
+            stack[-1].children.append(node)
+            if not tok.self_closing and not (tok.tag in VOID_TAGS and not tok.svg):
+                stack.append(node)
+                if tok.tag in RAW_TAGS:
+                    raw_depth += 1
+        elif tok.kind == "end":
+            if tok.tag in RAW_TAGS and raw_depth:
+                raw_depth -= 1
+            if any(n.tag == tok.tag for n in stack[1:]):
+                while stack[-1].tag != tok.tag:
+                    stack.pop()
+                stack.pop()
+    return root
+
+
+def _canonical(node: _Node, hoisted: dict[str, str], raw: bool = False) -> tuple[object, ...]:
+    attrs = dict(node.attrs)
+    classes = attrs.get("class", "").split()
+    styles = [hoisted[c] for c in classes if c in hoisted]
+    if styles:
+        classes = [c for c in classes if c not in hoisted]
+        attrs["style"] = ";".join(styles)
+        if classes:
+            attrs["class"] = " ".join(classes)
+        else:
+            attrs.pop("class")
+    elif "class" in attrs:
+        attrs["class"] = " ".join(classes)
+    if "style" in attrs:
+        attrs["style"] = normalize_style(attrs["style"])
+
+    raw = raw or node.tag in RAW_TAGS
+    children: list[object] = []
+    kids = [c for c in node.children if not (isinstance(c, _Node) and c.tag == "style" and hoisted
+                                            and c.children == [hoisted_css(hoisted)])]
+    for i, child in enumerate(kids):
+        if isinstance(child, _Node):
+            children.append(_canonical(child, hoisted, raw))
+            continue
+        if raw:
+            children.append(child)
+            continue
+        s = _WS.sub(" ", child)
+        prev = kids[i - 1] if i else node
+        nxt = kids[i + 1] if i + 1 < len(kids) else node
+        if node.tag == "#root" or _block_tag(prev.tag, prev.svg):
+            s = s.lstrip(" ")
+        if node.tag == "#root" or _block_tag(nxt.tag, nxt.svg):
+            s = s.rstrip(" ")
+        if s:
+            children.append(s)
+    return (node.tag, tuple(sorted(attrs.items())), tuple(children))
+
+
+def check_equivalent(original: str, minified: str, hoisted: dict[str, str] | None = None) -> str | None:
+    """None if both parse to the same tree, else a description of the first difference."""
+    a = _canonical(_tree(original), {})
+    b = _canonical(_tree(minified), hoisted or {})
+    if a == b:
+        return None
+    return _first_difference(a, b, "")
+
+
+def _first_difference(a: object, b: object, path: str) -> str:
+    if not (isinstance(a, tuple) and isinstance(b, tuple)):
+        return f"{path or '/'}: {a!r:.80} != {b!r:.80}"
+    tag_a, attrs_a, kids_a = a
+    tag_b, attrs_b, kids_b = b
+    here = f"{path}/{tag_a}"
+    if tag_a != tag_b:
+        return f"{path or '/'}: <{tag_a}> != <{tag_b}>"
+    if attrs_a != attrs_b:
+        return f"{here}: attributes {dict(attrs_a)} != {dict(attrs_b)}"
+    for i, (x, y) in enumerate(zip(kids_a, kids_b)):
+        if x != y:
+            return _first_difference(x, y, f"{here}[{i}]")
+    return f"{here}: {len(kids_a)} children != {len(kids_b)}"
+
+
+def minify_checked(text: str, name: str, hoist: bool = False) -> str:
+    """minify(), raising if the result does not parse to the same document."""
+    out, hoisted = minify(text, hoist=hoist)
+    problem = check_equivalent(text, out, hoisted)
+    if problem:
+        raise SystemExit(f"Minified {name} differs from the original: {problem}")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Minify HTML files and verify the result is equivalent.")
+    ap.add_argument("files", nargs="+", type=Path)
+    ap.add_argument("--hoist", action="store_true", help="hoist repeated inline styles into classes")
+    ap.add_argument("--write", action="store_true", help="rewrite the files in place")
+    args = ap.parse_args()
+
+    before = after = 0
+    for path in args.files:
+        text = path.read_text("utf-8")
+        out = minify_checked(text, str(path), hoist=args.hoist)
+        before += len(text.encode("utf-8"))
+        after += len(out.encode("utf-8"))
+        if args.write and out != text:
+            path.write_text(out, "utf-8")
+    print(f"{len(args.files)} file(s): {before} -> {after} bytes ({100 * (before - after) / max(before, 1):.1f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Sharded storage for the hand-written experiment notes.
+
+Layout:
+  content/notes/index.json     {"<exp index>": "<shard file>", ...}
+  content/notes/exp-NN.json    notes dict for one experiment
+
+Only the small index is read up front; shards are parsed on first use and kept
+in a bounded LRU cache validated by (mtime, size), falling back to a content
+hash so touched-but-unchanged files are not re-parsed.
+
+Split a monolithic notes file into shards:
+  python tools/notes_store.py split [content/exp_notes.json]
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+
+NOTES_DIR = Path("content") / "notes"
+INDEX_NAME = "index.json"
+LEGACY_NOTES = Path("content") / "exp_notes.json"
+
+DEFAULT_CACHE_SIZE = 256
+
+
+def shard_filename(idx: int) -> str:
+    return f"exp-{idx:02d}.json"
+
+
+def _dump(obj: object) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2) + "\n"
+
+
+class NotesStore:
+    """Lazy, cached access to per-experiment notes shards."""
+
+    def __init__(self, repo_dir: Path, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.notes_dir = repo_dir / NOTES_DIR
+        self.cache_size = cache_size
+        # shard path -> ((mtime_ns, size), sha1 hex, parsed notes)
+        self._cache: OrderedDict[Path, tuple[tuple[int, int], str, dict[str, object]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        index_path = self.notes_dir / INDEX_NAME
+        self._legacy: dict[str, dict[str, object]] | None = None
+        if index_path.exists():
+            self.index: dict[str, str] = json.loads(index_path.read_text("utf-8"))
+        else:
+            self.index = {}
+            legacy = repo_dir / LEGACY_NOTES
+            if legacy.exists():
+                self._legacy = json.loads(legacy.read_text("utf-8"))
+
+    def ids(self) -> list[str]:
+        keys = self._legacy.keys() if self._legacy is not None else self.index.keys()
+        return sorted(keys, key=lambda k: (not k.isdigit(), int(k) if k.isdigit() else 0, k))
+
+    def source_name(self, idx: int | str) -> str:
+        """Repo-relative file that holds one experiment's notes (for messages)."""
+        if self._legacy is not None:
+            return LEGACY_NOTES.as_posix()
+        return (NOTES_DIR / self.index.get(str(idx), "?")).as_posix()
+
+    def get(self, idx: int | str) -> dict[str, object]:
+        """Return the notes for one experiment ({} when it has none)."""
+        key = str(idx)
+        if self._legacy is not None:
+            return self._legacy.get(key, {})
+        name = self.index.get(key)
+        if not name:
+            return {}
+        return self._load(self.notes_dir / name)
+
+    def _load(self, path: Path) -> dict[str, object]:
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(path)
+        if cached and cached[0] == stamp:
+            self._cache.move_to_end(path)
+            self.hits += 1
+            return cached[2]
+
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        if cached and cached[1] == digest:
+            notes = cached[2]
+            self.hits += 1
+        else:
+            notes = json.loads(data.decode("utf-8"))
+            if not isinstance(notes, dict):
+                raise ValueError(f"{path}: notes shard must be a JSON object")
+            self.misses += 1
+        self._cache[path] = (stamp, digest, notes)
+        self._cache.move_to_end(path)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return notes
+
+
+def split_notes(repo_dir: Path, source: Path) -> int:
+    """Write one shard per experiment from a monolithic notes file, plus the index."""
+    all_notes: dict[str, dict[str, object]] = json.loads(source.read_text("utf-8"))
+    notes_dir = repo_dir / NOTES_DIR
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    index: dict[str, str] = {}
+    for key, notes in all_notes.items():
+        name = shard_filename(int(key)) if key.isdigit() else f"{key}.json"
+        (notes_dir / name).write_text(_dump(notes), "utf-8")
+        index[key] = name
+    (notes_dir / INDEX_NAME).write_text(_dump(index), "utf-8")
+    return len(index)
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    args = sys.argv[1:]
+    if not args or args[0] != "split":
+        raise SystemExit("usage: notes_store.py split [notes.json]")
+    source = Path(args[1]) if len(args) > 1 else repo_dir / LEGACY_NOTES
+    if not source.exists():
+        raise SystemExit(f"Notes file not found: {source}")
+    n = split_notes(repo_dir, source)
+    print(f"Wrote {n} notes shards into {repo_dir / NOTES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Precompressed siblings and a serving manifest for the generated site.
+
+- Writes <file>.gz (and <file>.br when brotli is installed) next to every
+  compressible file that tools/serve.py can serve, when it saves space
+- Writes assets/serve-manifest.json: strong ETag (content hash), size and
+  available encodings for every served file
+
+Both are deployment artifacts (git-ignored) and are rebuilt by the
+"compress" stage of tools/build.py and for every published generation
+(tools/publish.py). A sibling newer than its file is reused as is, and files
+are replaced rather than rewritten, so siblings hardlinked from an older
+generation are never modified.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional: only .gz siblings are written without it
+    brotli = None
+
+from generate_experiment_data import PDF_NAME
+
+
+MANIFEST_PATH = Path("assets") / "serve-manifest.json"
+
+# Everything the server exposes; the rest of the repo (tools/, content/, .git)
+# is never served.
+SERVE_ROOTS = ("index.html", PDF_NAME, "assets", "experiments")
+
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml"}
+MIN_COMPRESS_BYTES = 256
+MAX_RATIO = 0.95  # keep a sibling only if it is at most this fraction of the original
+
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def served_files(repo_dir: Path) -> list[Path]:
+    files: list[Path] = []
+    for name in SERVE_ROOTS:
+        root = repo_dir / name
+        if root.is_file():
+            files.append(root)
+        elif root.is_dir():
+            files += [
+                p for p in root.rglob("*")
+                if p.is_file() and p.suffix not in (".gz", ".br") and not p.name.startswith(".")
+            ]
+    return sorted(p for p in files if p != repo_dir / MANIFEST_PATH)
+
+
+def etag_for(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:20] + '"'
+
+
+def _replace(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress(repo_dir: Path) -> dict[str, object]:
+    """Refresh sibling files and the manifest; returns the manifest."""
+    generated_ns = time.time_ns()
+    entries: dict[str, dict[str, object]] = {}
+    saved = 0
+    for path in served_files(repo_dir):
+        data = path.read_bytes()
+        mtime_ns = path.stat().st_mtime_ns
+        rel = path.relative_to(repo_dir).as_posix()
+        encodings: list[str] = []
+        for encoding, suffix in ENCODINGS.items():
+            sibling = path.with_name(path.name + suffix)
+            usable = encoding != "br" or brotli is not None
+            if usable and path.suffix in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+                try:
+                    fresh = sibling.stat().st_mtime_ns >= mtime_ns
+                except OSError:
+                    fresh = False
+                if fresh:
+                    encodings.append(encoding)
+                    continue
+                packed = _compress(data, encoding)
+                if len(packed) <= len(data) * MAX_RATIO:
+                    _replace(sibling, packed)
+                    encodings.append(encoding)
+                    saved += len(data) - len(packed)
+                    continue
+            if sibling.exists() and usable:
+                sibling.unlink()
+        entries[rel] = {"etag": etag_for(data), "size": len(data), "encodings": encodings}
+
+    # Siblings whose original is gone (e.g. a removed payload).
+    for name in SERVE_ROOTS:
+        root = repo_dir / name
+        if root.is_dir():
+            for sibling in [*root.rglob("*.gz"), *root.rglob("*.br")]:
+                if not sibling.with_suffix("").exists():
+                    sibling.unlink()
+
+    manifest = {"generated_ns": generated_ns, "files": entries}
+    _replace(repo_dir / MANIFEST_PATH, (json.dumps(manifest, ensure_ascii=False, indent=1) + "\n").encode("utf-8"))
+    print(f"Precompressed {sum(bool(e['encodings']) for e in entries.values())} of {len(entries)} files "
+          f"({saved / 1024:.0f} KiB saved by newly compressed siblings)")
+    return manifest
+
+
+def main() -> None:
+    precompress(Path(__file__).resolve().parents[1])
+
+
+if __name__ == "__main__":
+    main()
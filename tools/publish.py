@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Atomic, generation-based publishing of the built site.
+
+- Copies the served tree (index.html, the PDF, assets/, experiments/; see
+  tools/precompress.py) into a new generation under
+  .build/site/generations/<id>/, hardlinking every file whose content matches
+  the current generation (with its .gz/.br siblings) instead of writing it
+  again, so I/O is proportional to what changed
+- Minifies all of index.html in the generation (the working-tree copy keeps
+  its hand-edited layout) and writes the serving manifest and compressed
+  siblings of new files
+- Switches .build/site/current to the new generation with one atomic symlink
+  replace; tools/serve.py follows the link, so readers never see a half
+  written or mismatched tree
+- Keeps the newest --keep generations for instant rollback
+
+Generations are never modified once published (shared inodes would change
+every generation at once). $CHEM_SITE_DIR or --out moves the whole layout,
+e.g. onto the web server's disk; it must be on one filesystem for hardlinks.
+
+  python tools/publish.py [--out DIR] [--keep N]
+  python tools/publish.py --list | --rollback [ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from minify_html import minify_checked
+from precompress import ENCODINGS, precompress, served_files
+
+
+SITE_ENV = "CHEM_SITE_DIR"
+CURRENT_NAME = "current"
+GENERATIONS_DIR = "generations"
+RECORD_NAME = ".publish.json"  # dotfiles are never served
+DEFAULT_KEEP = 5
+STALE_STAGE_SECONDS = 3600  # staging dirs left behind by an interrupted publish
+
+
+@dataclass(frozen=True)
+class PublishResult:
+    generation: str
+    linked: int = 0
+    written: int = 0
+    bytes_written: int = 0
+    unchanged: bool = False
+
+
+def site_dir(repo_dir: Path) -> Path:
+    env = os.environ.get(SITE_ENV)
+    return Path(env).expanduser() if env else repo_dir / ".build" / "site"
+
+
+def list_generations(out: Path) -> list[str]:
+    """Published generation ids, oldest first (ids start with a UTC timestamp)."""
+    root = out / GENERATIONS_DIR
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def current_generation(out: Path) -> str | None:
+    try:
+        return Path(os.readlink(out / CURRENT_NAME)).name
+    except OSError:
+        return None
+
+
+def _record(gen_dir: Path) -> dict[str, object]:
+    try:
+        return json.loads((gen_dir / RECORD_NAME).read_text("utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _site_files(repo_dir: Path) -> dict[str, bytes]:
+    files = {p.relative_to(repo_dir).as_posix(): p.read_bytes() for p in served_files(repo_dir)}
+    if "index.html" in files:
+        index = minify_checked(files["index.html"].decode("utf-8"), "index.html", hoist=True)
+        files["index.html"] = index.encode("utf-8")
+    return files
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:  # e.g. another filesystem: fall back to a copy
+        shutil.copy2(src, dst)
+
+
+def switch(out: Path, generation: str) -> None:
+    """Point out/current at a generation with a single atomic rename."""
+    if not (out / GENERATIONS_DIR / generation).is_dir():
+        raise SystemExit(f"No such generation: {generation}")
+    tmp = out / f".{CURRENT_NAME}-{os.getpid()}"
+    tmp.unlink(missing_ok=True)
+    os.symlink(Path(GENERATIONS_DIR) / generation, tmp)
+    os.replace(tmp, out / CURRENT_NAME)
+
+
+def prune(out: Path, keep: int) -> list[str]:
+    """Delete all but the newest `keep` generations (never the current one) and stale staging dirs."""
+    current = current_generation(out)
+    gens = list_generations(out)
+    doomed = [g for g in gens[: max(len(gens) - keep, 0)] if g != current]
+    root = out / GENERATIONS_DIR
+    for g in doomed:
+        shutil.rmtree(root / g)
+    for stale in root.glob(".stage-*"):
+        if time.time() - stale.stat().st_mtime > STALE_STAGE_SECONDS:
+            shutil.rmtree(stale, ignore_errors=True)
+    return doomed
+
+
+def publish(repo_dir: Path, out: Path, keep: int = DEFAULT_KEEP) -> PublishResult:
+    """Stage the working tree as a new generation and switch the live site to it."""
+    files = _site_files(repo_dir)
+    digests = {rel: hashlib.sha256(data).hexdigest() for rel, data in files.items()}
+
+    current = current_generation(out)
+    prev_dir = out / GENERATIONS_DIR / current if current else None
+    prev: dict[str, str] = _record(prev_dir).get("files", {}) if prev_dir else {}  # type: ignore[assignment]
+    if current and prev == digests:
+        print(f"Publish: unchanged, {out / CURRENT_NAME} -> {current}")
+        return PublishResult(current, unchanged=True)
+
+    tree = hashlib.sha256(json.dumps(digests, sort_keys=True).encode("utf-8")).hexdigest()
+    generation = time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + "-" + tree[:8]
+    gen_dir = out / GENERATIONS_DIR / generation
+    if gen_dir.is_dir():  # same tree published within the same second
+        switch(out, generation)
+        return PublishResult(generation, unchanged=True)
+
+    stage = out / GENERATIONS_DIR / f".stage-{generation}-{os.getpid()}"
+    stage.mkdir(parents=True)
+    linked = written = bytes_written = 0
+    for rel, data in files.items():
+        dst = stage / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if prev_dir is not None and prev.get(rel) == digests[rel]:
+            _link_or_copy(prev_dir / rel, dst)
+            for suffix in ENCODINGS.values():
+                sibling = prev_dir / (rel + suffix)
+                if sibling.is_file():
+                    _link_or_copy(sibling, stage / (rel + suffix))
+            linked += 1
+        else:
+            dst.write_bytes(data)
+            written += 1
+            bytes_written += len(data)
+    precompress(stage)
+    record = {"generation": generation, "parent": current, "created": time.time(), "files": digests}
+    (stage / RECORD_NAME).write_text(json.dumps(record, ensure_ascii=False, indent=1) + "\n", "utf-8")
+
+    stage.rename(gen_dir)
+    switch(out, generation)
+    removed = prune(out, keep)
+    print(
+        f"Published {generation}: {written} file(s) written ({bytes_written / 1024:.1f} KiB), "
+        f"{linked} hardlinked, {len(removed)} old generation(s) removed"
+    )
+    return PublishResult(generation, linked, written, bytes_written)
+
+
+def rollback(out: Path, generation: str | None = None) -> str:
+    """Switch to the given generation, or to the one published before the current one."""
+    gens = list_generations(out)
+    current = current_generation(out)
+    if generation is None:
+        older = [g for g in gens if current is None or g < current]
+        if not older:
+            raise SystemExit("No older generation to roll back to")
+        generation = older[-1]
+    switch(out, generation)
+    print(f"Rolled back: {out / CURRENT_NAME} -> {generation} (was {current})")
+    return generation
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Publish the built site as an atomically switched generation.")
+    ap.add_argument("--out", type=Path, default=site_dir(repo_dir), help=f"site directory (default: ${SITE_ENV} or .build/site)")
+    ap.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="generations to retain for rollback")
+    ap.add_argument("--list", action="store_true", help="list generations")
+    ap.add_argument("--rollback", nargs="?", const="", metavar="ID", help="switch back to ID (default: the previous one)")
+    args = ap.parse_args()
+
+    if args.list:
+        current = current_generation(args.out)
+        for g in list_generations(args.out):
+            parent = _record(args.out / GENERATIONS_DIR / g).get("parent")
+            print(f"{'*' if g == current else ' '} {g}  (parent {parent})")
+        return
+    if args.rollback is not None:
+        rollback(args.out, args.rollback or None)
+        return
+    publish(repo_dir, args.out, keep=max(args.keep, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local collector for the real-user monitoring beacons sent by assets/rum.js.
+
+- Accepts POST /rum with a JSON array of page-view records (text/plain body);
+  a view reports in several records (seq 0, 1, ...), each carrying the
+  metrics that changed and the interactions since the previous one, so a
+  view's metric sample is its latest value
+- Appends every accepted record to <data-dir>/beacons.jsonl
+- Writes per-page percentiles (p50/p75/p95) and interaction totals to
+  <data-dir>/rollup.json
+
+Run a collector:       python tools/rum_collector.py --port 8787
+Point pages at it:     python tools/build.py --rum-endpoint http://127.0.0.1:8787/rum
+Re-roll from the log:  python tools/rum_collector.py --rollup-only
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import threading
+import time
+from pathlib import Path
+
+
+METRICS = ("ttfb", "fcp", "lcp", "dcl", "load", "cls", "inp", "transfer")
+PERCENTILES = (50, 75, 95)
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_RECORDS_PER_BEACON = 50
+MAX_PAGE_LEN = 200
+MAX_VIEWS_PER_PAGE = 10_000  # newest views whose metrics are kept for percentiles
+MAX_VIEW_ID_LEN = 40
+
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted, non-empty list."""
+    if len(sorted_vals) == 1:
+        return sorted_vals[0]
+    pos = (len(sorted_vals) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+
+
+def _clean_record(rec: object) -> dict[str, object] | None:
+    """Validate one beacon record, keeping only known numeric fields."""
+    if not isinstance(rec, dict):
+        return None
+    page = rec.get("page")
+    if not isinstance(page, str) or not page.startswith("/"):
+        return None
+    metrics: dict[str, float] = {}
+    raw_metrics = rec.get("metrics")
+    if isinstance(raw_metrics, dict):
+        for k in METRICS:
+            v = raw_metrics.get(k)
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v) and v >= 0:
+                metrics[k] = v
+    interactions: dict[str, int] = {}
+    raw_inter = rec.get("interactions")
+    if isinstance(raw_inter, dict):
+        for k, v in raw_inter.items():
+            if isinstance(k, str) and len(k) <= 40 and isinstance(v, int) and not isinstance(v, bool) and v > 0:
+                interactions[k] = v
+    clean: dict[str, object] = {"page": page[:MAX_PAGE_LEN], "metrics": metrics, "interactions": interactions}
+    view, seq = rec.get("view"), rec.get("seq")
+    if isinstance(view, str) and 0 < len(view) <= MAX_VIEW_ID_LEN:
+        clean["view"] = view
+        clean["seq"] = seq if isinstance(seq, int) and not isinstance(seq, bool) and seq >= 0 else 0
+    return clean
+
+
+@dataclass
+class PageStats:
+    views: int = 0
+    # view id -> that view's latest metric values (records without an id are views of their own)
+    latest: OrderedDict[str, dict[str, float]] = field(default_factory=OrderedDict)
+    interactions: dict[str, int] = field(default_factory=dict)
+
+    def add(self, rec: dict[str, object]) -> None:
+        view = rec.get("view")
+        if view is None or rec.get("seq") == 0:
+            self.views += 1
+        key = str(view) if view is not None else f"#{self.views}"
+        values = self.latest.get(key)
+        if values is None:
+            values = self.latest[key] = {}
+            if len(self.latest) > MAX_VIEWS_PER_PAGE:
+                self.latest.popitem(last=False)
+        else:
+            self.latest.move_to_end(key)
+        for k, v in rec["metrics"].items():  # type: ignore[union-attr]
+            values[k] = float(v)
+        for k, n in rec["interactions"].items():  # type: ignore[union-attr]
+            self.interactions[k] = self.interactions.get(k, 0) + n
+
+    def rollup(self) -> dict[str, object]:
+        metrics: dict[str, dict[str, float]] = {}
+        for k in METRICS:
+            vals = sorted(v[k] for v in self.latest.values() if k in v)
+            if not vals:
+                continue
+            metrics[k] = {"n": len(vals)}
+            for q in PERCENTILES:
+                metrics[k][f"p{q}"] = round(_percentile(vals, q), 3)
+        return {"views": self.views, "metrics": metrics, "interactions": dict(sorted(self.interactions.items()))}
+
+
+class RumStore:
+    """In-memory per-page aggregates backed by an append-only JSONL log."""
+
+    def __init__(self, data_dir: Path) -> None:
+        self.data_dir = data_dir
+        self.log_path = data_dir / "beacons.jsonl"
+        self.rollup_path = data_dir / "rollup.json"
+        self.pages: dict[str, PageStats] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load_log(self) -> int:
+        if not self.log_path.exists():
+            return 0
+        n = 0
+        with self.log_path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = _clean_record(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                if rec:
+                    self.pages.setdefault(str(rec["page"]), PageStats()).add(rec)
+                    n += 1
+        self._dirty = n > 0
+        return n
+
+    def ingest(self, payload: object) -> int:
+        records = payload if isinstance(payload, list) else [payload]
+        accepted = [r for r in map(_clean_record, records[:MAX_RECORDS_PER_BEACON]) if r]
+        if not accepted:
+            return 0
+        now = int(time.time())
+        with self._lock:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            with self.log_path.open("a", encoding="utf-8") as f:
+                for rec in accepted:
+                    f.write(json.dumps({**rec, "received": now}, ensure_ascii=False) + "\n")
+                    self.pages.setdefault(str(rec["page"]), PageStats()).add(rec)
+            self._dirty = True
+        return len(accepted)
+
+    def write_rollup(self, force: bool = False) -> bool:
+        with self._lock:
+            if not (self._dirty or force):
+                return False
+            data = {
+                "generated": int(time.time()),
+                "pages": {page: st.rollup() for page, st in sorted(self.pages.items())},
+            }
+            self._dirty = False
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.rollup_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", "utf-8")
+        tmp.replace(self.rollup_path)
+        return True
+
+
+def _make_handler(store: RumStore, path: str) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        timeout = 10  # seconds; a client that stalls mid-body is dropped
+
+        def _reply(self, code: int) -> None:
+            self.send_response(code)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_OPTIONS(self) -> None:  # noqa: N802 (http.server naming)
+            self._reply(204)
+
+        def do_POST(self) -> None:  # noqa: N802
+            if self.path.split("?", 1)[0] != path:
+                self._reply(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", ""))
+            except ValueError:
+                length = -1
+            if length <= 0 or length > MAX_BODY_BYTES:
+                # Missing, malformed or negative lengths are refused before any
+                # read; oversized bodies are never read either (the connection
+                # closes after the reply).
+                self._reply(413 if length > MAX_BODY_BYTES else 400)
+                return
+            body = self.rfile.read(length)
+            if len(body) != length:
+                self._reply(400)
+                return
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                self._reply(400)
+                return
+            self._reply(204 if store.ingest(payload) else 400)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Collect RUM beacons and roll up per-page percentiles.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--path", default="/rum", help="beacon endpoint path (matches data-endpoint)")
+    ap.add_argument("--data-dir", type=Path, default=repo_dir / "rum-data")
+    ap.add_argument("--rollup-interval", type=float, default=10.0, help="seconds between rollup writes")
+    ap.add_argument("--rollup-only", action="store_true", help="rebuild rollup.json from the log and exit")
+    args = ap.parse_args()
+
+    store = RumStore(args.data_dir)
+    n = store.load_log()
+    if args.rollup_only:
+        store.write_rollup(force=True)
+        print(f"Rolled up {n} beacon records into {store.rollup_path}")
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(store, args.path))
+    stop = threading.Event()
+
+    def roll() -> None:
+        while not stop.wait(args.rollup_interval):
+            store.write_rollup()
+
+    threading.Thread(target=roll, daemon=True).start()
+    print(f"RUM collector on http://{args.host}:{args.port}{args.path} (data: {args.data_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        store.write_rollup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Static server for the generated site (asyncio, HTTP/1.1 keep-alive).
+
+- Serves only the site roots (index.html, the PDF, assets/, experiments/)
+- Content negotiation onto precompressed .br/.gz siblings (tools/precompress.py),
+  with Vary: Accept-Encoding
+- Strong ETags from assets/serve-manifest.json (files changed since the
+  manifest was written are re-hashed), If-None-Match -> 304
+- Single byte-range requests (206/416, If-Range) for the PDF and other files
+- Large files go out with loop.sendfile (zero-copy where the OS allows it);
+  small hot files (index.html, site.css, covers, ...) are kept in an
+  in-memory LRU validated by (mtime, size)
+- Serves the published generation (.build/site/current, see tools/publish.py)
+  when there is one, else the working tree; a switched "current" link is
+  picked up within a second, while responses already started finish from
+  the old generation
+- --workers N runs N processes sharing the port (SO_REUSEPORT); uvloop is used
+  when installed
+
+  python tools/serve.py [--host 127.0.0.1] [--port 8000] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate
+import json
+import mimetypes
+import os
+from pathlib import Path
+import stat
+import subprocess
+import sys
+import time
+from urllib.parse import unquote, urlsplit
+
+try:
+    import uvloop  # type: ignore[import-not-found]
+except ImportError:  # optional: the default event loop is used without it
+    uvloop = None
+
+from precompress import ENCODINGS, MANIFEST_PATH, SERVE_ROOTS, etag_for
+from publish import CURRENT_NAME, site_dir
+
+
+SERVER_NAME = "chem-serve"
+MAX_HEADER_BYTES = 16 * 1024
+KEEPALIVE_TIMEOUT = 15.0
+SENDFILE_MIN_BYTES = 64 * 1024  # smaller files are written from memory
+LRU_MAX_FILE_BYTES = 256 * 1024
+LRU_MAX_TOTAL_BYTES = 32 * 1024 * 1024
+ROOT_CHECK_INTERVAL = 1.0  # seconds between checks of where --root points
+
+NO_CACHE_SUFFIXES = {".html", ".json"}  # revalidate every time; the rest briefly cacheable
+ASSET_MAX_AGE = 600
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("image/svg+xml", ".svg")
+mimetypes.add_type("font/woff2", ".woff2")
+
+REASONS = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+    431: "Request Header Fields Too Large",
+}
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    path: Path
+    etag: str
+    size: int
+    encodings: tuple[str, ...]
+    content_type: str
+    mtime_ns: int  # the file is known to match etag up to this mtime
+
+
+class FileTable:
+    """Maps URL paths to served files, with ETags from the serving manifest."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        self._files: dict[str, FileInfo] = {}
+        manifest_path = self.root / MANIFEST_PATH
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text("utf-8"))
+            generated_ns = int(manifest.get("generated_ns", 0))
+            for rel, e in manifest.get("files", {}).items():
+                self._files[rel] = FileInfo(
+                    self.root / rel,
+                    e["etag"],
+                    int(e["size"]),
+                    tuple(e.get("encodings") or ()),
+                    _content_type(rel),
+                    generated_ns,
+                )
+        self._roots = {r.split("/", 1)[0] for r in SERVE_ROOTS}
+
+    def lookup(self, url_path: str) -> FileInfo | None:
+        rel = unquote(url_path).lstrip("/")
+        if rel == "" or rel.endswith("/"):
+            rel += "index.html"
+        parts = rel.split("/")
+        if any(p in ("", ".", "..") or p.startswith(".") for p in parts) or parts[0] not in self._roots:
+            return None
+        if rel.endswith((".gz", ".br")):
+            return None
+        info = self._files.get(rel)
+        path = self.root / rel
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if info is None or st.st_size != info.size or st.st_mtime_ns > info.mtime_ns:
+            # Not in the manifest or changed since it was written: hash it here
+            # and only use siblings at least as new as the file.
+            encodings = tuple(
+                e for e, sfx in ENCODINGS.items() if _mtime_ns(path.with_name(path.name + sfx)) >= st.st_mtime_ns
+            )
+            info = FileInfo(path, etag_for(path.read_bytes()), st.st_size, encodings, _content_type(rel), st.st_mtime_ns)
+            self._files[rel] = info
+        return info
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _content_type(rel: str) -> str:
+    ctype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/javascript", "application/json", "image/svg+xml"):
+        ctype += "; charset=utf-8"
+    return ctype
+
+
+class BodyCache:
+    """LRU of small file bodies keyed by path, validated by (mtime_ns, size)."""
+
+    def __init__(self, max_total: int = LRU_MAX_TOTAL_BYTES, max_file: int = LRU_MAX_FILE_BYTES) -> None:
+        self.max_total = max_total
+        self.max_file = max_file
+        self.total = 0
+        self._items: OrderedDict[Path, tuple[tuple[int, int], bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, st: os.stat_result) -> bytes:
+        stamp = (st.st_mtime_ns, st.st_size)
+        item = self._items.get(path)
+        if item and item[0] == stamp:
+            self._items.move_to_end(path)
+            self.hits += 1
+            return item[1]
+        self.misses += 1
+        data = path.read_bytes()
+        if item:
+            self.total -= len(item[1])
+            del self._items[path]
+        if len(data) <= self.max_file:
+            self._items[path] = (stamp, data)
+            self.total += len(data)
+            while self.total > self.max_total:
+                _, (_, old) = self._items.popitem(last=False)
+                self.total -= len(old)
+        return data
+
+
+def _accepts(header: str) -> dict[str, float]:
+    prefs: dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            prefs[token.strip().lower()] = q
+    return prefs
+
+
+def choose_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    prefs = _accepts(accept_encoding)
+    best, best_q = None, 0.0
+    for enc in ENCODINGS:  # server preference order: br, then gzip
+        if enc not in available:
+            continue
+        q = prefs.get(enc, prefs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in header.split(","))
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """(start, end) inclusive; None to ignore the header; False if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # multipart ranges are answered with the full body
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            n = int(last)
+            if n <= 0:
+                return False
+            return max(0, size - n), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+class Server:
+    def __init__(self, root: Path, access_log: bool = False) -> None:
+        self.root = root
+        self._target = os.path.realpath(root)
+        self._checked = time.monotonic()
+        self.files = FileTable(Path(self._target))
+        self.cache = BodyCache()
+        self.access_log = access_log
+        self.requests = 0
+
+    def _table(self) -> FileTable:
+        """The file table for where root points now (it may be a switched symlink)."""
+        now = time.monotonic()
+        if now - self._checked >= ROOT_CHECK_INTERVAL:
+            self._checked = now
+            target = os.path.realpath(self.root)
+            if target != self._target:
+                self._target = target
+                self.files = FileTable(Path(target))
+                self.cache = BodyCache()
+        return self.files
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._simple(writer, 431, close=True)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                keep_alive = await self._respond(head, writer)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _simple(self, writer: asyncio.StreamWriter, status: int, close: bool = False, head_only: bool = False) -> None:
+        body = f"{status} {REASONS[status]}\n".encode("ascii")
+        headers = {"Content-Type": "text/plain; charset=utf-8", "Content-Length": str(len(body))}
+        if status == 405:
+            headers["Allow"] = "GET, HEAD"
+        if close:
+            headers["Connection"] = "close"
+        writer.write(self._head(status, headers) + (b"" if head_only else body))
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, headers: dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Server: {SERVER_NAME}", f"Date: {formatdate(usegmt=True)}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _respond(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        self.requests += 1
+        try:
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            await self._simple(writer, 400, close=True)
+            return False
+        req: dict[str, str] = {}
+        for line in header_lines:
+            k, _, v = line.partition(":")
+            req[k.strip().lower()] = v.strip()
+
+        conn = req.get("connection", "").lower()
+        keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+        if method not in ("GET", "HEAD"):
+            await self._simple(writer, 405, close=True)
+            return False
+        head_only = method == "HEAD"
+
+        info = self._table().lookup(urlsplit(target).path)
+        if info is None:
+            await self._simple(writer, 404, head_only=head_only)
+            self._log(method, target, 404)
+            return keep_alive
+
+        encoding = choose_encoding(req.get("accept-encoding", ""), info.encodings)
+        etag = info.etag if encoding is None else info.etag[:-1] + "-" + ENCODINGS[encoding][1:] + '"'
+        suffix = Path(info.path.name).suffix
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache" if suffix in NO_CACHE_SUFFIXES else f"public, max-age={ASSET_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        if not keep_alive:
+            headers["Connection"] = "close"
+
+        inm = req.get("if-none-match")
+        if inm is not None and _etag_matches(inm, etag):
+            writer.write(self._head(304, headers))
+            await writer.drain()
+            self._log(method, target, 304)
+            return keep_alive
+
+        path = info.path if encoding is None else info.path.with_name(info.path.name + ENCODINGS[encoding])
+        try:
+            st = path.stat()
+        except OSError:
+            await self._simple(writer, 404, head_only=head_only)
+            return keep_alive
+        size = st.st_size
+        status, start, end = 200, 0, size - 1
+
+        headers["Content-Type"] = info.content_type
+        if encoding is None:
+            headers["Accept-Ranges"] = "bytes"
+            rng = req.get("range")
+            if_range = req.get("if-range")
+            if rng and (if_range is None or if_range == etag):
+                parsed = parse_range(rng, size)
+                if parsed is False:
+                    headers = {"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+                    writer.write(self._head(416, headers))
+                    await writer.drain()
+                    self._log(method, target, 416)
+                    return keep_alive
+                if parsed:
+                    status, (start, end) = 206, parsed
+                    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            headers["Content-Encoding"] = encoding
+        length = end - start + 1 if size else 0
+        headers["Content-Length"] = str(length)
+
+        writer.write(self._head(status, headers))
+        if not head_only and length:
+            if size < SENDFILE_MIN_BYTES:
+                data = self.cache.get(path, st)
+                writer.write(data[start : end + 1])
+            else:
+                await writer.drain()
+                with path.open("rb") as f:
+                    await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+        await writer.drain()
+        self._log(method, target, status)
+        return keep_alive
+
+    def _log(self, method: str, target: str, status: int) -> None:
+        if self.access_log:
+            print(f"{method} {target} {status}", file=sys.stderr)
+
+
+async def serve(root: Path, host: str, port: int, reuse_port: bool = False, access_log: bool = False) -> None:
+    server = Server(root, access_log=access_log)
+    srv = await asyncio.start_server(
+        server.handle, host, port, limit=MAX_HEADER_BYTES, reuse_port=reuse_port or None, backlog=1024
+    )
+    async with srv:
+        await srv.serve_forever()
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Serve the generated site.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--root", type=Path, help="site tree to serve (default: the published site, else the repo)")
+    ap.add_argument("--workers", type=int, default=1, help="processes sharing the port (SO_REUSEPORT)")
+    ap.add_argument("--access-log", action="store_true")
+    args = ap.parse_args()
+    if args.root is None:
+        current = site_dir(repo_dir) / CURRENT_NAME
+        args.root = current if current.exists() else repo_dir
+
+    if args.workers != 0 and not (args.root / MANIFEST_PATH).exists():
+        print(f"No {MANIFEST_PATH} (run tools/precompress.py); ETags are computed on first request")
+
+    # --workers 0 marks a child process started below.
+    children: list[subprocess.Popen[bytes]] = []
+    if args.workers > 1:
+        argv = [sys.executable, __file__, "--host", args.host, "--port", str(args.port), "--root", str(args.root)]
+        children = [subprocess.Popen(argv + ["--workers", "0"]) for _ in range(args.workers - 1)]
+    if args.workers != 0:
+        print(f"Serving {args.root} on http://{args.host}:{args.port}/ ({args.workers} worker(s))")
+    try:
+        runner = uvloop.run if uvloop is not None else asyncio.run
+        runner(serve(args.root, args.host, args.port, reuse_port=args.workers != 1, access_log=args.access_log))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            child.terminate()
+
+
+if __name__ == "__main__":
+    main()
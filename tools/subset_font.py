@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Build-time subsetted web font for the site's Chinese text.
+
+- Collect every character used by the generated pages (index.html,
+  experiments/, extract fragments, catalogue shards), the notes shards and
+  the UI strings in assets/*.js
+- Split the set into fixed Unicode buckets (Latin, symbols, CJK punctuation,
+  one bucket per 1024 CJK ideograph code points) so that a new character only
+  changes the bucket it falls in
+- Subset the source font per bucket into assets/fonts/chem-sans-<bucket>-<hash>.woff2
+  and write the matching @font-face rules (exact unicode-range, font-display:
+  swap) between the FONT_FACE markers in assets/site.css
+
+A bucket is re-subset only when its characters or the source font change;
+assets/fonts/glyphs.json records what each file was built from.
+
+The source font is not committed (a full CJK font is several MB): pass
+--source, set $CHEM_FONT_SOURCE, or place it at content/fonts/source.otf.
+fontTools (and brotli, for WOFF2) are optional: without them, or without a
+source font, the step reports what it would do and leaves assets untouched.
+
+  python tools/subset_font.py [--source FONT] [--check]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import html
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+    from fontTools import subset as ft_subset  # type: ignore[import-not-found]
+    from fontTools.ttLib import TTFont  # type: ignore[import-not-found]
+except ImportError:  # optional: the step is skipped without it
+    ft_subset = None
+    TTFont = None
+
+try:
+    import brotli  # type: ignore[import-not-found]  # noqa: F401  (needed by fontTools for WOFF2)
+except ImportError:
+    brotli = None
+
+
+FAMILY = "Chem Sans"
+FILE_PREFIX = "chem-sans"
+FONTS_DIR = Path("assets") / "fonts"
+STATE_NAME = "glyphs.json"
+CSS_PATH = Path("assets") / "site.css"
+SOURCE_ENV = "CHEM_FONT_SOURCE"
+DEFAULT_SOURCE = Path("content") / "fonts" / "source.otf"
+
+CSS_START = "/* FONT_FACE_START (generated by tools/subset_font.py) */"
+CSS_END = "/* FONT_FACE_END */"
+
+TEXT_GLOBS = (
+    "index.html",
+    "experiments/*.html",
+    "experiments/extracts/*.html",
+    "assets/catalogue/*.json",
+    "content/notes/*.json",
+    "assets/*.js",
+    "assets/widgets/*.js",
+)
+
+CJK_START, CJK_END, CJK_STEP = 0x4E00, 0x9FFF, 0x400
+
+# (name, first code point, last code point); CJK ideographs get one bucket per CJK_STEP.
+FIXED_BUCKETS: list[tuple[str, int, int]] = [
+    ("latin", 0x0020, 0x02FF),
+    ("symbols", 0x2000, 0x2BFF),
+    ("cjk-punct", 0x3000, 0x303F),
+    ("fullwidth", 0xFF00, 0xFFEF),
+]
+
+
+@dataclass(frozen=True)
+class Bucket:
+    name: str
+    chars: str  # sorted, unique
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.chars.encode("utf-8")).hexdigest()[:10]
+
+    def filename(self, source_digest: str) -> str:
+        h = hashlib.sha256(f"{source_digest}\0{self.chars}".encode("utf-8")).hexdigest()[:10]
+        return f"{FILE_PREFIX}-{self.name}-{h}.woff2"
+
+
+def _bucket_name(cp: int) -> str:
+    if CJK_START <= cp <= CJK_END:
+        return f"cjk-{(cp - CJK_START) // CJK_STEP:02d}"
+    for name, lo, hi in FIXED_BUCKETS:
+        if lo <= cp <= hi:
+            return name
+    return "other"
+
+
+def _json_strings(obj: object) -> list[str]:
+    if isinstance(obj, str):
+        return [obj]
+    if isinstance(obj, dict):
+        return [s for k, v in obj.items() for s in _json_strings(k) + _json_strings(v)]
+    if isinstance(obj, list):
+        return [s for v in obj for s in _json_strings(v)]
+    return []
+
+
+def collect_chars(repo_dir: Path) -> set[str]:
+    """Every printable character that can appear in the rendered site."""
+    chars: set[str] = set()
+    for pattern in TEXT_GLOBS:
+        for path in sorted(repo_dir.glob(pattern)):
+            text = path.read_text("utf-8", errors="ignore")
+            if path.suffix == ".json":
+                text = "".join(html.unescape(s) for s in _json_strings(json.loads(text)))
+            elif path.suffix == ".html":
+                text = html.unescape(text)
+            chars.update(text)
+    return {c for c in chars if c == " " or (c.isprintable() and not c.isspace())}
+
+
+def bucketize(chars: set[str]) -> list[Bucket]:
+    grouped: dict[str, list[str]] = {}
+    for c in chars:
+        grouped.setdefault(_bucket_name(ord(c)), []).append(c)
+    return [Bucket(name, "".join(sorted(cs))) for name, cs in sorted(grouped.items())]
+
+
+def unicode_range(chars: str) -> str:
+    """Compact CSS unicode-range for a sorted character string."""
+    cps = [ord(c) for c in chars]
+    runs: list[tuple[int, int]] = []
+    for cp in cps:
+        if runs and cp == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], cp)
+        else:
+            runs.append((cp, cp))
+    return ", ".join(f"U+{a:X}" if a == b else f"U+{a:X}-{b:X}" for a, b in runs)
+
+
+def render_font_faces(entries: list[dict[str, str]]) -> str:
+    rules = []
+    for e in entries:
+        rules.append(
+            "@font-face {\n"
+            f"  font-family: '{FAMILY}';\n"
+            f"  src: url('fonts/{e['file']}') format('woff2');\n"
+            "  font-display: swap;\n"
+            f"  unicode-range: {e['range']};\n"
+            "}"
+        )
+    return "\n".join(rules)
+
+
+def update_css(css: str, faces: str) -> str:
+    if CSS_START not in css or CSS_END not in css:
+        raise RuntimeError("site.css missing FONT_FACE markers")
+    block = f"{CSS_START}\n{faces}\n{CSS_END}" if faces else f"{CSS_START}\n{CSS_END}"
+    return re.sub(re.escape(CSS_START) + r".*?" + re.escape(CSS_END), lambda _: block, css, count=1, flags=re.S)
+
+
+def _subset(source: Path, chars: str, out_path: Path) -> None:
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = TTFont(str(source), lazy=True)
+    subsetter = ft_subset.Subsetter(options=options)
+    subsetter.populate(unicodes=[ord(c) for c in chars])
+    subsetter.subset(font)
+    font.flavor = "woff2"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(".tmp")
+    font.save(str(tmp))
+    font.close()
+    tmp.replace(out_path)
+
+
+def _source_chars(source: Path) -> set[str]:
+    font = TTFont(str(source), lazy=True)
+    try:
+        return {chr(cp) for cp in font.getBestCmap()}
+    finally:
+        font.close()
+
+
+def resolve_source(repo_dir: Path, explicit: Path | None = None) -> Path:
+    if explicit:
+        return explicit
+    env = os.environ.get(SOURCE_ENV)
+    return Path(env).expanduser() if env else repo_dir / DEFAULT_SOURCE
+
+
+def build_fonts(repo_dir: Path, source: Path, check: bool = False) -> bool:
+    """Subset changed buckets and refresh the @font-face block. Returns False if skipped."""
+    chars = collect_chars(repo_dir)
+    buckets = bucketize(chars)
+    print(f"Font glyph set: {len(chars)} characters in {len(buckets)} buckets")
+    if ft_subset is None or brotli is None:
+        print("Font subsetting skipped: fontTools and brotli are required")
+        return False
+    if not source.is_file():
+        print(f"Font subsetting skipped: source font not found ({source})")
+        return False
+
+    fonts_dir = repo_dir / FONTS_DIR
+    state_path = fonts_dir / STATE_NAME
+    state: dict[str, object] = json.loads(state_path.read_text("utf-8")) if state_path.exists() else {}
+    source_digest = hashlib.sha256(source.read_bytes()).hexdigest()[:16]
+
+    covered = _source_chars(source)
+    missing = sorted(chars - covered)
+    if missing:
+        print(f"Font: {len(missing)} character(s) not in the source font fall back to system fonts")
+
+    entries: list[dict[str, str]] = []
+    built = 0
+    for b in buckets:
+        usable = "".join(c for c in b.chars if c in covered)
+        if not usable:
+            continue
+        b = Bucket(b.name, usable)
+        name = b.filename(source_digest)
+        if not (fonts_dir / name).is_file():
+            if check:
+                raise SystemExit(f"Font subset out of date: {name}")
+            _subset(source, b.chars, fonts_dir / name)
+            built += 1
+        entries.append({"bucket": b.name, "file": name, "chars": b.digest, "range": unicode_range(b.chars)})
+
+    css_path = repo_dir / CSS_PATH
+    css = css_path.read_text("utf-8")
+    new_css = update_css(css, render_font_faces(entries))
+    if check:
+        if new_css != css:
+            raise SystemExit("Font @font-face rules in site.css are out of date")
+        return True
+
+    keep = {e["file"] for e in entries}
+    for stale in fonts_dir.glob(f"{FILE_PREFIX}-*.woff2"):
+        if stale.name not in keep:
+            stale.unlink()
+
+    new_state = {"source": source_digest, "buckets": entries}
+    if new_state != state:
+        state_path.write_text(json.dumps(new_state, ensure_ascii=False, indent=2) + "\n", "utf-8")
+    if new_css != css:
+        css_path.write_text(new_css, "utf-8")
+
+    total = sum((fonts_dir / e["file"]).stat().st_size for e in entries)
+    print(f"Font subsets: {len(entries)} files, {built} rebuilt, {total / 1024:.1f} KB total")
+    return True
+
+
+def main() -> None:
+    repo_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="Subset the site web font to the characters actually used.")
+    ap.add_argument("--source", type=Path, help=f"full source font (default: ${SOURCE_ENV} or {DEFAULT_SOURCE})")
+    ap.add_argument("--check", action="store_true", help="fail instead of rebuilding out-of-date subsets")
+    args = ap.parse_args()
+    build_fonts(repo_dir, resolve_source(repo_dir, args.source), check=args.check)
+
+
+if __name__ == "__main__":
+    main()
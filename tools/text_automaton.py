@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick automaton over literal patterns.
+
+One left-to-right pass over a text finds every occurrence of every pattern,
+in time linear in the text plus the number of matches however many patterns
+there are. tools/generate_experiment_data.py uses it to classify PDF lines
+against the rule table in tools/parse_rules.json, and (as a Replacer) to
+apply the correction dictionary in tools/corrections.json.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from typing import Iterable, Iterator
+
+
+class Automaton:
+    """Trie with failure links; pattern ids are indexes into .patterns."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns: list[str] = list(dict.fromkeys(p for p in patterns if p))
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for pid, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (pid,)
+
+        # Breadth-first, so a node's failure target is final before its children.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """(start, pattern id) for every occurrence, in order of match end."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                yield i + 1 - len(patterns[pid]), pid
+
+
+class Replacer:
+    """
+    Replaces many literals in one automaton pass: leftmost match first, the
+    longest one where several start at the same place, never overlapping.
+    counts records how often each pattern was replaced.
+    """
+
+    def __init__(self, mapping: dict[str, str]) -> None:
+        self.mapping = {k: v for k, v in mapping.items() if k and k != v}
+        self.automaton = Automaton(self.mapping)
+        self._replacements = [self.mapping[p] for p in self.automaton.patterns]
+        self._initials = frozenset(p[0] for p in self.automaton.patterns)
+        self.counts: Counter[str] = Counter()
+
+    def __call__(self, text: str) -> str:
+        if self._initials.isdisjoint(text):  # most lines: no pattern can start here
+            return text
+        patterns = self.automaton.patterns
+        longest: dict[int, int] = {}  # start -> pattern id
+        for start, pid in self.automaton.iter_matches(text):
+            cur = longest.get(start)
+            if cur is None or len(patterns[pid]) > len(patterns[cur]):
+                longest[start] = pid
+        if not longest:
+            return text
+        out: list[str] = []
+        pos = 0
+        for start in sorted(longest):
+            if start < pos:
+                continue
+            pid = longest[start]
+            out += (text[pos:start], self._replacements[pid])
+            pos = start + len(patterns[pid])
+            self.counts[patterns[pid]] += 1
+        out.append(text[pos:])
+        return "".join(out)